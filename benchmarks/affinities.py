@@ -0,0 +1,107 @@
+"""Compare seg_to_affgraph with the previous per-dimension implementation.
+
+Computes the affinities of a random 3D segmentation for a short-range and a
+long-range neighborhood with the previous implementation (int32 output,
+cast to float32 as done by ``AffinitiesPredictor.create_target``), with
+``seg_to_affgraph`` writing float32 and uint8, and with torch on the CPU and
+(if available) the GPU, and prints the time per call.
+
+    python benchmarks/affinities.py --shape 132 132 132 --repeats 5
+"""
+from dacapo.utils.affinities import seg_to_affgraph
+
+from funlib.geometry import Coordinate
+
+import numpy as np
+import torch
+
+import argparse
+import itertools
+import time
+
+
+def legacy_seg_to_affgraph(seg, neighborhood):
+    # the previous 3D implementation, before affinities were vectorised
+    nhood = np.array(neighborhood)
+    shape = seg.shape
+    aff = np.zeros((nhood.shape[0],) + shape, dtype=np.int32)
+    for e in range(nhood.shape[0]):
+        a = tuple(
+            slice(max(0, -nhood[e, d]), min(shape[d], shape[d] - nhood[e, d]))
+            for d in range(3)
+        )
+        b = tuple(
+            slice(max(0, nhood[e, d]), min(shape[d], shape[d] + nhood[e, d]))
+            for d in range(3)
+        )
+        aff[(e,) + a] = (seg[a] == seg[b]) * (seg[a] > 0) * (seg[b] > 0)
+    return aff
+
+
+def neighborhoods():
+    short = [Coordinate(o) for o in [(1, 0, 0), (0, 1, 0), (0, 0, 1)]]
+    long = short + [
+        Coordinate(tuple(step if d == axis else 0 for d in range(3)))
+        for step, axis in itertools.product((3, 9, 27), range(3))
+    ]
+    return {"short (3 offsets)": short, f"long ({len(long)} offsets)": long}
+
+
+def timed(function, repeats, sync=None):
+    function()
+    if sync is not None:
+        sync()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        result = function()
+    if sync is not None:
+        sync()
+    return (time.perf_counter() - start) / repeats, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--shape", type=int, nargs=3, default=(132, 132, 132))
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    # blocky segmentation with background
+    seg = np.kron(
+        rng.integers(0, 100, [s // 4 + 1 for s in args.shape], dtype=np.uint64),
+        np.ones((4, 4, 4), dtype=np.uint64),
+    )[tuple(slice(0, s) for s in args.shape)]
+
+    devices = ["cpu"] + (["cuda"] if torch.cuda.is_available() else [])
+    for name, neighborhood in neighborhoods().items():
+        legacy_time, expected = timed(
+            lambda: legacy_seg_to_affgraph(seg, neighborhood).astype(np.float32),
+            args.repeats,
+        )
+        print(f"{name}: legacy {legacy_time:.3f}s")
+        for dtype in (np.float32, np.uint8):
+            seconds, result = timed(
+                lambda: seg_to_affgraph(seg, neighborhood, dtype=dtype),
+                args.repeats,
+            )
+            assert (result == expected).all()
+            print(
+                f"    numpy {np.dtype(dtype).name:8s} {seconds:.3f}s, "
+                f"speedup {legacy_time / seconds:.1f}x"
+            )
+        for device in devices:
+            tensor = torch.from_numpy(seg.astype(np.int64)).to(device)
+            seconds, result = timed(
+                lambda: seg_to_affgraph(tensor, neighborhood, dtype=torch.float32),
+                args.repeats,
+                sync=torch.cuda.synchronize if device == "cuda" else None,
+            )
+            assert (result.cpu().numpy() == expected).all()
+            print(
+                f"    torch {device:8s} {seconds:.3f}s, "
+                f"speedup {legacy_time / seconds:.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Compare local_shape_descriptors with lsd.train.LsdExtractor.
+
+Computes the lsds of a synthetic 3D segmentation (voronoi cells with some
+background) with the sigma used by ``AffinitiesPredictor`` with
+``LsdExtractor``, with ``local_shape_descriptors`` with one and several
+threads, and with torch on the CPU and (if available) the GPU, and prints
+the time per call.
+
+    python benchmarks/lsds.py --shape 64 128 128 --voxel-size 8 4 4 --objects 200
+"""
+from dacapo.utils.lsds import local_shape_descriptors
+
+from lsd.train import LsdExtractor
+
+import numpy as np
+from scipy.ndimage import distance_transform_edt
+import torch
+
+import argparse
+import time
+
+
+def voronoi_segmentation(shape, num_objects):
+    rng = np.random.default_rng(0)
+    seeds = np.zeros(shape, dtype=bool)
+    seeds[tuple(rng.integers(0, s, num_objects) for s in shape)] = True
+    indices = distance_transform_edt(
+        ~seeds, return_distances=False, return_indices=True
+    )
+    seed_ids = np.cumsum(seeds).reshape(shape).astype(np.uint64) * 7919
+    seg = seed_ids[tuple(indices)]
+    seg[rng.random(shape) < 0.05] = 0
+    return seg
+
+
+def timed(function, repeats, sync=None):
+    function()
+    if sync is not None:
+        sync()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        result = function()
+    if sync is not None:
+        sync()
+    return (time.perf_counter() - start) / repeats, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--shape", type=int, nargs=3, default=(64, 128, 128))
+    parser.add_argument("--voxel-size", type=int, nargs=3, default=(8, 4, 4))
+    parser.add_argument("--objects", type=int, default=200)
+    parser.add_argument("--num-voxels", type=int, default=20)
+    parser.add_argument("--downsample", type=int, default=1)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--repeats", type=int, default=1)
+    args = parser.parse_args()
+
+    seg = voronoi_segmentation(tuple(args.shape), args.objects)
+    voxel_size = tuple(args.voxel_size)
+    # as in AffinitiesPredictor.sigma
+    sigma = (max(voxel_size) * args.num_voxels,) * 3
+
+    extractor = LsdExtractor(sigma, downsample=args.downsample)
+    reference_time, expected = timed(
+        lambda: extractor.get_descriptors(seg, voxel_size=voxel_size), args.repeats
+    )
+    print(f"LsdExtractor {reference_time:.3f}s")
+
+    for num_workers in sorted({1, args.workers}):
+        seconds, result = timed(
+            lambda: local_shape_descriptors(
+                seg,
+                sigma,
+                voxel_size,
+                downsample=args.downsample,
+                num_workers=num_workers,
+            ),
+            args.repeats,
+        )
+        print(
+            f"    numpy {num_workers:2d} threads {seconds:.3f}s, "
+            f"speedup {reference_time / seconds:.1f}x, "
+            f"max difference {np.abs(result - expected).max():.2g}"
+        )
+
+    devices = ["cpu"] + (["cuda"] if torch.cuda.is_available() else [])
+    for device in devices:
+        tensor = torch.from_numpy(seg.astype(np.int64)).to(device)
+        seconds, result = timed(
+            lambda: local_shape_descriptors(
+                tensor, sigma, voxel_size, downsample=args.downsample
+            ),
+            args.repeats,
+            sync=torch.cuda.synchronize if device == "cuda" else None,
+        )
+        print(
+            f"    torch {device:10s} {seconds:.3f}s, "
+            f"speedup {reference_time / seconds:.1f}x, "
+            f"max difference {np.abs(result.cpu().numpy() - expected).max():.2g}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Compare the resampling paths of ResampledArray.
+
+Resamples a random volume with the interpolation-free (block reduce,
+strided and repeat) path and with ``skimage.transform.rescale``, and prints
+the time per request and the largest difference between both.
+
+    python benchmarks/resampled_array.py --shape 256 256 256 --factor 2
+"""
+from dacapo.experiments.datasplits.datasets.arrays import (
+    ResampledArrayConfig,
+    ZarrArrayConfig,
+)
+
+from funlib.geometry import Coordinate
+
+import numpy as np
+import zarr
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+
+def benchmark(array, roi, repeats):
+    times = {}
+    results = {}
+    for name, resample in (("fast", array.__getitem__), ("rescale", array._rescale)):
+        start = time.perf_counter()
+        for _ in range(repeats):
+            results[name] = resample(roi)
+        times[name] = (time.perf_counter() - start) / repeats
+    return times, results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--shape", type=int, nargs=3, default=(256, 256, 256))
+    parser.add_argument("--factor", type=int, default=2)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--num_workers", type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        container = zarr.open(str(Path(tmp, "data.zarr")))
+        rng = np.random.default_rng(0)
+        volumes = {
+            "raw": (rng.random(args.shape) * 255).astype(np.uint8),
+            "labels": rng.integers(0, 8, args.shape, dtype=np.uint64),
+        }
+        for name, data in volumes.items():
+            dataset = container.create_dataset(name, data=data, chunks=(64, 64, 64))
+            dataset.attrs["offset"] = (0, 0, 0)
+            dataset.attrs["resolution"] = (4, 4, 4)
+            dataset.attrs["axes"] = ["z", "y", "x"]
+
+        factor = Coordinate((args.factor,) * 3)
+        ones = Coordinate((1,) * 3)
+        cases = [
+            ("raw", "downsample", ones, factor, 1),
+            ("labels", "downsample", ones, factor, 0),
+            ("labels", "upsample", factor, ones, 0),
+        ]
+        for name, direction, upsample, downsample, order in cases:
+            array_config = ResampledArrayConfig(
+                name=f"{name}_{direction}",
+                source_array_config=ZarrArrayConfig(
+                    name=name, file_name=Path(tmp, "data.zarr"), dataset=name
+                ),
+                upsample=upsample,
+                downsample=downsample,
+                interp_order=order,
+                num_workers=args.num_workers,
+            )
+            array = array_config.array_type(array_config)
+            times, results = benchmark(array, array.roi, args.repeats)
+            difference = np.abs(
+                results["fast"].astype(np.float64)
+                - results["rescale"].astype(np.float64)
+            )
+            print(
+                f"{name:7s} {direction:11s} order {order}: "
+                f"fast {times['fast']:.3f}s, rescale {times['rescale']:.3f}s, "
+                f"speedup {times['rescale'] / times['fast']:.1f}x, "
+                f"max difference {difference.max():.2f}, "
+                f"mismatching voxels {np.mean(difference > 1):.2%}"
+            )
+
+
+if __name__ == "__main__":
+    main()
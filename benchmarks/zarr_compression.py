@@ -0,0 +1,105 @@
+"""Compare the compression presets for zarr datasets written by DaCapo.
+
+Writes synthetic predictions (uint8), distances (float32) and labels
+(uint64) block by block with every compressor of the ``zarr_compressors``
+option and with the zarr default, and prints the write throughput and the
+size on disk.
+
+    python benchmarks/zarr_compression.py --shape 256 256 256 --block 64 64 64
+"""
+from dacapo import Options
+from dacapo.experiments.datasplits.datasets.arrays import ZarrArray
+from dacapo.store.array_store import LocalArrayIdentifier
+
+from funlib.geometry import Coordinate, Roi
+
+import numpy as np
+from scipy.ndimage import distance_transform_edt, gaussian_filter
+
+import argparse
+import itertools
+import os
+import tempfile
+import time
+from pathlib import Path
+
+
+def synthetic_volumes(shape):
+    rng = np.random.default_rng(0)
+    smooth = gaussian_filter(rng.random(shape, dtype=np.float32), sigma=4)
+    smooth = (smooth - smooth.min()) / (smooth.max() - smooth.min())
+    labels = (smooth * 50).astype(np.uint64) * 1000003
+    return {
+        "prediction (uint8)": (smooth * 255).astype(np.uint8),
+        "distances (float32)": np.tanh(
+            distance_transform_edt(smooth > 0.5) / 10
+        ).astype(np.float32),
+        "labels (uint64)": labels,
+    }
+
+
+def disk_size(path: Path) -> int:
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, files in os.walk(path)
+        for name in files
+    )
+
+
+def write_blocks(array, data, block_shape):
+    start = time.perf_counter()
+    for offset in itertools.product(
+        *(range(0, s, b) for s, b in zip(data.shape, block_shape))
+    ):
+        block = Roi(offset, block_shape)
+        slices = tuple(slice(o, o + b) for o, b in zip(offset, block_shape))
+        array[block] = data[slices]
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--shape", type=int, nargs=3, default=(256, 256, 256))
+    parser.add_argument("--block", type=int, nargs=3, default=(64, 64, 64))
+    args = parser.parse_args()
+
+    shape = Coordinate(args.shape)
+    block_shape = Coordinate(args.block)
+    voxel_size = Coordinate(1, 1, 1)
+    roi = Roi((0, 0, 0), shape)
+
+    compressors = {
+        "default": "default",
+        **{
+            preset: dict(config)
+            for preset, config in Options.instance().zarr_compressors.items()
+        },
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, data in synthetic_volumes(tuple(shape)).items():
+            for preset, compressor in compressors.items():
+                identifier = LocalArrayIdentifier(
+                    Path(tmp, f"{preset}.zarr"), name.split()[0]
+                )
+                array = ZarrArray.create_from_array_identifier(
+                    identifier,
+                    ["z", "y", "x"],
+                    roi,
+                    None,
+                    voxel_size,
+                    data.dtype,
+                    write_size=block_shape * voxel_size,
+                    compressor=compressor,
+                )
+                seconds = write_blocks(array, data, block_shape)
+                size = disk_size(identifier.container / identifier.dataset)
+                print(
+                    f"{name:20s} {preset:8s}: "
+                    f"{data.nbytes / seconds / 1024**2:8.1f} MB/s, "
+                    f"{size / 1024**2:8.1f} MB on disk "
+                    f"(ratio {data.nbytes / size:.1f})"
+                )
+
+
+if __name__ == "__main__":
+    main()
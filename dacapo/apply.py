@@ -37,8 +37,12 @@ def apply(
     output_dtype: np.dtype | str = np.uint8,  # type: ignore
     overwrite: bool = True,
     file_format: str = "zarr",
+    precision: str = "float32",
+    channels_last: bool = False,
+    compile_model: Optional[str] = None,
+    precision_tolerance: float = 0.05,
 ):
-    """Load weights and apply a model to a dataset. If iteration is None, the best iteration based on the criterion is used. If roi is None, the whole input dataset is used."""
+    """Load weights and apply a model to a dataset. If iteration is None, the best iteration based on the criterion is used. If roi is None, the whole input dataset is used. ``precision``, ``channels_last``, ``compile_model`` and ``precision_tolerance`` configure inference, see ``predict``."""
     if isinstance(output_dtype, str):
         output_dtype = np.dtype(output_dtype)
 
@@ -163,6 +167,10 @@ def apply(
         num_workers,
         output_dtype,
         overwrite,
+        precision=precision,
+        channels_last=channels_last,
+        compile_model=compile_model,
+        precision_tolerance=precision_tolerance,
     )
 
 
@@ -177,6 +185,10 @@ def apply_run(
     num_workers: int = 12,
     output_dtype: np.dtype | str = np.uint8,  # type: ignore
     overwrite: bool = True,
+    precision: str = "float32",
+    channels_last: bool = False,
+    compile_model: Optional[str] = None,
+    precision_tolerance: float = 0.05,
 ):
     """Apply the model to a dataset. If roi is None, the whole input dataset is used. Assumes model is already loaded."""
 
@@ -192,6 +204,10 @@ def apply_run(
         num_workers=num_workers,
         output_dtype=output_dtype,
         overwrite=overwrite,
+        precision=precision,
+        channels_last=channels_last,
+        compile_model=compile_model,
+        precision_tolerance=precision_tolerance,
     )
 
     # post-process the output
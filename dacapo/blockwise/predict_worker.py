@@ -1,22 +1,24 @@
+import itertools
+import json
+import queue
 import sys
+import threading
+import time
+from contextlib import AbstractContextManager
 from pathlib import Path
-from typing import Optional
 
 import torch
 from dacapo.experiments.datasplits.datasets.arrays import ZarrArray
-from dacapo.gp import DaCapoArraySource
 from dacapo.store.array_store import LocalArrayIdentifier
 from dacapo.store.create_store import create_config_store, create_weights_store
 from dacapo.experiments import Run
 from dacapo.compute_context import create_compute_context
-import gunpowder as gp
-import gunpowder.torch as gp_torch
-
-from funlib.geometry import Coordinate
+from funlib.geometry import Coordinate, Roi
 import daisy
 
 import numpy as np
 import click
+from zarr.storage import normalize_storage_path
 
 import logging
 
@@ -26,6 +28,10 @@ read_write_conflict: bool = False
 fit: str = "valid"
 path = __file__
 
+PRECISIONS = ("float32", "float16", "bfloat16")
+COMPILE_MODES = ("compile", "trace")
+TIMING_STAGES = ("read", "normalize", "forward", "convert", "write")
+
 
 @click.group()
 @click.option(
@@ -61,6 +67,63 @@ def cli(log_level):
     "-oc", "--output_container", required=True, type=click.Path(file_okay=False)
 )
 @click.option("-od", "--output_dataset", required=True, type=str)
+@click.option(
+    "-bs",
+    "--batch_size",
+    type=int,
+    default=None,
+    help="The number of blocks to predict in a single forward pass. "
+    "If not given, it is chosen based on the free device memory.",
+)
+@click.option(
+    "-pf",
+    "--num_prefetch",
+    type=int,
+    default=2,
+    help="The number of batches to read ahead of the model.",
+)
+@click.option(
+    "-nw",
+    "--num_writers",
+    type=int,
+    default=2,
+    help="The number of threads writing predictions.",
+)
+@click.option(
+    "-pr",
+    "--precision",
+    type=click.Choice(PRECISIONS),
+    default="float32",
+    help="The precision to run inference in. Reduced precisions use autocast.",
+)
+@click.option(
+    "-cl",
+    "--channels_last",
+    is_flag=True,
+    default=False,
+    help="Run the model with a channels last memory format.",
+)
+@click.option(
+    "-cm",
+    "--compile_model",
+    type=click.Choice(COMPILE_MODES),
+    default=None,
+    help="Compile the model with torch.compile or trace it with TorchScript.",
+)
+@click.option(
+    "-pt",
+    "--precision_tolerance",
+    type=float,
+    default=0.05,
+    help="The maximum absolute difference to the float32 prediction on a "
+    "sample block before a warning is emitted.",
+)
+@click.option(
+    "--skip_existing",
+    is_flag=True,
+    default=False,
+    help="Skip blocks whose output chunks have all been written already.",
+)
 def start_worker(
     run_name: str,
     iteration: int | None,
@@ -68,6 +131,14 @@ def start_worker(
     input_dataset: str,
     output_container: Path | str,
     output_dataset: str,
+    batch_size: int | None = None,
+    num_prefetch: int = 2,
+    num_writers: int = 2,
+    precision: str = "float32",
+    channels_last: bool = False,
+    compile_model: str | None = None,
+    precision_tolerance: float = 0.05,
+    skip_existing: bool = False,
 ):
     compute_context = create_compute_context()
     device = compute_context.device
@@ -108,76 +179,544 @@ def start_worker(
 
     print(f"Predicting with input size {input_size}, output size {output_size}")
 
-    # create gunpowder keys
-
-    raw = gp.ArrayKey("RAW")
-    prediction = gp.ArrayKey("PREDICTION")
-
-    # assemble prediction pipeline
-
-    # prepare data source
-    pipeline = DaCapoArraySource(raw_array, raw)
-    # raw: (c, d, h, w)
-    pipeline += gp.Pad(raw, None)
-    # raw: (c, d, h, w)
-    pipeline += gp.Unsqueeze([raw])
-    # raw: (1, c, d, h, w)
-
-    pipeline += gp.Normalize(raw)
-
-    # predict
-    # model.eval()
-    pipeline += gp_torch.Predict(
-        model=model,
-        inputs={"x": raw},
-        outputs={0: prediction},
-        array_specs={
-            prediction: gp.ArraySpec(
-                voxel_size=output_voxel_size,
-                dtype=np.float32,  # assumes network output is float32
-            )
-        },
-        spawn_subprocess=False,
-        device=str(device),
-    )
+    if batch_size is None:
+        batch_size = auto_batch_size(
+            model,
+            input_shape,
+            device,
+            getattr(compute_context, "oom_limit", None),
+        )
+    print(f"Predicting with batch size {batch_size}")
 
-    # make reference batch request
-    request = gp.BatchRequest()
-    request.add(raw, input_size, voxel_size=input_voxel_size)
-    request.add(
-        prediction,
-        output_size,
-        voxel_size=output_voxel_size,
+    dtype = inference_dtype(precision, device)
+    memory_format = (
+        channels_last_format(model.architecture.dims) if channels_last else None
+    )
+    inference_model = prepare_model(
+        model,
+        (batch_size, model.num_in_channels) + tuple(input_shape),
+        device,
+        memory_format,
+        compile_model,
+    )
+    print(
+        f"Predicting with precision {dtype or torch.float32}, "
+        f"memory format {memory_format or torch.contiguous_format}, "
+        f"compile mode {compile_model}"
+    )
+    check_precision = (
+        dtype is not None or memory_format is not None or compile_model is not None
     )
 
+    # the model stays on the device for the lifetime of this worker, every
+    # block handed out by the daisy client reuses it.
+    # Blocks flow through three stages connected by bounded queues:
+    # a reader thread acquires and reads blocks, the main thread runs the
+    # model and converts its predictions to the output dtype on the device,
+    # and writer threads write the predictions.
     daisy_client = daisy.Client()
+    # all communication with the daisy server is serialized
+    daisy_lock = threading.Lock()
+    read_queue: queue.Queue = queue.Queue(maxsize=max(1, num_prefetch))
+    write_queue: queue.Queue = queue.Queue(maxsize=max(1, num_writers))
+    stats = TimingStats()
+
+    reader = threading.Thread(
+        target=read_blocks,
+        args=(
+            daisy_client,
+            daisy_lock,
+            raw_array,
+            batch_size,
+            read_queue,
+            output_array if skip_existing else None,
+        ),
+        daemon=True,
+    )
+    writers = [
+        threading.Thread(
+            target=write_blocks,
+            args=(
+                output_array,
+                daisy_lock,
+                write_queue,
+                stats,
+            ),
+            daemon=True,
+        )
+        for _ in range(max(1, num_writers))
+    ]
+    reader.start()
+    for writer in writers:
+        writer.start()
+
+    with torch.no_grad():
+        while (item := read_queue.get()) is not None:
+            managers, blocks, data, timing = item
+            try:
+                if check_precision:
+                    # compare against the plain float32 model on the first block
+                    check_precision = False
+                    compare_to_float32(
+                        model,
+                        inference_model,
+                        data[:1],
+                        device,
+                        dtype,
+                        memory_format,
+                        precision_tolerance,
+                    )
+                outputs = forward_batch(
+                    inference_model,
+                    data,
+                    device,
+                    timing,
+                    dtype,
+                    memory_format,
+                    output_array.dtype,
+                    model.eval_activation,
+                )
+            except Exception as e:
+                logger.exception(f"Failed to predict blocks {blocks}")
+                release_blocks(managers, daisy_lock, e)
+                continue
+            write_queue.put((managers, blocks, outputs, timing))
+
+    for _ in writers:
+        write_queue.put(None)
+    for writer in writers:
+        writer.join()
+    reader.join()
+
+    stats.report()
+
+
+class TimingStats:
+    """Thread-safe accumulator of the per-stage timings of all blocks
+    processed by this worker."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.start = time.perf_counter()
+        self.total = {stage: 0.0 for stage in TIMING_STAGES}
+        self.num_blocks = 0
+
+    def add(self, timing: dict[str, float], num_blocks: int):
+        with self.lock:
+            for stage, elapsed in timing.items():
+                self.total[stage] += elapsed
+            self.num_blocks += num_blocks
+
+    def report(self):
+        if self.num_blocks == 0:
+            return
+        elapsed = time.perf_counter() - self.start
+        print(
+            f"Processed {self.num_blocks} blocks in {elapsed:.1f}s "
+            f"({self.num_blocks / elapsed:.2f} blocks/s), mean timing per block: "
+            f"{format_timing({k: v / self.num_blocks for k, v in self.total.items()})}"
+        )
+
 
-    while True:
-        with daisy_client.acquire_block() as block:
+def acquire_blocks(
+    daisy_client: daisy.Client, daisy_lock: threading.Lock, batch_size: int
+) -> tuple[list[AbstractContextManager], list[daisy.Block], bool]:
+    """Acquire up to ``batch_size`` blocks from the daisy client.
+
+    Returns the context managers of the acquired blocks (to be passed to
+    ``release_blocks`` once the blocks are processed), the blocks, and
+    whether the client has no more blocks to hand out.
+    """
+    managers = []
+    blocks = []
+    with daisy_lock:
+        while len(blocks) < batch_size:
+            manager = daisy_client.acquire_block()
+            block = manager.__enter__()
             if block is None:
-                return
+                manager.__exit__(None, None, None)
+                return managers, blocks, True
+            managers.append(manager)
+            blocks.append(block)
+    return managers, blocks, False
 
-            print(f"Processing block {block}")
 
-            chunk_request = request.copy()
-            chunk_request[raw].roi = block.read_roi
-            chunk_request[prediction].roi = block.write_roi
+def release_blocks(
+    managers: list[AbstractContextManager],
+    daisy_lock: threading.Lock,
+    exception: Exception | None = None,
+):
+    """Release acquired blocks, marking them as failed if an exception is
+    given."""
+    with daisy_lock:
+        for manager in managers:
+            if exception is None:
+                manager.__exit__(None, None, None)
+            else:
+                manager.__exit__(type(exception), exception, exception.__traceback__)
+
+
+def block_written(output_array: ZarrArray, block: daisy.Block) -> bool:
+    """Whether all chunks of ``output_array`` fully contained in the
+    ``write_roi`` of ``block`` exist. Chunks only partly inside of the
+    ``write_roi`` are ignored, since they might have been written by a
+    neighbouring block. Chunks that zarr did not store because they were
+    empty count as missing, so such blocks are predicted again, as are
+    blocks that do not fully contain any chunk."""
+    dataset = output_array.data
+    dims = output_array.dims
+    path = normalize_storage_path(dataset.path)
+    prefix = path + "/" if path else ""
+    metadata = json.loads(dataset.store[prefix + ".zarray"])
+    separator = metadata.get("dimension_separator") or "."
+
+    shape = dataset.shape[-dims:]
+    begin = (block.write_roi.begin - output_array.roi.begin) / output_array.voxel_size
+    end = begin + block.write_roi.shape / output_array.voxel_size
+    chunk_ranges = [
+        range(-(-size // chunk))
+        for size, chunk in zip(dataset.shape[:-dims], dataset.chunks[:-dims])
+    ] + [
+        # the last chunk of the array is complete if the block reaches its end
+        range(-(-b // chunk), -(-e // chunk) if e >= size else e // chunk)
+        for b, e, size, chunk in zip(begin, end, shape, dataset.chunks[-dims:])
+    ]
+    keys = [
+        prefix + separator.join(str(i) for i in index)
+        for index in itertools.product(*chunk_ranges)
+    ]
+    return len(keys) > 0 and all(key in dataset.chunk_store for key in keys)
+
+
+def read_blocks(
+    daisy_client: daisy.Client,
+    daisy_lock: threading.Lock,
+    raw_array: ZarrArray,
+    batch_size: int,
+    read_queue: queue.Queue,
+    output_array: ZarrArray | None = None,
+):
+    """Reader stage: acquire batches of blocks, read and normalize their
+    raw data and put them in ``read_queue``. A ``None`` is put in the queue
+    once all blocks have been handed out.
+
+    If ``output_array`` is given, blocks that have already been written to
+    it (see ``block_written``) are released right away."""
+    try:
+        done = False
+        while not done:
+            managers, blocks, done = acquire_blocks(daisy_client, daisy_lock, batch_size)
+            if output_array is not None:
+                written = [block_written(output_array, block) for block in blocks]
+                release_blocks(
+                    [m for m, w in zip(managers, written) if w], daisy_lock
+                )
+                managers = [m for m, w in zip(managers, written) if not w]
+                blocks = [b for b, w in zip(blocks, written) if not w]
+            if len(blocks) == 0:
+                if done:
+                    break
+                continue
+            timing: dict[str, float] = {}
+            try:
+                data = read_batch(raw_array, blocks, timing)
+            except Exception as e:
+                logger.exception(f"Failed to read blocks {blocks}")
+                release_blocks(managers, daisy_lock, e)
+                continue
+            read_queue.put((managers, blocks, data, timing))
+    finally:
+        read_queue.put(None)
+
+
+def write_blocks(
+    output_array: ZarrArray,
+    daisy_lock: threading.Lock,
+    write_queue: queue.Queue,
+    stats: TimingStats,
+):
+    """Writer stage: write predictions from ``write_queue``
+    until a ``None`` is received, then release their blocks."""
+    while (item := write_queue.get()) is not None:
+        managers, blocks, outputs, timing = item
+        try:
+            write_batch(output_array, blocks, outputs, timing)
+        except Exception as e:
+            logger.exception(f"Failed to write blocks {blocks}")
+            release_blocks(managers, daisy_lock, e)
+            continue
+        release_blocks(managers, daisy_lock)
+        stats.add(timing, len(blocks))
+        print(
+            f"Processed blocks {[block.block_id for block in blocks]}, "
+            f"timing: {format_timing(timing)}"
+        )
+
 
-            with gp.build(pipeline):
-                batch = pipeline.request_batch(chunk_request)
-            # prediction: (1, [c,] d, h, w)
-            output = batch.arrays[prediction].data.squeeze()
+def auto_batch_size(
+    model: torch.nn.Module,
+    input_shape: Coordinate,
+    device: torch.device,
+    oom_limit: float | int | None = None,
+    max_batch_size: int = 32,
+) -> int:
+    """Choose the number of blocks to predict at once from the free device
+    memory.
+
+    A single block is pushed through the model to measure its peak memory
+    footprint. The batch size is then the number of such blocks that fit
+    into the free memory, leaving ``oom_limit`` GB free (as in
+    ``LocalTorch``). On CPU a batch size of 1 is used.
+    """
+    if device.type != "cuda":
+        return 1
+    if oom_limit is None:
+        oom_limit = 0
+
+    torch.cuda.empty_cache()
+    torch.cuda.reset_peak_memory_stats(device)
+    baseline = torch.cuda.memory_allocated(device)
+    with torch.no_grad():
+        model(
+            torch.zeros((1, model.num_in_channels) + tuple(input_shape), device=device)
+        )
+    per_block = max(torch.cuda.max_memory_allocated(device) - baseline, 1)
+
+    free = torch.cuda.mem_get_info(device)[0] - oom_limit * 1024**3
+    return int(max(1, min(max_batch_size, free // per_block)))
+
+
+def format_timing(timing: dict[str, float]) -> str:
+    """Format a per-stage timing breakdown (in seconds) for logging."""
+    return ", ".join(f"{stage}={timing[stage]:.3f}s" for stage in TIMING_STAGES)
 
-            # convert to uint8 if necessary:
-            if output_array.dtype == np.uint8:
-                if "sigmoid" not in str(model.eval_activation).lower():
-                    # assume output is in [-1, 1]
-                    output += 1
-                    output /= 2
-                output *= 255
-                output = output.clip(0, 255)
-                output = output.astype(np.uint8)
-            output_array[block.write_roi] = output
+
+def normalize(data: np.ndarray) -> np.ndarray:
+    """Normalize raw data to float32 in [0, 1].
+
+    Follows the behaviour of ``gp.Normalize`` with the default factor.
+    """
+    if data.dtype == np.uint8:
+        factor = 1.0 / 255
+    elif data.dtype == np.uint16:
+        factor = 1.0 / (256 * 256 - 1)
+    elif data.dtype == np.float32:
+        assert (
+            data.min() >= 0 and data.max() <= 1
+        ), "Values are float but not in [0,1], I don't know how to normalize. Please provide a factor."
+        factor = 1.0
+    else:
+        raise RuntimeError(
+            f"Automatic normalization for {data.dtype} not implemented, please provide a factor."
+        )
+    return data.astype(np.float32) * factor
+
+
+def read_padded(raw_array: ZarrArray, roi: Roi) -> np.ndarray:
+    """Read ``roi`` from ``raw_array``, padding the parts of ``roi`` that
+    lie outside of the array (e.g. the context of blocks at the border of
+    the volume) with zeros."""
+    if raw_array.roi.contains(roi):
+        return raw_array[roi]
+    voxel_size = raw_array.voxel_size
+    channels = (raw_array.num_channels,) if "c" in raw_array.axes else ()
+    data = np.zeros(channels + tuple(roi.shape / voxel_size), dtype=raw_array.dtype)
+    valid_roi = roi.intersect(raw_array.roi)
+    if not valid_roi.empty:
+        start = (valid_roi.offset - roi.offset) / voxel_size
+        shape = valid_roi.shape / voxel_size
+        data[(...,) + tuple(slice(b, b + s) for b, s in zip(start, shape))] = (
+            raw_array[valid_roi]
+        )
+    return data
+
+
+def read_batch(
+    raw_array: ZarrArray, blocks: list[daisy.Block], timing: dict[str, float]
+) -> np.ndarray:
+    """Read and normalize the raw data of a batch of blocks.
+
+    Returns an array of shape (b, c, d, h, w).
+    """
+    start = time.perf_counter()
+    raw_data = [read_padded(raw_array, block.read_roi) for block in blocks]
+    if "c" not in raw_array.axes:
+        # add a channel dimension
+        raw_data = [np.expand_dims(data, 0) for data in raw_data]
+    timing["read"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    data = normalize(np.stack(raw_data))
+    timing["normalize"] = time.perf_counter() - start
+    return data
+
+
+def inference_dtype(precision: str, device: torch.device) -> torch.dtype | None:
+    """Get the autocast dtype for the requested precision on ``device``.
+
+    Returns None if inference should run in float32. On CPU, float16 is
+    replaced by bfloat16, and reduced precision is only used if the hardware
+    supports bfloat16.
+    """
+    if precision == "float32":
+        return None
+    if device.type == "cuda":
+        if precision == "bfloat16" and not torch.cuda.is_bf16_supported():
+            logger.warning("bfloat16 is not supported on this GPU, using float16.")
+            return torch.float16
+        return torch.float16 if precision == "float16" else torch.bfloat16
+    if device.type == "cpu":
+        try:
+            bf16_supported = torch.ops.mkldnn._is_mkldnn_bf16_supported()
+        except (AttributeError, RuntimeError):
+            bf16_supported = False
+        if not bf16_supported:
+            logger.warning(
+                f"{precision} is not supported on this CPU, using float32 instead."
+            )
+            return None
+        return torch.bfloat16
+    logger.warning(f"{precision} is not supported on {device}, using float32.")
+    return None
+
+
+def channels_last_format(dims: int) -> torch.memory_format:
+    """Get the channels last memory format for a model with ``dims`` spatial
+    dimensions."""
+    if dims == 2:
+        return torch.channels_last
+    elif dims == 3:
+        return torch.channels_last_3d
+    raise ValueError(f"Channels last is not supported for {dims}D models.")
+
+
+def prepare_model(
+    model: torch.nn.Module,
+    input_shape: tuple[int, ...],
+    device: torch.device,
+    memory_format: torch.memory_format | None = None,
+    compile_model: str | None = None,
+) -> torch.nn.Module:
+    """Convert the model to the requested memory format and optionally
+    compile (``torch.compile``) or trace (TorchScript) it.
+
+    The original model is not modified unless a memory format is given, in
+    which case its parameters are converted in place.
+    """
+    if memory_format is not None:
+        model = model.to(memory_format=memory_format)
+    if compile_model == "compile":
+        return torch.compile(model)
+    elif compile_model == "trace":
+        example = torch.zeros(input_shape, device=device)
+        if memory_format is not None:
+            example = example.contiguous(memory_format=memory_format)
+        with torch.no_grad():
+            return torch.jit.trace(model, example)
+    return model
+
+
+def compare_to_float32(
+    model: torch.nn.Module,
+    inference_model: torch.nn.Module,
+    data: np.ndarray,
+    device: torch.device,
+    dtype: torch.dtype | None,
+    memory_format: torch.memory_format | None,
+    tolerance: float,
+):
+    """Compare the prediction of ``inference_model`` (at reduced precision
+    and/or in ``memory_format``) to the float32 prediction of ``model`` on a
+    sample and warn if the maximum absolute difference exceeds
+    ``tolerance``."""
+    reference = forward_batch(model, data, device, {})
+    prediction = forward_batch(inference_model, data, device, {}, dtype, memory_format)
+    difference = float(np.abs(reference - prediction).max())
+    if difference > tolerance:
+        logger.warning(
+            f"Inference at {dtype} deviates from float32 by up to {difference:.4f} "
+            f"(tolerance {tolerance})."
+        )
+    else:
+        print(f"Inference at {dtype} deviates from float32 by up to {difference:.4f}.")
+
+
+def forward_batch(
+    model: torch.nn.Module,
+    data: np.ndarray,
+    device: torch.device,
+    timing: dict[str, float],
+    dtype: torch.dtype | None = None,
+    memory_format: torch.memory_format | None = None,
+    output_dtype: np.dtype | None = None,
+    eval_activation: torch.nn.Module | None = None,
+) -> np.ndarray:
+    """Run the model on a batch of normalized raw data, optionally under
+    autocast to ``dtype``.
+
+    If ``output_dtype`` is given, the predictions are converted to it on the
+    device (see ``quantize_output``) so that only the converted buffer is
+    copied to the host. Otherwise float32 predictions are returned.
+
+    Returns the predictions of shape (b, c, d, h, w) on the host.
+    """
+    start = time.perf_counter()
+    inputs = torch.as_tensor(data).to(device)
+    if memory_format is not None:
+        inputs = inputs.contiguous(memory_format=memory_format)
+    with torch.autocast(
+        device_type=device.type, dtype=dtype, enabled=dtype is not None
+    ):
+        prediction = model(inputs)
+    if isinstance(prediction, (tuple, list)):
+        prediction = prediction[0]
+    timing["forward"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    if output_dtype is not None:
+        prediction = quantize_output(prediction, output_dtype, eval_activation)
+    else:
+        prediction = prediction.float()
+    outputs = prediction.cpu().numpy()
+    timing["convert"] = time.perf_counter() - start
+    return outputs
+
+
+def quantize_output(
+    prediction: torch.Tensor,
+    dtype: np.dtype,
+    eval_activation: torch.nn.Module | None,
+) -> torch.Tensor:
+    """Convert a prediction to the dtype of the output array on its device.
+
+    For uint8 outputs, predictions are assumed to be in [-1, 1] unless the
+    model ends in a sigmoid, in which case they are assumed to be in
+    [0, 1]. They are scaled to [0, 255] in place and truncated to uint8.
+    """
+    prediction = prediction.float()
+    if dtype == np.uint8:
+        if "sigmoid" not in str(eval_activation).lower():
+            # assume output is in [-1, 1]
+            prediction.add_(1).div_(2)
+        return prediction.mul_(255).clamp_(0, 255).to(torch.uint8)
+    elif dtype == np.float16:
+        return prediction.half()
+    return prediction
+
+
+def write_batch(
+    output_array: ZarrArray,
+    blocks: list[daisy.Block],
+    outputs: np.ndarray,
+    timing: dict[str, float],
+):
+    """Write each prediction of a batch to the ``write_roi`` of its
+    block."""
+    start = time.perf_counter()
+    for block, output in zip(blocks, outputs):
+        # prediction: ([c,] d, h, w)
+        output_array[block.write_roi] = output.squeeze()
+    timing["write"] = time.perf_counter() - start
 
 
 def spawn_worker(
@@ -185,6 +724,14 @@ def spawn_worker(
     iteration: int | None,
     input_array_identifier: "LocalArrayIdentifier",
     output_array_identifier: "LocalArrayIdentifier",
+    batch_size: int | None = None,
+    num_prefetch: int = 2,
+    num_writers: int = 2,
+    precision: str = "float32",
+    channels_last: bool = False,
+    compile_model: str | None = None,
+    skip_existing: bool = False,
+    precision_tolerance: float = 0.05,
 ):
     """Spawn a worker to predict on a given dataset.
 
@@ -193,6 +740,14 @@ def spawn_worker(
         iteration (int or None): The training iteration of the model to use for prediction.
         input_array_identifier (LocalArrayIdentifier): The raw data to predict on.
         output_array_identifier (LocalArrayIdentifier): The identifier of the prediction array.
+        batch_size (int or None): The number of blocks to predict at once. If None, it is chosen from the free device memory.
+        num_prefetch (int): The number of batches read ahead of the model.
+        num_writers (int): The number of threads writing predictions.
+        precision (str): The precision to run inference in. One of "float32", "float16" or "bfloat16".
+        channels_last (bool): Whether to run the model with a channels last memory format.
+        compile_model (str or None): Compile the model with "compile" (torch.compile) or "trace" (TorchScript).
+        skip_existing (bool): Skip blocks whose output chunks have all been written already.
+        precision_tolerance (float): The maximum absolute difference to the float32 prediction on a sample block before a warning is emitted.
     """
     compute_context = create_compute_context()
 
@@ -212,9 +767,25 @@ def spawn_worker(
         output_array_identifier.container,
         "--output_dataset",
         output_array_identifier.dataset,
+        "--num_prefetch",
+        str(num_prefetch),
+        "--num_writers",
+        str(num_writers),
+        "--precision",
+        precision,
+        "--precision_tolerance",
+        str(precision_tolerance),
     ]
     if iteration is not None:
         command.extend(["--iteration", str(iteration)])
+    if batch_size is not None:
+        command.extend(["--batch_size", str(batch_size)])
+    if channels_last:
+        command.append("--channels_last")
+    if compile_model is not None:
+        command.extend(["--compile_model", compile_model])
+    if skip_existing:
+        command.append("--skip_existing")
 
     print("Defining worker with command: ", compute_context.wrap_command(command))
 
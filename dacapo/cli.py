@@ -57,8 +57,55 @@ def train(run_name):
 @click.option("-w", "--num_workers", type=int, default=30)
 @click.option("-dt", "--output_dtype", type=str, default="uint8")
 @click.option("-ow", "--overwrite", is_flag=True)
-def validate(run_name, iteration):
-    dacapo.validate(run_name, iteration)
+@click.option(
+    "-pr",
+    "--precision",
+    type=click.Choice(["float32", "float16", "bfloat16"]),
+    default="float32",
+    help="The precision to run inference in.",
+)
+@click.option(
+    "-cl",
+    "--channels_last",
+    is_flag=True,
+    help="Run the model with a channels last memory format.",
+)
+@click.option(
+    "-cm",
+    "--compile_model",
+    type=click.Choice(["compile", "trace"]),
+    default=None,
+    help="Compile the model with torch.compile or trace it with TorchScript.",
+)
+@click.option(
+    "-pt",
+    "--precision_tolerance",
+    type=float,
+    default=0.05,
+    help="The maximum absolute difference to the float32 prediction on a sample block before a warning is emitted.",
+)
+def validate(
+    run_name,
+    iteration,
+    num_workers,
+    output_dtype,
+    overwrite,
+    precision,
+    channels_last,
+    compile_model,
+    precision_tolerance,
+):
+    dacapo.validate(
+        run_name,
+        iteration,
+        num_workers=num_workers,
+        output_dtype=output_dtype,
+        overwrite=overwrite,
+        precision=precision,
+        channels_last=channels_last,
+        compile_model=compile_model,
+        precision_tolerance=precision_tolerance,
+    )
 
 
 @cli.command()
@@ -87,6 +134,33 @@ def validate(run_name, iteration):
 @click.option("-w", "--num_workers", type=int, default=30)
 @click.option("-dt", "--output_dtype", type=str, default="uint8")
 @click.option("-ow", "--overwrite", is_flag=True)
+@click.option(
+    "-pr",
+    "--precision",
+    type=click.Choice(["float32", "float16", "bfloat16"]),
+    default="float32",
+    help="The precision to run inference in.",
+)
+@click.option(
+    "-cl",
+    "--channels_last",
+    is_flag=True,
+    help="Run the model with a channels last memory format.",
+)
+@click.option(
+    "-cm",
+    "--compile_model",
+    type=click.Choice(["compile", "trace"]),
+    default=None,
+    help="Compile the model with torch.compile or trace it with TorchScript.",
+)
+@click.option(
+    "-pt",
+    "--precision_tolerance",
+    type=float,
+    default=0.05,
+    help="The maximum absolute difference to the float32 prediction on a sample block before a warning is emitted.",
+)
 def apply(
     run_name: str,
     input_container: Path | str,
@@ -100,6 +174,10 @@ def apply(
     num_workers: int = 30,
     output_dtype: np.dtype | str = "uint8",
     overwrite: bool = True,
+    precision: str = "float32",
+    channels_last: bool = False,
+    compile_model: Optional[str] = None,
+    precision_tolerance: float = 0.05,
 ):
     dacapo.apply(
         run_name,
@@ -114,6 +192,10 @@ def apply(
         num_workers,
         output_dtype,
         overwrite=overwrite,
+        precision=precision,
+        channels_last=channels_last,
+        compile_model=compile_model,
+        precision_tolerance=precision_tolerance,
     )
 
 
@@ -146,6 +228,47 @@ def apply(
 @click.option("-w", "--num_workers", type=int, default=30)
 @click.option("-dt", "--output_dtype", type=str, default="uint8")
 @click.option("-ow", "--overwrite", is_flag=True)
+@click.option(
+    "-bs",
+    "--batch_size",
+    type=int,
+    default=None,
+    help="The number of blocks to predict in a single forward pass. Chosen from the free device memory if not given.",
+)
+@click.option(
+    "-pr",
+    "--precision",
+    type=click.Choice(["float32", "float16", "bfloat16"]),
+    default="float32",
+    help="The precision to run inference in.",
+)
+@click.option(
+    "-cl",
+    "--channels_last",
+    is_flag=True,
+    help="Run the model with a channels last memory format.",
+)
+@click.option(
+    "-cm",
+    "--compile_model",
+    type=click.Choice(["compile", "trace"]),
+    default=None,
+    help="Compile the model with torch.compile or trace it with TorchScript.",
+)
+@click.option(
+    "-pt",
+    "--precision_tolerance",
+    type=float,
+    default=0.05,
+    help="The maximum absolute difference to the float32 prediction on a sample block before a warning is emitted.",
+)
+@click.option(
+    "-rs",
+    "--reset",
+    type=click.Choice(["delete", "resume"]),
+    default="delete",
+    help="How to reset an existing output dataset if it is not overwritten: delete all its chunks, or resume by skipping the blocks that have already been predicted.",
+)
 def predict(
     run_name: str,
     iteration: int,
@@ -156,6 +279,12 @@ def predict(
     num_workers: int = 30,
     output_dtype: np.dtype | str = np.uint8,  # type: ignore
     overwrite: bool = True,
+    batch_size: Optional[int] = None,
+    precision: str = "float32",
+    channels_last: bool = False,
+    compile_model: Optional[str] = None,
+    reset: str = "delete",
+    precision_tolerance: float = 0.05,
 ):
     dacapo.predict(
         run_name,
@@ -163,10 +292,16 @@ def predict(
         input_container,
         input_dataset,
         output_path,
-        output_roi,
-        num_workers,
-        output_dtype,
-        overwrite,
+        output_roi=output_roi,
+        num_workers=num_workers,
+        output_dtype=output_dtype,
+        overwrite=overwrite,
+        batch_size=batch_size,
+        precision=precision,
+        channels_last=channels_last,
+        compile_model=compile_model,
+        reset=reset,
+        precision_tolerance=precision_tolerance,
     )
 
 
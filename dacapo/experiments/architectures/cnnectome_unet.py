@@ -2,6 +2,7 @@ from .architecture import Architecture
 
 import torch
 import torch.nn as nn
+from torch.utils.checkpoint import checkpoint
 
 import math
 
@@ -248,6 +249,9 @@ class CNNectomeUNetModule(torch.nn.Module):
 
         self.dims = len(downsample_factors[0])
         self.use_attention = use_attention
+        # recompute the convolutional passes of each level in the backward
+        # pass instead of storing their activations (training only)
+        self.checkpoint_activations = False
 
         # default arguments
 
@@ -377,12 +381,17 @@ class CNNectomeUNetModule(torch.nn.Module):
             ]
         )
 
+    def conv_pass(self, conv, x):
+        if self.checkpoint_activations and self.training:
+            return checkpoint(conv, x, use_reentrant=False)
+        return conv(x)
+
     def rec_forward(self, level, f_in):
         # index of level in layer arrays
         i = self.num_levels - level - 1
 
         # convolve
-        f_left = self.l_conv[i](f_in)
+        f_left = self.conv_pass(self.l_conv[i], f_in)
 
         # end of recursion
         if level == 0:
@@ -410,7 +419,10 @@ class CNNectomeUNetModule(torch.nn.Module):
                 ]
 
             # convolve
-            fs_out = [self.r_conv[h][i](fs_right[h]) for h in range(self.num_heads)]
+            fs_out = [
+                self.conv_pass(self.r_conv[h][i], fs_right[h])
+                for h in range(self.num_heads)
+            ]
 
         return fs_out
 
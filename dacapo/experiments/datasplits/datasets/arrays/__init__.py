@@ -19,6 +19,9 @@ from .merge_instances_array_config import (
 )  # noqa
 from .dvid_array_config import DVIDArray, DVIDArrayConfig
 from .sum_array_config import SumArray, SumArrayConfig
+from .cached_array_config import CachedArray, CachedArrayConfig  # noqa
+from .tiff_array_config import TiffArray, TiffArrayConfig  # noqa
 
 # nonconfigurable arrays (helpers)
 from .numpy_array import NumpyArray  # noqa
+from .dask_adapter import to_dask, to_xarray, store_dask  # noqa
@@ -6,6 +6,11 @@ import neuroglancer
 
 import numpy as np
 
+from typing import Optional
+
+# the largest label id for which labels are grouped with a lookup table
+MAX_LUT_SIZE = 2**24
+
 
 class BinarizeArray(Array):
     """
@@ -23,6 +28,11 @@ class BinarizeArray(Array):
     Now you can have a binary classification for membrane or not which in
     some cases overlaps with the channel for mitochondria which includes
     the mito membrane.
+
+    Labels are grouped in a single pass with a lookup table from label id to
+    channel values, unless the labels contain negative or very large ids
+    (above ``MAX_LUT_SIZE``), in which case each grouping is computed with
+    ``np.isin``.
     """
 
     def __init__(self, array_config):
@@ -37,6 +47,10 @@ class BinarizeArray(Array):
         ), "Cannot initialize a BinarizeArray with a source array with channels"
 
         self._groupings = array_config.groupings
+        self._lut: Optional[np.ndarray] = None
+        all_ids = [id for _, ids in self._groupings for id in ids]
+        self._min_id = min(all_ids, default=0)
+        self._max_id = max(all_ids, default=0)
 
     @property
     def attrs(self):
@@ -83,12 +97,41 @@ class BinarizeArray(Array):
 
     def __getitem__(self, roi: Roi) -> np.ndarray:
         labels = self._source_array[roi]
+        if labels.size == 0:
+            return np.zeros((len(self._groupings), *labels.shape), dtype=np.uint8)
+
+        lut = self._get_lut(int(labels.max())) if labels.min() >= 0 else None
+        if lut is None:
+            return self._group_isin(labels)
+        return np.take(lut, labels.astype(np.intp, copy=False), axis=1)
+
+    def _get_lut(self, max_label: int) -> Optional[np.ndarray]:
+        """A ``(num_channels, n)`` lookup table from label ids up to at least
+        ``max_label`` to the value of each channel, or ``None`` if the table
+        would be too large."""
+        if self._lut is not None and self._lut.shape[1] > max_label:
+            return self._lut
+        size = max(max_label, self._max_id, self.background) + 1
+        if size > MAX_LUT_SIZE or self._min_id < 0:
+            return None
+        lut = np.zeros((len(self._groupings), size), dtype=np.uint8)
+        for i, (_, ids) in enumerate(self._groupings):
+            if len(ids) == 0:
+                lut[i] = 1
+                if self.background >= 0:
+                    lut[i, self.background] = 0
+            else:
+                lut[i, list(ids)] = 1
+        self._lut = lut
+        return lut
+
+    def _group_isin(self, labels: np.ndarray) -> np.ndarray:
         grouped = np.zeros((len(self._groupings), *labels.shape), dtype=np.uint8)
         for i, (_, ids) in enumerate(self._groupings):
             if len(ids) == 0:
-                grouped[i] += labels != self.background
-            for id in ids:
-                grouped[i] += labels == id
+                grouped[i] = labels != self.background
+            else:
+                grouped[i] = np.isin(labels, ids)
         return grouped
 
     def _can_neuroglance(self):
@@ -0,0 +1,280 @@
+from .array import Array
+from .dask_adapter import native_chunk_shape
+
+from funlib.geometry import Coordinate, Roi
+
+import numpy as np
+
+from collections import OrderedDict
+import hashlib
+import itertools
+import json
+import logging
+import os
+from pathlib import Path
+import threading
+from typing import Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class CachedArray(Array):
+    """A wrapper around another `source_array` that caches decoded chunks of
+    the source.
+
+    The ROI of the source is divided into a grid of chunks (by default the
+    chunks of the underlying zarr dataset, if any). Reads are served chunk by
+    chunk: a chunk is read from the source the first time it is needed and
+    kept in the cache until it is evicted by more recently used chunks, once
+    the cache exceeds ``cache_size`` bytes.
+
+    Without a ``cache_dir``, chunks are kept in memory in the current
+    process. With a ``cache_dir``, decoded chunks are stored as uncompressed
+    ``.npy`` files and read back via memory maps, which shares them between
+    all processes using the same directory (e.g. the ``PreCache`` workers of
+    a trainer) through the page cache. The least recently used files are
+    removed when the directory exceeds ``cache_size`` bytes. The files are
+    prefixed with a hash of the source array config, the chunk shape and the
+    dtype, so arrays sharing a ``cache_dir`` do not read each other's chunks.
+    """
+
+    def __init__(self, array_config):
+        self.name = array_config.name
+        self._source_array = array_config.source_array_config.array_type(
+            array_config.source_array_config
+        )
+        self.cache_size = array_config.cache_size
+        self.cache_dir = (
+            Path(array_config.cache_dir) if array_config.cache_dir is not None else None
+        )
+        if self.cache_dir is not None:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.chunk_shape = (
+            Coordinate(array_config.chunk_shape)
+            if array_config.chunk_shape is not None
+            else self._default_chunk_shape()
+        )
+        self._cache_key = (
+            self._config_hash(array_config) if self.cache_dir is not None else None
+        )
+
+        self.hits = 0
+        self.misses = 0
+        self._chunks: OrderedDict = OrderedDict()
+        self._cached_bytes = 0
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @property
+    def attrs(self):
+        return self._source_array.attrs
+
+    @property
+    def source_array(self) -> Array:
+        return self._source_array
+
+    @property
+    def axes(self):
+        return self._source_array.axes
+
+    @property
+    def dims(self) -> int:
+        return self._source_array.dims
+
+    @property
+    def voxel_size(self) -> Coordinate:
+        return self._source_array.voxel_size
+
+    @property
+    def roi(self) -> Roi:
+        return self._source_array.roi
+
+    @property
+    def writable(self) -> bool:
+        return False
+
+    @property
+    def dtype(self):
+        return self._source_array.dtype
+
+    @property
+    def num_channels(self) -> Optional[int]:
+        return self._source_array.num_channels
+
+    @property
+    def data(self):
+        raise ValueError(
+            "Cannot get a writable view of this array because it is a virtual "
+            "array created by modifying another array on demand."
+        )
+
+    def __getitem__(self, roi: Roi) -> np.ndarray:
+        return self.read(roi)
+
+    def read(
+        self, roi: Roi, profile: Optional[Callable[[bool], object]] = None
+    ) -> np.ndarray:
+        """Read ``roi`` from the cached chunks.
+
+        Args:
+            roi (Roi): The ROI to read, has to be contained in ``self.roi``.
+            profile (Callable, optional): Called with ``True`` for a cache hit
+                and ``False`` for a miss before each chunk is fetched. Has to
+                return a timer with ``start`` and ``stop`` methods (e.g. a
+                gunpowder ``Timing``), which is used to time the fetch.
+        """
+        if not self.roi.contains(roi):
+            raise ValueError(f"Cannot fetch data from outside my roi: {self.roi}!")
+
+        if roi.empty:
+            return self._source_array[roi]
+
+        chunk_size = self.chunk_shape * self.voxel_size
+        begin = (roi.begin - self.roi.begin) / chunk_size
+        end = (roi.end - self.roi.begin - self.voxel_size) / chunk_size
+
+        output = None
+        chunk_ranges = [range(b, e + 1) for b, e in zip(begin, end)]
+        for index in itertools.product(*chunk_ranges):
+            chunk_roi = Roi(
+                self.roi.begin + Coordinate(index) * chunk_size, chunk_size
+            ).intersect(self.roi)
+            hit = self._is_cached(index)
+            timer = profile(hit) if profile is not None else None
+            if timer is not None:
+                timer.start()
+            chunk = self._get_chunk(index, chunk_roi)
+            if timer is not None:
+                timer.stop()
+
+            if output is None:
+                output = np.empty(
+                    chunk.shape[: -self.dims] + roi.shape / self.voxel_size,
+                    dtype=chunk.dtype,
+                )
+            overlap = chunk_roi.intersect(roi)
+            output[self._spatial_slices(overlap, roi)] = chunk[
+                self._spatial_slices(overlap, chunk_roi)
+            ]
+
+        return output
+
+    def _spatial_slices(self, roi: Roi, within: Roi) -> Tuple[slice, ...]:
+        offset = (roi.begin - within.begin) / self.voxel_size
+        shape = roi.shape / self.voxel_size
+        return (Ellipsis,) + tuple(slice(o, o + s) for o, s in zip(offset, shape))
+
+    def _default_chunk_shape(self) -> Coordinate:
+        chunk_shape = native_chunk_shape(self._source_array)
+        if chunk_shape is None:
+            # virtual array
+            return Coordinate((64,) * self.dims)
+        return chunk_shape
+
+    def _config_hash(self, array_config) -> str:
+        from dacapo.store.converter import converter
+
+        config = {
+            "source_array_config": converter.unstructure(
+                array_config.source_array_config
+            ),
+            "chunk_shape": list(self.chunk_shape),
+            "dtype": str(np.dtype(self.dtype)),
+        }
+        return hashlib.sha1(
+            json.dumps(config, sort_keys=True, default=str).encode()
+        ).hexdigest()
+
+    def _chunk_file(self, index: Tuple[int, ...]) -> Path:
+        assert self.cache_dir is not None
+        return self.cache_dir / (
+            f"{self._cache_key}_" + "_".join(str(i) for i in index) + ".npy"
+        )
+
+    def _is_cached(self, index: Tuple[int, ...]) -> bool:
+        if self.cache_dir is not None:
+            return self._chunk_file(index).exists()
+        with self._lock:
+            return index in self._chunks
+
+    def _get_chunk(self, index: Tuple[int, ...], chunk_roi: Roi) -> np.ndarray:
+        if self.cache_dir is not None:
+            return self._get_shared_chunk(index, chunk_roi)
+
+        with self._lock:
+            chunk = self._chunks.get(index)
+            if chunk is not None:
+                self._chunks.move_to_end(index)
+                self.hits += 1
+                return chunk
+
+        chunk = np.asarray(self._source_array[chunk_roi])
+        with self._lock:
+            self.misses += 1
+            if index not in self._chunks:
+                self._chunks[index] = chunk
+                self._cached_bytes += chunk.nbytes
+            while self._cached_bytes > self.cache_size and len(self._chunks) > 1:
+                _, evicted = self._chunks.popitem(last=False)
+                self._cached_bytes -= evicted.nbytes
+        return chunk
+
+    def _get_shared_chunk(self, index: Tuple[int, ...], chunk_roi: Roi) -> np.ndarray:
+        chunk_file = self._chunk_file(index)
+        try:
+            chunk = np.load(chunk_file, mmap_mode="r")
+            # mark as recently used
+            os.utime(chunk_file)
+            self.hits += 1
+            return chunk
+        except (FileNotFoundError, ValueError, OSError):
+            # not cached yet, or removed/partially written by another process
+            pass
+
+        chunk = np.asarray(self._source_array[chunk_roi])
+        self.misses += 1
+        tmp_file = chunk_file.with_suffix(f".{os.getpid()}.tmp")
+        with tmp_file.open("wb") as f:
+            np.save(f, chunk)
+        os.replace(tmp_file, chunk_file)
+        self._evict_shared()
+        return chunk
+
+    def _evict_shared(self):
+        assert self.cache_dir is not None
+        files: Dict[Path, os.stat_result] = {}
+        for chunk_file in self.cache_dir.glob("*.npy"):
+            try:
+                files[chunk_file] = chunk_file.stat()
+            except FileNotFoundError:
+                # evicted by another process
+                continue
+        total = sum(stat.st_size for stat in files.values())
+        for chunk_file, stat in sorted(files.items(), key=lambda f: f[1].st_mtime):
+            if total <= self.cache_size:
+                break
+            try:
+                chunk_file.unlink()
+            except FileNotFoundError:
+                continue
+            total -= stat.st_size
+
+    def _can_neuroglance(self):
+        return self._source_array._can_neuroglance()
+
+    def _neuroglancer_source(self):
+        return self._source_array._neuroglancer_source()
+
+    def _neuroglancer_layer(self):
+        return self._source_array._neuroglancer_layer()
+
+    def _source_name(self):
+        return self._source_array._source_name()
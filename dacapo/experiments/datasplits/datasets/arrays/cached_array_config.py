@@ -0,0 +1,49 @@
+import attr
+
+from .array_config import ArrayConfig
+from .cached_array import CachedArray
+
+from funlib.geometry import Coordinate
+
+from pathlib import Path
+from typing import Optional
+
+
+@attr.s
+class CachedArrayConfig(ArrayConfig):
+    """This config class wraps an Array in a cache of decoded chunks. Useful
+    for training on small crops of large (compressed) volumes, where the same
+    chunks are read and decompressed over and over again."""
+
+    array_type = CachedArray
+
+    source_array_config: ArrayConfig = attr.ib(
+        metadata={"help_text": "The Array to cache."}
+    )
+
+    cache_size: int = attr.ib(
+        default=1024**3,
+        metadata={
+            "help_text": "The maximal number of bytes of decoded chunks to keep. "
+            "Least recently used chunks are evicted first."
+        },
+    )
+
+    cache_dir: Optional[Path] = attr.ib(
+        default=None,
+        metadata={
+            "help_text": "A directory to store decoded chunks in. Chunks in this "
+            "directory are shared between all processes reading this array, e.g. "
+            "the data fetchers of a trainer. If not given, every process keeps "
+            "its own cache in memory."
+        },
+    )
+
+    chunk_shape: Optional[Coordinate] = attr.ib(
+        default=None,
+        metadata={
+            "help_text": "The shape of the cached chunks in voxels. Defaults to the "
+            "chunk shape of the source zarr dataset, or 64 voxels per dimension "
+            "if the source is not backed by a chunked dataset."
+        },
+    )
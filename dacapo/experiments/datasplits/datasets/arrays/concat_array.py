@@ -1,4 +1,5 @@
 from .array import Array
+from .shared_reads import shared_reads
 
 from funlib.geometry import Roi
 
@@ -96,30 +97,43 @@ class ConcatArray(Array):
         return len(self.channels)
 
     def __getitem__(self, roi: Roi) -> np.ndarray:
-        default = (
-            np.zeros_like(self.source_array[roi])
-            if self.default_array is None
-            else self.default_array[roi]
-        )
-        arrays = [
-            (
-                self.source_arrays[channel][roi]
+        # channels often wrap the same dataset, read it only once
+        with shared_reads():
+            channel_arrays = {
+                channel: self.source_arrays[channel][roi]
+                for channel in self.channels
                 if channel in self.source_arrays
-                else default
+            }
+            default = (
+                self.default_array[roi]
+                if self.default_array is not None
+                and len(channel_arrays) < len(self.channels)
+                else None
             )
-            for channel in self.channels
-        ]
+        arrays = list(channel_arrays.values()) + (
+            [default] if default is not None else []
+        )
+        if len(arrays) == 0:
+            # no channel has data, the default is zeros
+            arrays = [np.zeros(roi.shape / self.voxel_size, dtype=self.dtype)]
         shapes = [array.shape for array in arrays]
         ndims = max([len(shape) for shape in shapes])
         assert ndims <= len(self.axes), f"{self.axes}, {ndims}"
         shapes = [(1,) * (len(self.axes) - len(shape)) + shape for shape in shapes]
         for axis_shapes in zip(*shapes):
             assert max(axis_shapes) == min(axis_shapes), f"{shapes}"
-        arrays = [array.reshape(shapes[0]) for array in arrays]
-        concatenated = np.concatenate(
-            arrays,
-            axis=0,
+
+        # write all channels into one output buffer
+        shape = shapes[0]
+        concatenated = np.zeros(
+            (shape[0] * len(self.channels),) + shape[1:],
+            dtype=np.result_type(*arrays),
         )
+        for i, channel in enumerate(self.channels):
+            array = channel_arrays.get(channel, default)
+            if array is not None:
+                channel_slice = slice(i * shape[0], (i + 1) * shape[0])
+                concatenated[channel_slice] = array.reshape(shape)
         if concatenated.shape[0] == 1:
             print(
                 f"Concatenated array has only one channel: {self.name} {concatenated.shape}"
@@ -0,0 +1,163 @@
+from .array import Array
+from .zarr_array import ZarrArray
+from dacapo.ext import NoSuchModule
+
+try:
+    import dask.array as da
+except ImportError:
+    da = NoSuchModule("dask.array")
+
+from funlib.geometry import Coordinate, Roi
+
+import numpy as np
+import xarray as xr
+
+import threading
+from typing import Optional, Tuple
+
+
+def native_chunk_shape(array: Array) -> Optional[Coordinate]:
+    """The spatial chunk shape (in voxels) of the dataset backing ``array``,
+    or ``None`` if the array is not backed by a chunked dataset.
+
+    Wrappers that read in chunks (e.g. ``CachedArray``) report their own
+    ``chunk_shape``, other wrappers the chunks of their source array if it
+    has the same voxel size."""
+    chunk_shape = getattr(array, "chunk_shape", None)
+    if chunk_shape is not None:
+        return Coordinate(chunk_shape)
+    try:
+        chunks = array.data.chunks
+    except (AttributeError, ValueError, RuntimeError, NotImplementedError):
+        source_array = getattr(array, "_source_array", None)
+        if source_array is not None and source_array.voxel_size == array.voxel_size:
+            return native_chunk_shape(source_array)
+        # virtual array
+        return None
+    return Coordinate(chunks[-array.dims :])
+
+
+class _ArrayIndexer:
+    """Exposes an ``Array`` through numpy-style slicing of voxels within its
+    ROI, as expected by ``dask.array.from_array`` and ``dask.array.store``."""
+
+    def __init__(self, array: Array, roi: Roi, shape: Tuple[int, ...]):
+        self.array = array
+        self.roi = roi
+        self.shape = shape
+        self.ndim = len(shape)
+        self.dtype = np.dtype(array.dtype)
+
+    def _split(self, slices) -> Tuple[Tuple, Roi]:
+        if not isinstance(slices, tuple):
+            slices = (slices,)
+        slices = slices + (slice(None),) * (self.ndim - len(slices))
+        dims = self.array.dims
+        spatial = [s.indices(n) for s, n in zip(slices[-dims:], self.shape[-dims:])]
+        begin = Coordinate(start for start, _, _ in spatial)
+        end = Coordinate(stop for _, stop, _ in spatial)
+        roi = Roi(
+            self.roi.offset + begin * self.array.voxel_size,
+            (end - begin) * self.array.voxel_size,
+        )
+        return slices[:-dims], roi
+
+    def __getitem__(self, slices) -> np.ndarray:
+        non_spatial, roi = self._split(slices)
+        data = self.array[roi]
+        return data[non_spatial + (Ellipsis,)] if non_spatial else data
+
+    def __setitem__(self, slices, value: np.ndarray):
+        _, roi = self._split(slices)
+        self.array[roi] = value
+
+
+def to_dask(
+    array: Array, roi: Optional[Roi] = None, chunk_shape: Optional[Coordinate] = None
+):
+    """Expose ``array`` as a lazy dask array.
+
+    Every dask chunk reads its part of ``roi`` from ``array`` when computed,
+    so that reductions, thresholding etc. can run chunk by chunk (e.g. with
+    ``.compute(scheduler="threads")``) without loading the whole array.
+
+    Args:
+        array (Array): The array to wrap.
+        roi (Roi, optional): The ROI to expose, defaults to ``array.roi``.
+        chunk_shape (Coordinate, optional): The spatial shape of the dask
+            chunks in voxels. Defaults to the chunks of the dataset backing
+            ``array`` (so that every dask chunk decodes whole zarr chunks), or
+            64 voxels per dimension for virtual arrays.
+    """
+    roi = array.roi if roi is None else roi
+    if chunk_shape is None:
+        chunk_shape = native_chunk_shape(array)
+    if chunk_shape is None:
+        chunk_shape = Coordinate((64,) * array.dims)
+
+    # non-spatial dimensions are not chunked
+    first = array[Roi(roi.offset, array.voxel_size)]
+    non_spatial_shape = first.shape[: -array.dims]
+    shape = non_spatial_shape + tuple(roi.shape / array.voxel_size)
+    chunks = non_spatial_shape + tuple(chunk_shape)
+
+    return da.from_array(
+        _ArrayIndexer(array, roi, shape),
+        chunks=chunks,
+        asarray=True,
+        lock=False,
+        fancy=False,
+        meta=np.empty((0,) * len(shape), dtype=first.dtype),
+    )
+
+
+def to_xarray(array: Array, roi: Optional[Roi] = None) -> xr.DataArray:
+    """Expose ``array`` as a lazy, dask backed ``xarray.DataArray`` with its
+    axes as dimensions and world coordinates of the voxels (in the same
+    units as the voxel size) along the spatial dimensions."""
+    roi = array.roi if roi is None else roi
+    data = to_dask(array, roi)
+    axes = list(array.axes)
+    if len(axes) != data.ndim:
+        axes = ["c", "z", "y", "x"][-data.ndim :]
+    spatial_axes = axes[-array.dims :]
+    spatial_shape = roi.shape / array.voxel_size
+    coords = {
+        axis: roi.offset[d] + np.arange(spatial_shape[d]) * array.voxel_size[d]
+        for d, axis in enumerate(spatial_axes)
+    }
+    return xr.DataArray(data, dims=axes, coords=coords, name=array._source_name())
+
+
+def store_dask(
+    data, zarr_array: ZarrArray, roi: Optional[Roi] = None, num_workers: int = 4
+):
+    """Compute the dask array ``data`` chunk by chunk and write it into
+    ``roi`` (by default the whole ROI) of ``zarr_array``.
+
+    Chunks are written in parallel with the threaded scheduler. If the dask
+    chunks are not aligned with the zarr chunks, writes are serialized, since
+    several dask chunks would write to the same zarr chunk.
+    """
+    roi = zarr_array.roi if roi is None else roi
+    shape = tuple(zarr_array.data.shape[: -zarr_array.dims]) + tuple(
+        roi.shape / zarr_array.voxel_size
+    )
+    assert data.shape == shape, f"Cannot store {data.shape} into {shape}"
+
+    zarr_chunks = native_chunk_shape(zarr_array)
+    offset = (roi.offset - zarr_array.roi.offset) / zarr_array.voxel_size
+    aligned = zarr_chunks is not None and all(
+        o % c == 0 and all(size % c == 0 for size in dim_chunks[:-1])
+        for o, c, dim_chunks in zip(
+            offset, zarr_chunks, data.chunks[-zarr_array.dims :]
+        )
+    )
+
+    da.store(
+        data,
+        _ArrayIndexer(zarr_array, roi, shape),
+        lock=False if aligned else threading.Lock(),
+        scheduler="threads",
+        num_workers=num_workers,
+    )
@@ -62,10 +62,10 @@ class IntensitiesArray(Array):
         )
 
     def __getitem__(self, roi: Roi) -> np.ndarray:
-        intensities = self._source_array[roi]
-        normalized = (intensities.astype(np.float32) - self._min) / (
-            self._max - self._min
-        )
+        normalized = self._source_array[roi].astype(np.float32)
+        # normalize in place, without temporary arrays
+        normalized -= self._min
+        normalized /= self._max - self._min
         return normalized
 
     def _can_neuroglance(self):
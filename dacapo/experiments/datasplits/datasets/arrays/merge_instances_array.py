@@ -1,4 +1,5 @@
 from .array import Array
+from .shared_reads import shared_reads
 
 from funlib.geometry import Coordinate, Roi
 
@@ -59,12 +60,16 @@ class MergeInstancesArray(Array):
         return self._source_array.attrs
 
     def __getitem__(self, roi: Roi) -> np.ndarray:
-        arrays = [source_array[roi] for source_array in self._source_arrays]
+        with shared_reads():
+            arrays = [source_array[roi] for source_array in self._source_arrays]
+        merged = np.zeros(arrays[0].shape, dtype=np.result_type(*arrays))
         offset = 0
         for array in arrays:
-            array[array > 0] += offset
-            offset = array.max()
-        return np.sum(arrays, axis=0)
+            # source data might be shared, do not modify it in place
+            merged += np.where(array > 0, array + offset, array)
+            if array.max() > 0:
+                offset += array.max()
+        return merged
 
     def _can_neuroglance(self):
         return self._source_array._can_neuroglance()
@@ -8,6 +8,8 @@ import neuroglancer
 
 import numpy as np
 
+from typing import Any, Optional, Set
+
 
 class MissingAnnotationsMask(Array):
     """
@@ -33,6 +35,10 @@ class MissingAnnotationsMask(Array):
         ), "Cannot initialize a BinarizeArray with a source array with channels"
 
         self._groupings = array_config.groupings
+        # the parsed "labels" attribute of the source, see
+        # `_present_not_annotated`
+        self._labels_attr: Optional[Any] = None
+        self._present_not_annotated: Set[int] = set()
 
     @property
     def axes(self):
@@ -82,15 +88,7 @@ class MissingAnnotationsMask(Array):
         grouped = np.ones((len(self._groupings), *labels.shape), dtype=bool)
         grouped[:] = labels > 0
         try:
-            labels_list = LabelList.parse_obj({"labels": self.attrs["labels"]}).labels
-            present_not_annotated = set(
-                [
-                    label.value
-                    for label in labels_list
-                    if label.annotationState.present
-                    and not label.annotationState.annotated
-                ]
-            )
+            present_not_annotated = self.present_not_annotated()
             for i, (_, ids) in enumerate(self._groupings):
                 if any([id in present_not_annotated for id in ids]):
                     # specially handle id 37
@@ -112,6 +110,24 @@ class MissingAnnotationsMask(Array):
             pass
         return grouped
 
+    def present_not_annotated(self) -> Set[int]:
+        """The ids of labels that are present in the source but not annotated.
+        The "labels" attribute of the source is only parsed again if it
+        changed."""
+        labels_attr = self.attrs["labels"]
+        if self._labels_attr is None or labels_attr != self._labels_attr:
+            labels_list = LabelList.parse_obj({"labels": labels_attr}).labels
+            self._present_not_annotated = set(
+                [
+                    label.value
+                    for label in labels_list
+                    if label.annotationState.present
+                    and not label.annotationState.annotated
+                ]
+            )
+            self._labels_attr = labels_attr
+        return self._present_not_annotated
+
     def _can_neuroglance(self):
         return self._source_array._can_neuroglance()
 
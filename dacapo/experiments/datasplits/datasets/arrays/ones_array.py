@@ -61,4 +61,12 @@ class OnesArray(Array):
         return self.source_array.num_channels
 
     def __getitem__(self, roi: Roi) -> np.ndarray:
-        return np.ones_like(self.source_array.__getitem__(roi), dtype=bool)
+        non_spatial_axes = self.axes[: -self.dims]
+        if any(axis != "c" for axis in non_spatial_axes):
+            # unknown size of sample axes, read the source for the shape
+            return np.ones_like(self.source_array.__getitem__(roi), dtype=bool)
+        # otherwise no need to read the source
+        shape = (self.num_channels,) * len(non_spatial_axes) + tuple(
+            roi.shape / self.voxel_size
+        )
+        return np.ones(shape, dtype=bool)
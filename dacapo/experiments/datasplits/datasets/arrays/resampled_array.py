@@ -6,9 +6,28 @@ from funlib.geometry import Coordinate, Roi
 import numpy as np
 from skimage.transform import rescale
 
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+# number of output voxels above which a request is split into tiles
+TILE_SIZE = 2**21
+
 
 class ResampledArray(Array):
-    """This is a zarr array"""
+    """This is a zarr array
+
+    If every axis is either only downsampled or only upsampled by an integer
+    factor (and upsampled axes use ``interp_order`` 0), labels are resampled
+    without interpolation: downsampling picks the center voxel
+    (``"nearest"``) or the most frequent label (``"mode"``) of each block of
+    source voxels, without converting to float, and upsampling repeats
+    source voxels. Intensities (``interp_order`` other than 0) are only
+    downsampled this way if ``block_mean`` is set, by averaging blocks of
+    source voxels, which is faster than but not identical to interpolating.
+    Large requests are split into tiles that are read and resampled in
+    parallel. All other cases are resampled with
+    ``skimage.transform.rescale``.
+    """
 
     def __init__(self, array_config):
         self.name = array_config.name
@@ -19,6 +38,13 @@ class ResampledArray(Array):
         self.upsample = Coordinate(max(u, 1) for u in array_config.upsample)
         self.downsample = Coordinate(max(d, 1) for d in array_config.downsample)
         self.interp_order = array_config.interp_order
+        self.label_reduction = array_config.label_reduction
+        self.num_workers = array_config.num_workers
+        self.block_mean = array_config.block_mean
+        assert self.label_reduction in (
+            "nearest",
+            "mode",
+        ), f"Unknown label reduction {self.label_reduction}"
 
         assert (
             self.voxel_size * self.upsample
@@ -28,6 +54,10 @@ class ResampledArray(Array):
     def attrs(self):
         return self._source_array.attrs
 
+    @property
+    def source_array(self) -> Array:
+        return self._source_array
+
     @property
     def axes(self):
         return self._source_array.axes
@@ -73,7 +103,87 @@ class ResampledArray(Array):
         else:
             return spatial_scales
 
+    @property
+    def fast_path(self) -> bool:
+        """Whether this array can be resampled without interpolation."""
+        if self.interp_order != 0 and not self.block_mean:
+            if any(d > 1 for d in self.downsample):
+                return False
+        return all(
+            u == 1 or (d == 1 and self.interp_order == 0)
+            for u, d in zip(self.upsample, self.downsample)
+        )
+
     def __getitem__(self, roi: Roi) -> np.ndarray:
+        if not self.fast_path:
+            return self._rescale(roi)
+
+        tiles = self._tiles(roi)
+        if len(tiles) == 1 or self.num_workers <= 1:
+            return np.concatenate(
+                [self._resample(tile) for tile in tiles], axis=-self.dims
+            )
+        with ThreadPoolExecutor(min(self.num_workers, len(tiles))) as pool:
+            return np.concatenate(
+                list(pool.map(self._resample, tiles)), axis=-self.dims
+            )
+
+    def _tiles(self, roi: Roi) -> List[Roi]:
+        """Split ``roi`` along the first spatial axis into tiles of about
+        ``TILE_SIZE`` voxels."""
+        shape = roi.shape / self.voxel_size
+        num_tiles = min(shape[0], max(1, int(np.prod(shape)) // TILE_SIZE))
+        if num_tiles <= 1:
+            return [roi]
+        bounds = np.linspace(0, shape[0], num_tiles + 1).astype(int)
+        tiles = []
+        for begin, end in zip(bounds[:-1], bounds[1:]):
+            offset = (int(begin) * self.voxel_size[0],) + (0,) * (self.dims - 1)
+            size = (int(end - begin) * self.voxel_size[0],) + tuple(roi.shape[1:])
+            tiles.append(Roi(roi.offset + Coordinate(offset), Coordinate(size)))
+        return tiles
+
+    def _resample(self, roi: Roi) -> np.ndarray:
+        """Resample ``roi`` without interpolation (see ``fast_path``)."""
+        source_voxel_size = self._source_array.voxel_size
+        snapped_roi = roi.snap_to_grid(source_voxel_size, mode="grow")
+        data = self._source_array[snapped_roi]
+        spatial = data.ndim - self.dims
+
+        if any(d > 1 for d in self.downsample):
+            # split each downsampled axis into (blocks, block size)
+            shape = list(data.shape[:spatial])
+            for n, d in zip(data.shape[spatial:], self.downsample):
+                shape += [n // d, d]
+            blocks = data.reshape(shape)
+            block_axes = tuple(range(spatial + 1, len(shape), 2))
+            if self.interp_order != 0:
+                reduced = blocks.mean(axis=block_axes, dtype=np.float32)
+                if np.issubdtype(self.dtype, np.integer):
+                    reduced = np.rint(reduced)
+                data = reduced.astype(self.dtype)
+            elif self.label_reduction == "nearest":
+                # the center voxel of each block
+                center: List = [slice(None)] * len(shape)
+                for axis, d in zip(block_axes, self.downsample):
+                    center[axis] = d // 2
+                data = blocks[tuple(center)]
+            else:
+                data = _block_mode(blocks, block_axes)
+
+        for axis, u in enumerate(self.upsample):
+            if u > 1:
+                data = np.repeat(data, u, axis=spatial + axis)
+
+        # crop from the snapped roi to the requested roi
+        offset = (roi.offset - snapped_roi.offset) / self.voxel_size
+        shape = roi.shape / self.voxel_size
+        return data[
+            (Ellipsis,) + tuple(slice(o, o + s) for o, s in zip(offset, shape))
+        ]
+
+    def _rescale(self, roi: Roi) -> np.ndarray:
+        """Resample ``roi`` with ``skimage.transform.rescale``."""
         snapped_roi = roi.snap_to_grid(self._source_array.voxel_size, mode="grow")
         resampled_array = funlib.persistence.Array(
             rescale(
@@ -98,3 +208,21 @@ class ResampledArray(Array):
 
     def _source_name(self):
         return self._source_array._source_name()
+
+
+def _block_mode(blocks: np.ndarray, block_axes) -> np.ndarray:
+    """The most frequent value in each block. Ties are resolved in favour of
+    the value that comes first in the block."""
+    other_axes = [axis for axis in range(blocks.ndim) if axis not in block_axes]
+    values = blocks.transpose(other_axes + list(block_axes))
+    values = values.reshape(values.shape[: len(other_axes)] + (-1,))
+
+    mode = values[..., 0]
+    mode_count = np.zeros(mode.shape, dtype=np.int32)
+    for k in range(values.shape[-1]):
+        candidate = values[..., k]
+        count = (values == candidate[..., None]).sum(axis=-1, dtype=np.int32)
+        better = count > mode_count
+        mode = np.where(better, candidate, mode)
+        mode_count = np.maximum(count, mode_count)
+    return mode
@@ -25,3 +25,27 @@ class ResampledArrayConfig(ArrayConfig):
     interp_order: bool = attr.ib(
         metadata={"help_text": "The order of the interpolation!"}
     )
+    label_reduction: str = attr.ib(
+        default="nearest",
+        metadata={
+            "help_text": "How to downsample labels (interp_order 0) by integer "
+            "factors: 'nearest' picks the center voxel of each block (the "
+            "voxel at offset factor // 2, as interpolating with order 0 does), "
+            "'mode' the most frequent label in each block."
+        },
+    )
+    num_workers: int = attr.ib(
+        default=4,
+        metadata={
+            "help_text": "The number of threads used to read and resample large "
+            "requests in tiles."
+        },
+    )
+    block_mean: bool = attr.ib(
+        default=False,
+        metadata={
+            "help_text": "Downsample intensities (interp_order other than 0) by "
+            "integer factors by averaging blocks of voxels instead of "
+            "interpolating with skimage. Faster, but changes the output."
+        },
+    )
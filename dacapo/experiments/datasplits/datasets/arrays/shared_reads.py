@@ -0,0 +1,43 @@
+import numpy as np
+
+from contextlib import contextmanager
+import threading
+from typing import Callable, Dict, Hashable, Optional
+
+_scope = threading.local()
+
+
+@contextmanager
+def shared_reads():
+    """Within this context, reads of the same source data (as identified by
+    the ``key`` passed to ``shared_read``) are only done once per thread.
+
+    This is used by arrays that combine several source arrays (e.g. the
+    channels of a ``ConcatArray``), which often wrap the same dataset several
+    times. Nested contexts share the reads of the outermost one. Shared
+    results are read-only, arrays that modify the data they read have to
+    copy it first.
+    """
+    outer = getattr(_scope, "reads", None)
+    if outer is not None:
+        yield
+        return
+    _scope.reads = {}
+    try:
+        yield
+    finally:
+        _scope.reads = None
+
+
+def shared_read(key: Optional[Hashable], read: Callable[[], np.ndarray]) -> np.ndarray:
+    """Call ``read``, or return the result of a previous call with the same
+    ``key`` if inside a ``shared_reads`` context. A ``key`` of ``None`` is
+    never shared."""
+    reads: Optional[Dict[Hashable, np.ndarray]] = getattr(_scope, "reads", None)
+    if reads is None or key is None:
+        return read()
+    if key not in reads:
+        data = read()
+        data.flags.writeable = False
+        reads[key] = data
+    return reads[key]
@@ -1,4 +1,5 @@
 from .array import Array
+from .shared_reads import shared_reads
 
 from funlib.geometry import Coordinate, Roi
 
@@ -59,9 +60,13 @@ class SumArray(Array):
         return self._source_array.attrs
 
     def __getitem__(self, roi: Roi) -> np.ndarray:
-        return np.sum(
-            [source_array[roi] for source_array in self._source_arrays], axis=0
-        )
+        with shared_reads():
+            arrays = [source_array[roi] for source_array in self._source_arrays]
+        # accumulate into one output buffer instead of stacking all arrays
+        summed = np.zeros(arrays[0].shape, dtype=np.result_type(*arrays))
+        for array in arrays:
+            summed += array
+        return summed
 
     def _can_neuroglance(self):
         return self._source_array._can_neuroglance()
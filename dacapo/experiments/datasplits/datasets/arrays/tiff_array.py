@@ -1,19 +1,37 @@
 from .array import Array
+from dacapo.ext import NoSuchModule
+
+try:
+    import tifffile
+except ImportError:
+    tifffile = NoSuchModule("tifffile")
 
 from funlib.geometry import Coordinate, Roi
 
 import lazy_property
-import tifffile
+import numpy as np
+import zarr
 
+from concurrent.futures import ThreadPoolExecutor
 import logging
+import os
 from pathlib import Path
-from typing import List, Optional
+import threading
+from typing import Any, List, Optional
 
 logger = logging.getLogger(__name__)
 
 
 class TiffArray(Array):
-    """This is a tiff array"""
+    """This is a tiff array
+
+    Data is read lazily, only the pages (and tiles) overlapping with a
+    requested ROI are read and decoded. Uncompressed, contiguous tiffs are
+    memory mapped. All other tiffs are read through the zarr interface of
+    ``tifffile``, with large requests split along the first spatial axis and
+    decoded by a pool of ``num_workers`` threads that is kept for the
+    lifetime of the array, each thread using its own file handle.
+    """
 
     _offset: Coordinate
     _file_name: Path
@@ -23,10 +41,19 @@ class TiffArray(Array):
     def __init__(self, array_config):
         super().__init__()
 
+        self.name = array_config.name
         self._file_name = array_config.file_name
         self._offset = array_config.offset
         self._voxel_size = array_config.voxel_size
         self._axes = array_config.axes
+        self.num_workers = array_config.num_workers
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # file handles and the thread pool are recreated in the unpickled copy
+        for cached in ("_memmap", "_handles", "_pool"):
+            state.pop(cached, None)
+        return state
 
     @property
     def attrs(self):
@@ -56,7 +83,7 @@ class TiffArray(Array):
 
     @lazy_property.LazyProperty
     def roi(self) -> Roi:
-        return Roi(self._offset, self.shape)
+        return Roi(self._offset, self.shape * self.voxel_size)
 
     @property
     def writable(self) -> bool:
@@ -77,6 +104,76 @@ class TiffArray(Array):
     def spatial_axes(self) -> List[str]:
         return [c for c in self.axes if c != "c"]
 
-    @lazy_property.LazyProperty
-    def data(self):
-        return tifffile.TiffFile(self._file_name).values
+    @property
+    def data(self) -> Any:
+        """A lazy, numpy-like view of the tiff: a memory map if possible,
+        otherwise a zarr array reading from the tiff."""
+        memmap = self._open_memmap()
+        if memmap is not None:
+            return memmap
+        return self._open_zarr()
+
+    def __getitem__(self, roi: Roi) -> np.ndarray:
+        if self._open_memmap() is not None or self.num_workers <= 1:
+            return np.asarray(super().__getitem__(roi))
+
+        if not self.roi.contains(roi):
+            raise ValueError(f"Cannot fetch data from outside my roi: {self.roi}!")
+        slices = list(self._slices(roi))
+        axis = self.axes.index(self.spatial_axes[0])
+        start, stop = slices[axis].start, slices[axis].stop
+        bounds = np.linspace(
+            start, stop, min(self.num_workers, stop - start) + 1
+        ).astype(int)
+        if len(bounds) <= 2:
+            return self._open_zarr()[tuple(slices)]
+
+        def read(part):
+            begin, end = part
+            part_slices = list(slices)
+            part_slices[axis] = slice(int(begin), int(end))
+            return self._open_zarr()[tuple(part_slices)]
+
+        parts = list(self._thread_pool().map(read, zip(bounds[:-1], bounds[1:])))
+        return np.concatenate(parts, axis=axis)
+
+    def _thread_pool(self) -> ThreadPoolExecutor:
+        """The threads reading from the tiff, created once per process so
+        that their file handles are reused between reads."""
+        pool = self.__dict__.get("_pool")
+        if pool is None or pool[0] != os.getpid():
+            pool = (
+                os.getpid(),
+                ThreadPoolExecutor(
+                    self.num_workers, thread_name_prefix=f"tiff_{self.name}"
+                ),
+            )
+            self._pool = pool
+        return pool[1]
+
+    def _open_memmap(self) -> Optional[np.memmap]:
+        """Memory map the tiff, or return ``None`` if it is compressed or not
+        stored contiguously."""
+        if "_memmap" not in self.__dict__:
+            try:
+                self._memmap = tifffile.memmap(str(self._file_name), mode="r")
+            except ValueError:
+                self._memmap = None
+        return self._memmap
+
+    def _open_zarr(self) -> zarr.Array:
+        """A zarr array reading from the tiff, opened once per thread and
+        process since tiff file handles can not be shared."""
+        handles = self.__dict__.get("_handles")
+        if handles is None or handles[0] != os.getpid():
+            handles = (os.getpid(), threading.local())
+            self._handles = handles
+        local = handles[1]
+        if not hasattr(local, "data"):
+            store = tifffile.imread(str(self._file_name), aszarr=True)
+            data = zarr.open(store, mode="r")
+            if isinstance(data, zarr.Group):
+                # pyramidal tiff, use the highest resolution
+                data = data[0]
+            local.data = data
+        return local.data
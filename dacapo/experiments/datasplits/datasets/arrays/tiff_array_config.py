@@ -10,13 +10,13 @@ from typing import List
 
 
 @attr.s
-class ZarrArrayConfig(ArrayConfig):
+class TiffArrayConfig(ArrayConfig):
     """This config class provides the necessary configuration for a tiff array"""
 
     array_type = TiffArray
 
     file_name: Path = attr.ib(
-        metadata={"help_text": "The file name of the zarr container."}
+        metadata={"help_text": "The file name of the tiff file."}
     )
     offset: Coordinate = attr.ib(
         metadata={
@@ -28,3 +28,9 @@ class ZarrArrayConfig(ArrayConfig):
         metadata={"help_text": "The size of each voxel in each dimension."}
     )
     axes: List[str] = attr.ib(metadata={"help_text": "The axes of your array"})
+    num_workers: int = attr.ib(
+        default=4,
+        metadata={
+            "help_text": "The number of threads used to decode compressed tiffs."
+        },
+    )
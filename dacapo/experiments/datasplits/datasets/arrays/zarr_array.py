@@ -1,4 +1,5 @@
 from .array import Array
+from .shared_reads import shared_read
 from dacapo import Options
 from funlib.persistence import open_ds
 from funlib.geometry import Coordinate, Roi
@@ -12,6 +13,7 @@ import zarr
 
 from collections import OrderedDict
 import logging
+import os
 from pathlib import Path
 import json
 from typing import Dict, Tuple, Any, Optional, List
@@ -20,7 +22,15 @@ logger = logging.getLogger(__name__)
 
 
 class ZarrArray(Array):
-    """This is a zarr array"""
+    """This is a zarr array
+
+    The zarr dataset (and a ``funlib.persistence.Array`` wrapping it for
+    reads and writes) is opened once per process and reused for all
+    accesses, so that the dataset metadata is not read again for every
+    block or batch. The handles are reopened in a forked child process and
+    after the metadata was changed with ``add_metadata``, and are not
+    pickled with the array.
+    """
 
     def __init__(self, array_config):
         super().__init__()
@@ -93,17 +103,57 @@ class ZarrArray(Array):
 
     @property
     def data(self) -> Any:
-        zarr_container = zarr.open(str(self.file_name))
-        return zarr_container[self.dataset]
+        return self._handles()["data"]
 
     def __getitem__(self, roi: Roi) -> np.ndarray:
-        data: np.ndarray = funlib.persistence.Array(
-            self.data, self.roi, self.voxel_size
-        ).to_ndarray(roi=roi)
+        data: np.ndarray = shared_read(
+            (
+                str(self.file_name),
+                self.dataset,
+                self.roi.offset,
+                self.roi.shape,
+                roi.offset,
+                roi.shape,
+            ),
+            lambda: self._funlib_array().to_ndarray(roi=roi),
+        )
         return data
 
     def __setitem__(self, roi: Roi, value: np.ndarray):
-        funlib.persistence.Array(self.data, self.roi, self.voxel_size)[roi] = value
+        self._funlib_array()[roi] = value
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop("_cached_handles", None)
+        return state
+
+    def _handles(self) -> Dict[str, Any]:
+        handles = self.__dict__.get("_cached_handles")
+        if handles is None or handles["pid"] != os.getpid():
+            # not opened yet, or opened by the parent of a forked process
+            zarr_container = zarr.open(str(self.file_name))
+            handles = {
+                "pid": os.getpid(),
+                "data": zarr_container[self.dataset],
+                "array": None,
+            }
+            self._cached_handles = handles
+        return handles
+
+    def _funlib_array(self) -> funlib.persistence.Array:
+        handles = self._handles()
+        if handles["array"] is None:
+            handles["array"] = funlib.persistence.Array(
+                handles["data"], self.roi, self.voxel_size
+            )
+        return handles["array"]
+
+    def invalidate(self) -> None:
+        """Reopen the zarr dataset on the next access, e.g. after its metadata
+        was changed by another process."""
+        for cached in ("_cached_handles", "_daisy_array", "voxel_size", "roi"):
+            self.__dict__.pop(cached, None)
+        self._attributes = self.data.attrs
 
     @classmethod
     def create_from_array_identifier(
@@ -117,10 +167,27 @@ class ZarrArray(Array):
         write_size=None,
         name=None,
         overwrite=False,
+        reset="delete",
+        reset_roi=None,
+        compressor=None,
     ):
         """
         Create a new ZarrArray given an array identifier. It is assumed that
-        this array_identifier points to a dataset that does not yet exist
+        this array_identifier points to a dataset that does not yet exist.
+
+        If the dataset already exists (and ``overwrite`` is not set), it has
+        to match the given ROI, voxel size, axes and number of channels, and
+        its content is reset according to ``reset``:
+
+            * ``"delete"``: delete all chunks, so that the whole dataset reads
+              as zeros, without writing any data.
+            * ``"roi"``: only reset ``reset_roi`` (e.g. the ROI that is about to
+              be written) to zeros. Chunks fully contained in it are deleted.
+            * ``"resume"``: keep the existing content.
+
+        New datasets are compressed with ``compressor`` (a numcodecs codec
+        config dict or ``"default"``), or by default according to the ``zarr_compression``
+        option.
         """
         if write_size is None:
             # total storage per block is approx c*x*y*z*dtype_size
@@ -136,12 +203,15 @@ class ZarrArray(Array):
             ) // 1
             write_size = Coordinate((axis_length,) * voxel_size.dims) * voxel_size
         write_size = Coordinate((min(a, b) for a, b in zip(write_size, roi.shape)))
+        chunk_size = cls._chunk_size(write_size, voxel_size, num_channels, dtype)
         zarr_container = zarr.open(array_identifier.container, "a")
         if num_channels is None or num_channels == 1:
             axes = [axis for axis in axes if "c" not in axis]
             num_channels = None
         else:
             axes = ["c"] + [axis for axis in axes if "c" not in axis]
+        # existing datasets are reset below, unless they are overwritten
+        existed = not overwrite and array_identifier.dataset in zarr_container
         try:
             funlib.persistence.prepare_ds(
                 f"{array_identifier.container}",
@@ -150,7 +220,10 @@ class ZarrArray(Array):
                 voxel_size,
                 dtype,
                 num_channels=num_channels,
-                write_size=write_size,
+                write_size=chunk_size,
+                compressor=(
+                    compressor if compressor is not None else cls._compressor(dtype)
+                ),
                 delete=overwrite,
                 force_exact_write_size=True,
             )
@@ -202,7 +275,21 @@ class ZarrArray(Array):
                 == ((num_channels,) if num_channels is not None else ())
                 + roi.shape / voxel_size
             ), f"{zarr_dataset.shape}, {((num_channels,) if num_channels is not None else ()) + roi.shape / voxel_size}"
-            zarr_dataset[:] = np.zeros(zarr_dataset.shape, dtype)
+
+        if existed:
+            if reset == "delete":
+                cls._delete_chunks(zarr_dataset)
+            elif reset == "roi":
+                assert reset_roi is not None, "reset 'roi' requires a reset_roi"
+                offset = (reset_roi.offset - roi.offset) / voxel_size
+                shape = reset_roi.shape / voxel_size
+                cls._reset_region(
+                    zarr_dataset,
+                    (slice(None),) * (zarr_dataset.ndim - len(shape))
+                    + tuple(slice(o, o + s) for o, s in zip(offset, shape)),
+                )
+            elif reset != "resume":
+                raise ValueError(f"Unknown reset mode {reset}")
 
         zarr_array = cls.__new__(cls)
         zarr_array.file_name = array_identifier.container
@@ -212,6 +299,77 @@ class ZarrArray(Array):
         zarr_array.snap_to_grid = None
         return zarr_array
 
+    @staticmethod
+    def _compressor(dtype) -> Dict[str, Any] | str:
+        """The compressor for new datasets of ``dtype``, see the
+        ``zarr_compression`` and ``zarr_compressors`` options. Returns a
+        numcodecs config dict (or ``"default"``), as expected by
+        ``funlib.persistence.prepare_ds``."""
+        options = Options.instance()
+        if options.zarr_compression == "default":
+            return "default"
+        assert (
+            options.zarr_compression == "presets"
+        ), f"Unknown zarr compression {options.zarr_compression}"
+        dtype = np.dtype(dtype)
+        if np.issubdtype(dtype, np.floating):
+            preset = "float"
+        elif dtype == np.uint8:
+            preset = "uint8"
+        elif np.issubdtype(dtype, np.integer):
+            preset = "labels"
+        else:
+            preset = "other"
+        return dict(options.zarr_compressors[preset])
+
+    @staticmethod
+    def _chunk_size(
+        write_size: Coordinate, voxel_size: Coordinate, num_channels, dtype
+    ) -> Coordinate:
+        """The chunk size for new datasets written in blocks of ``write_size``:
+        ``write_size`` itself, or an even division of it if chunks of that size
+        would be larger than the ``zarr_max_chunk_bytes`` option. This way,
+        every block writes whole chunks."""
+        max_bytes = Options.instance().zarr_max_chunk_bytes
+        shape = list(write_size / voxel_size)
+        voxel_bytes = np.dtype(dtype).itemsize * (num_channels or 1)
+        while int(np.prod(shape)) * voxel_bytes > max_bytes:
+            # split the longest axis that can be split evenly
+            for axis in sorted(range(len(shape)), key=lambda a: -shape[a]):
+                factor = next(
+                    (f for f in range(2, shape[axis] + 1) if shape[axis] % f == 0),
+                    None,
+                )
+                if factor is not None:
+                    shape[axis] //= factor
+                    break
+            else:
+                break
+        return Coordinate(shape) * voxel_size
+
+    @staticmethod
+    def _delete_chunks(zarr_dataset):
+        """Reset ``zarr_dataset`` to zeros by deleting all of its chunks."""
+        if zarr_dataset.fill_value is None or zarr_dataset.fill_value != 0:
+            # missing chunks would not read as zeros
+            ZarrArray._reset_region(zarr_dataset, Ellipsis)
+            return
+        store = zarr_dataset.store
+        prefix = f"{zarr_dataset.path}/" if zarr_dataset.path else ""
+        for key in store.listdir(zarr_dataset.path):
+            if key.startswith(".") or key == "attributes.json":
+                # metadata
+                continue
+            # removes nested chunk directories as well
+            del store[prefix + key]
+
+    @staticmethod
+    def _reset_region(zarr_dataset, region):
+        """Reset ``region`` of ``zarr_dataset`` to zeros. Written chunk by
+        chunk from a scalar, chunks that end up empty are deleted rather than
+        written (unless the dataset writes empty chunks)."""
+        zarr_dataset[region] = 0
+
     @classmethod
     def open_from_array_identifier(cls, array_identifier, name=""):
         zarr_array = cls.__new__(cls)
@@ -288,3 +446,4 @@ class ZarrArray(Array):
         dataset = zarr.open(self.file_name, mode="a")[self.dataset]
         for k, v in metadata.items():
             dataset.attrs[k] = v
+        self.invalidate()
@@ -24,6 +24,14 @@ class Dataset(ABC):
     weight: Optional[int]
     sample_points: Optional[List[Coordinate]]
 
+    def preload(self) -> None:
+        """
+        Materialize the arrays of this dataset for fast reads, if configured.
+        Only called for training datasets, before the training pipeline is
+        built. Does nothing by default.
+        """
+        pass
+
     def __eq__(self, other: Any) -> bool:
         """
         Overloaded equality operator for dataset objects.
@@ -0,0 +1,164 @@
+from .arrays import Array, ArrayConfig, NumpyArray
+
+from funlib.geometry import Coordinate, Roi
+
+import attr
+import numpy as np
+
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, List, Optional
+
+# the metadata files of zarr and n5 datasets, checked to detect changes
+# instead of the modification times of all chunks
+METADATA_FILES = (".zarray", ".zattrs", "attributes.json")
+
+logger = logging.getLogger(__name__)
+
+
+def preload_array(
+    array_config: ArrayConfig,
+    array: Array,
+    cache_dir: Path,
+    max_bytes: Optional[int] = None,
+) -> Array:
+    """Materialize ``array`` (including all the transformations of its config)
+    into a memory-mapped ``.npy`` file in ``cache_dir`` and return an array
+    reading from it.
+
+    The file is keyed by a hash of ``array_config``, so that it is shared by
+    all runs and processes using the same array. It is recreated if any of
+    the files the array is read from (``file_name`` of the config or any of
+    its source configs) were modified after the array was materialized. For
+    zarr and n5 datasets, only the modification times of their metadata
+    files are checked, not those of all chunks.
+
+    Args:
+        array_config (ArrayConfig): The config ``array`` was created from.
+        array (Array): The array to materialize.
+        cache_dir (Path): The directory to store materialized arrays in.
+        max_bytes (int, optional): Arrays larger than this are not
+            materialized, ``array`` is returned with a warning instead.
+    Returns:
+        Array: A ``NumpyArray`` wrapping the memory map, reads from it are
+            slices of the memory map without a copy.
+    """
+    num_bytes = (
+        int(np.prod(array.roi.shape / array.voxel_size))
+        * (array.num_channels if array.num_channels is not None else 1)
+        * np.dtype(array.dtype).itemsize
+    )
+    if max_bytes is not None and num_bytes > max_bytes:
+        logger.warning(
+            f"Not preloading array {array_config.name}, its {num_bytes / 1024**3:.1f} "
+            f"GB exceed the limit of {max_bytes / 1024**3:.1f} GB "
+            "(preload_max_bytes option)."
+        )
+        return array
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    key = _config_hash(array_config)
+    data_file = cache_dir / f"{key}.npy"
+    meta_file = cache_dir / f"{key}.json"
+    source_mtimes = {str(path): _mtime(path) for path in _source_paths(array_config)}
+
+    valid = False
+    if data_file.exists() and meta_file.exists():
+        with meta_file.open("r") as f:
+            valid = json.load(f)["source_mtimes"] == source_mtimes
+        if not valid:
+            logger.info(
+                f"Sources of array {array_config.name} changed, preloading again"
+            )
+
+    if not valid:
+        logger.info(f"Preloading array {array_config.name} to {data_file}")
+        _materialize(array, data_file)
+        with meta_file.open("w") as f:
+            json.dump({"name": array_config.name, "source_mtimes": source_mtimes}, f)
+
+    data = np.load(data_file, mmap_mode="r")
+    return NumpyArray.from_np_array(data, array.roi, array.voxel_size, array.axes)
+
+
+def _materialize(array: Array, data_file: Path):
+    """Write ``array`` to ``data_file`` in slabs along the first spatial axis,
+    to not hold the whole array in memory."""
+    roi = array.roi
+    voxel_size = array.voxel_size
+    shape = roi.shape / voxel_size
+
+    first = array[_slab(roi, voxel_size, 0, 1)]
+    # slabs of about 64 MB
+    slab_size = max(1, (64 * 1024**2) // max(first.nbytes, 1))
+
+    tmp_file = data_file.with_suffix(f".{os.getpid()}.tmp")
+    out = np.lib.format.open_memmap(
+        tmp_file,
+        mode="w+",
+        dtype=first.dtype,
+        shape=first.shape[: -array.dims] + tuple(shape),
+    )
+    for begin in range(0, shape[0], slab_size):
+        end = min(begin + slab_size, shape[0])
+        slices = (Ellipsis, slice(begin, end)) + (slice(None),) * (array.dims - 1)
+        out[slices] = array[_slab(roi, voxel_size, begin, end)]
+    out.flush()
+    del out
+    # other processes only ever see complete files
+    os.replace(tmp_file, data_file)
+
+
+def _slab(roi: Roi, voxel_size: Coordinate, begin: int, end: int) -> Roi:
+    offset = Coordinate((begin * voxel_size[0],) + (0,) * (roi.dims - 1))
+    shape = Coordinate(((end - begin) * voxel_size[0],) + tuple(roi.shape[1:]))
+    return Roi(roi.offset + offset, shape)
+
+
+def _config_hash(array_config: ArrayConfig) -> str:
+    from dacapo.store.converter import converter
+
+    config = converter.unstructure(array_config)
+    return hashlib.sha1(
+        json.dumps(config, sort_keys=True, default=str).encode()
+    ).hexdigest()
+
+
+def _source_paths(config: Any) -> List[Path]:
+    """The files and directories an array config reads from, found in the
+    ``file_name`` attributes of the config and its nested configs."""
+    paths: List[Path] = []
+    if isinstance(config, (list, tuple)):
+        for value in config:
+            paths += _source_paths(value)
+    elif isinstance(config, dict):
+        for value in config.values():
+            paths += _source_paths(value)
+    elif attr.has(type(config)):
+        file_name = getattr(config, "file_name", None)
+        if file_name is not None:
+            path = Path(file_name)
+            dataset = getattr(config, "dataset", None)
+            if dataset is not None and (path / dataset).exists():
+                path = path / dataset
+            paths.append(path)
+        for field in attr.fields(type(config)):
+            if field.name != "file_name":
+                paths += _source_paths(getattr(config, field.name))
+    return paths
+
+
+def _mtime(path: Path) -> float:
+    """The latest modification time of ``path`` and, for zarr and n5
+    datasets, of their metadata files."""
+    if not path.exists():
+        return 0.0
+    mtime = path.stat().st_mtime
+    if path.is_dir():
+        for name in METADATA_FILES:
+            if (path / name).exists():
+                mtime = max(mtime, (path / name).stat().st_mtime)
+    return mtime
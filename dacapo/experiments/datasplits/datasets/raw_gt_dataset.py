@@ -1,8 +1,11 @@
 from .dataset import Dataset
 from .arrays import Array
+from .preload import preload_array
+from dacapo import Options
 
 from funlib.geometry import Coordinate
 
+from pathlib import Path
 from typing import Optional, List
 
 
@@ -23,3 +26,19 @@ class RawGTDataset(Dataset):
         )
         self.sample_points = dataset_config.sample_points
         self.weight = dataset_config.weight
+        self._config = dataset_config
+
+    def preload(self):
+        if not self._config.preload:
+            return
+        options = Options.instance()
+        cache_dir = Path(options.runs_base_dir).expanduser() / "preloaded_arrays"
+        max_bytes = options.preload_max_bytes
+        self.raw = preload_array(
+            self._config.raw_config, self.raw, cache_dir, max_bytes
+        )
+        self.gt = preload_array(self._config.gt_config, self.gt, cache_dir, max_bytes)
+        if self.mask is not None:
+            self.mask = preload_array(
+                self._config.mask_config, self.mask, cache_dir, max_bytes
+            )
@@ -27,6 +27,8 @@ class RawGTDatasetConfig(DatasetConfig):
                                              equal to zero on voxels where the mask is 1.
         sample_points (Optional[List[Coordinate]]): An optional list of points around which
                                                     training samples will be extracted.
+        preload (bool): Whether to materialize the raw, gt and mask arrays into
+                        memory-mapped files before training.
     """
 
     dataset_type = RawGTDataset
@@ -55,3 +57,19 @@ class RawGTDatasetConfig(DatasetConfig):
             "extracted."
         },
     )
+    preload: bool = attr.ib(
+        default=False,
+        metadata={
+            "help_text": "Whether to materialize the raw, gt and mask arrays (with "
+            "all their transformations) into memory-mapped files once, and read "
+            "from those instead. The files are stored in the runs base dir, "
+            "shared between runs using the same array configs, and recreated "
+            "when the source datasets change. Changes are detected from the "
+            "modification times of the datasets and their metadata files "
+            "(.zarray, .zattrs, attributes.json) only, so chunks rewritten in "
+            "place are not noticed: delete the preloaded files (or touch the "
+            "metadata) after doing so. Only training datasets are "
+            "preloaded, and only arrays up to the preload_max_bytes option. "
+            "Only use this for small datasets."
+        },
+    )
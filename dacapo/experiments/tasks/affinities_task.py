@@ -14,6 +14,8 @@ class AffinitiesTask(Task):
         self.predictor = AffinitiesPredictor(
             neighborhood=task_config.neighborhood,
             lsds=task_config.lsds,
+            downsample_lsds=task_config.lsd_downsample,
+            lsd_num_workers=task_config.lsd_num_workers,
             affs_weight_clipmin=task_config.affs_weight_clipmin,
             affs_weight_clipmax=task_config.affs_weight_clipmax,
             lsd_weight_clipmin=task_config.lsd_weight_clipmin,
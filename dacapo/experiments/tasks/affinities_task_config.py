@@ -36,6 +36,23 @@ class AffinitiesTaskConfig(TaskConfig):
             "help_text": "If training with lsds, set how much they should be weighted compared to affs."
         },
     )
+    lsd_downsample: int = attr.ib(
+        default=1,
+        metadata={
+            "help_text": "If training with lsds, compute them on the ground truth downsampled "
+            "by this factor and upsample them to the output resolution. This is much "
+            "faster, the ground truth shape has to be a multiple of this factor."
+        },
+    )
+    lsd_num_workers: int = attr.ib(
+        default=1,
+        metadata={
+            "help_text": "If training with lsds, the number of threads that compute the "
+            "lsds of the objects in a batch in parallel. Only used if targets are created "
+            "in the data pipeline, on the training device objects are processed "
+            "sequentially."
+        },
+    )
     affs_weight_clipmin: float = attr.ib(
         default=0.05,
         metadata={"help_text": "The minimum value for affinities weights."},
@@ -3,10 +3,10 @@ from dacapo.experiments import Model
 from dacapo.experiments.arraytypes import EmbeddingArray
 from dacapo.experiments.datasplits.datasets.arrays import NumpyArray
 from dacapo.utils.affinities import seg_to_affgraph, padding as aff_padding
-from dacapo.utils.balance_weights import balance_weights
+from dacapo.utils.balance_weights import balance_weights, balance_weights_torch
+from dacapo.utils.lsds import local_shape_descriptors, num_descriptors
 
 from funlib.geometry import Coordinate
-from lsd.train import LsdExtractor
 
 from scipy import ndimage
 import numpy as np
@@ -23,6 +23,7 @@ class AffinitiesPredictor(Predictor):
         lsds: bool = True,
         num_voxels: int = 20,
         downsample_lsds: int = 1,
+        lsd_num_workers: int = 1,
         grow_boundary_iterations: int = 0,
         affs_weight_clipmin: float = 0.05,
         affs_weight_clipmax: float = 0.95,
@@ -34,16 +35,9 @@ class AffinitiesPredictor(Predictor):
         self.lsds = lsds
         self.num_voxels = num_voxels
         if lsds:
-            self._extractor = None
-            if self.dims == 2:
-                self.num_lsds = 6
-            elif self.dims == 3:
-                self.num_lsds = 10
-            else:
-                raise ValueError(
-                    f"Cannot compute lsds on volumes with {self.dims} dimensions"
-                )
+            self.num_lsds = num_descriptors(self.dims)
             self.downsample_lsds = downsample_lsds
+            self.lsd_num_workers = lsd_num_workers
         else:
             self.num_lsds = 0
         self.grow_boundary_iterations = grow_boundary_iterations
@@ -54,14 +48,6 @@ class AffinitiesPredictor(Predictor):
 
         self.background_as_object = background_as_object
 
-    def extractor(self, voxel_size):
-        if self._extractor is None:
-            self._extractor = LsdExtractor(
-                self.sigma(voxel_size), downsample=self.downsample_lsds
-            )
-
-        return self._extractor
-
     @property
     def dims(self):
         return self.neighborhood[0].dims
@@ -108,44 +94,109 @@ class AffinitiesPredictor(Predictor):
             label_data = label_data[0]
         else:
             axes = ["c"] + axes
-        affinities = seg_to_affgraph(
-            label_data + int(self.background_as_object), self.neighborhood
-        ).astype(np.float32)
+        segmentation = label_data + int(self.background_as_object)
+        # affinities and lsds are written into one preallocated target
+        target = np.empty((self.num_channels,) + segmentation.shape, dtype=np.float32)
+        num_affinities = len(self.neighborhood)
+        seg_to_affgraph(segmentation, self.neighborhood, out=target[:num_affinities])
         if self.lsds:
-            descriptors = self.extractor(gt.voxel_size).get_descriptors(
-                segmentation=label_data + int(self.background_as_object),
-                voxel_size=gt.voxel_size,
-            )
-            return NumpyArray.from_np_array(
-                np.concatenate([affinities, descriptors], axis=0, dtype=np.float32),
-                gt.roi,
-                gt.voxel_size,
-                axes,
-            )
+            with self._timed("lsds"):
+                local_shape_descriptors(
+                    segmentation,
+                    self.sigma(gt.voxel_size),
+                    gt.voxel_size,
+                    downsample=self.downsample_lsds,
+                    num_workers=self.lsd_num_workers,
+                    out=target[num_affinities:],
+                )
         return NumpyArray.from_np_array(
-            affinities,
+            target,
             gt.roi,
             gt.voxel_size,
             axes,
         )
 
-    def _grow_boundaries(self, mask, slab):
-        # get all foreground voxels by erosion of each component
-        foreground = np.zeros(shape=mask.shape, dtype=bool)
+    @property
+    def device_targets(self):
+        # boundary growing is only implemented in numpy
+        return self.grow_boundary_iterations == 0
+
+    def create_target_torch(self, gt, voxel_size):
+        segmentation = gt + int(self.background_as_object)
+        target = torch.empty(
+            (self.num_channels,) + tuple(segmentation.shape),
+            dtype=torch.float32,
+            device=segmentation.device,
+        )
+        num_affinities = len(self.neighborhood)
+        seg_to_affgraph(segmentation, self.neighborhood, out=target[:num_affinities])
+        if self.lsds:
+            # objects are processed sequentially on the device,
+            # lsd_num_workers only applies to create_target
+            with self._timed("lsds"):
+                local_shape_descriptors(
+                    segmentation,
+                    self.sigma(voxel_size),
+                    voxel_size,
+                    downsample=self.downsample_lsds,
+                    out=target[num_affinities:],
+                )
+        return target
+
+    def create_weight_torch(self, gt, target, mask, moving_class_counts=None):
+        (moving_class_counts, moving_lsd_class_counts) = (
+            moving_class_counts if moving_class_counts is not None else (None, None)
+        )
+        aff_weights, moving_class_counts = balance_weights_torch(
+            target[: len(self.neighborhood)],
+            2,
+            slab=(1,) + (-1,) * gt.ndim,
+            masks=[mask],
+            moving_counts=moving_class_counts,
+            clipmin=self.affs_weight_clipmin,
+            clipmax=self.affs_weight_clipmax,
+        )
+        if self.lsds:
+            # the same weights for all lsds
+            lsd_weights, moving_lsd_class_counts = balance_weights_torch(
+                (gt > 0).to(torch.uint8),
+                2,
+                masks=[mask],
+                moving_counts=moving_lsd_class_counts,
+                clipmin=self.lsd_weight_clipmin,
+                clipmax=self.lsd_weight_clipmax,
+            )
+            aff_weights = torch.cat(
+                [aff_weights, lsd_weights.expand((self.num_lsds,) + lsd_weights.shape)]
+            )
+        return aff_weights, (moving_class_counts, moving_lsd_class_counts)
 
+    def _grow_boundaries(self, mask, slab):
         # slab with -1 replaced by shape
         slab = tuple(m if s == -1 else s for m, s in zip(mask.shape, slab))
-        slab_ranges = (range(0, m, s) for m, s in zip(mask.shape, slab))
 
-        for ind, start in enumerate(itertools.product(*slab_ranges)):
-            slices = tuple(
-                slice(start[d], start[d] + slab[d]) for d in range(len(slab))
+        if all(s in (1, m) for m, s in zip(mask.shape, slab)):
+            # dilate all slabs at once, with a structure that does not extend
+            # along the axes in which slabs are one voxel thick
+            structure = ndimage.generate_binary_structure(mask.ndim, 1)
+            structure = structure[
+                tuple(slice(1, 2) if s == 1 else slice(None) for s in slab)
+            ]
+            foreground = ndimage.binary_dilation(
+                mask, structure=structure, iterations=self.grow_boundary_iterations
             )
-            mask_slab = mask[slices]
-            dilated_mask_slab = ndimage.binary_dilation(
-                mask_slab, iterations=self.grow_boundary_iterations
-            )
-            foreground[slices] = dilated_mask_slab
+        else:
+            # get all foreground voxels by dilation of each slab
+            foreground = np.zeros(shape=mask.shape, dtype=bool)
+            slab_ranges = (range(0, m, s) for m, s in zip(mask.shape, slab))
+
+            for start in itertools.product(*slab_ranges):
+                slices = tuple(
+                    slice(start[d], start[d] + slab[d]) for d in range(len(slab))
+                )
+                foreground[slices] = ndimage.binary_dilation(
+                    mask[slices], iterations=self.grow_boundary_iterations
+                )
 
         # label new background
         background = np.logical_not(foreground)
@@ -162,36 +213,36 @@ class AffinitiesPredictor(Predictor):
             )
         else:
             mask_data = mask[target.roi]
-        aff_weights, moving_class_counts = balance_weights(
-            target[target.roi][: self.num_channels - self.num_lsds].astype(np.uint8),
+        # affinity and lsd weights are written into one preallocated array
+        num_affinities = len(self.neighborhood)
+        affinities = target[target.roi][:num_affinities]
+        weights = np.empty(
+            (self.num_channels,) + affinities.shape[1:], dtype=np.float32
+        )
+        _, moving_class_counts = balance_weights(
+            affinities.astype(np.uint8),
             2,
             slab=tuple(1 if c == "c" else -1 for c in target.axes),
             masks=[mask_data],
             moving_counts=moving_class_counts,
             clipmin=self.affs_weight_clipmin,
             clipmax=self.affs_weight_clipmax,
+            out=weights[:num_affinities],
         )
         if self.lsds:
+            # the same weights for all lsds
             lsd_weights, moving_lsd_class_counts = balance_weights(
-                (gt[target.roi] > 0).astype(np.uint8),
+                (gt[target.roi] > 0).astype(np.uint8).reshape(affinities.shape[1:]),
                 2,
-                slab=(-1,) * len(gt.axes),
                 masks=[mask_data],
                 moving_counts=moving_lsd_class_counts,
                 clipmin=self.lsd_weight_clipmin,
                 clipmax=self.lsd_weight_clipmax,
+                out=weights[num_affinities],
             )
-            lsd_weights = np.ones(
-                (self.num_lsds,) + aff_weights.shape[1:], dtype=aff_weights.dtype
-            ) * lsd_weights.reshape((1,) + aff_weights.shape[1:])
-            return NumpyArray.from_np_array(
-                np.concatenate([aff_weights, lsd_weights], axis=0),
-                target.roi,
-                target.voxel_size,
-                target.axes,
-            ), (moving_class_counts, moving_lsd_class_counts)
+            weights[num_affinities + 1 :] = lsd_weights
         return NumpyArray.from_np_array(
-            aff_weights,
+            weights,
             target.roi,
             target.voxel_size,
             target.axes,
@@ -3,10 +3,10 @@ from dacapo.experiments import Model
 from dacapo.experiments.arraytypes import DistanceArray
 from dacapo.experiments.datasplits.datasets.arrays import NumpyArray
 from dacapo.utils.balance_weights import balance_weights
+from dacapo.utils.distances import signed_distances
 
 from funlib.geometry import Coordinate
 
-from scipy.ndimage.morphology import distance_transform_edt
 import numpy as np
 import torch
 
@@ -95,80 +95,12 @@ class InnerDistancePredictor(Predictor):
         normalize=None,
         normalize_args=None,
     ):
-        all_distances = np.zeros(labels.shape, dtype=np.float32) - 1
-        for ii, channel in enumerate(labels):
-            boundaries = self.__find_boundaries(channel)
-
-            # mark boundaries with 0 (not 1)
-            boundaries = 1.0 - boundaries
-
-            if np.sum(boundaries == 0) == 0:
-                max_distance = min(
-                    dim * vs / 2 for dim, vs in zip(channel.shape, voxel_size)
-                )
-                if np.sum(channel) == 0:
-                    distances = -np.ones(channel.shape, dtype=np.float32) * max_distance
-                else:
-                    distances = np.ones(channel.shape, dtype=np.float32) * max_distance
-            else:
-                # get distances (voxel_size/2 because image is doubled)
-                distances = distance_transform_edt(
-                    boundaries, sampling=tuple(float(v) / 2 for v in voxel_size)
-                )
-                distances = distances.astype(np.float32)
-
-                # restore original shape
-                downsample = (slice(None, None, 2),) * len(voxel_size)
-                distances = distances[downsample]
-
-                # todo: inverted distance
-                distances[channel == 0] = -distances[channel == 0]
-
-            if normalize is not None:
-                distances = self.__normalize(distances, normalize, normalize_args)
-
-            all_distances[ii] = distances
+        all_distances = signed_distances(labels, voxel_size)
+        if normalize is not None:
+            all_distances = self.__normalize(all_distances, normalize, normalize_args)
 
         return all_distances * labels
 
-    def __find_boundaries(self, labels):
-        # labels: 1 1 1 1 0 0 2 2 2 2 3 3       n
-        # shift :   1 1 1 1 0 0 2 2 2 2 3       n - 1
-        # diff  :   0 0 0 1 0 1 0 0 0 1 0       n - 1
-        # bound.: 00000001000100000001000      2n - 1
-
-        logger.debug(f"computing boundaries for {labels.shape}")
-
-        dims = len(labels.shape)
-        in_shape = labels.shape
-        out_shape = tuple(2 * s - 1 for s in in_shape)
-
-        boundaries = np.zeros(out_shape, dtype=bool)
-
-        logger.debug(f"boundaries shape is {boundaries.shape}")
-
-        for d in range(dims):
-            logger.debug(f"processing dimension {d}")
-
-            shift_p = [slice(None)] * dims
-            shift_p[d] = slice(1, in_shape[d])
-
-            shift_n = [slice(None)] * dims
-            shift_n[d] = slice(0, in_shape[d] - 1)
-
-            diff = (labels[tuple(shift_p)] - labels[tuple(shift_n)]) != 0
-
-            logger.debug(f"diff shape is {diff.shape}")
-
-            target = [slice(None, None, 2)] * dims
-            target[d] = slice(1, out_shape[d], 2)
-
-            logger.debug(f"target slices are {target}")
-
-            boundaries[tuple(target)] = diff
-
-        return boundaries
-
     def __normalize(self, distances, norm, normalize_args):
         if norm == "tanh":
             scale = normalize_args
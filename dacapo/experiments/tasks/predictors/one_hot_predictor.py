@@ -47,6 +47,23 @@ class OneHotPredictor(Predictor):
             None,
         )
 
+    @property
+    def device_targets(self):
+        return True
+
+    def create_target_torch(self, gt, voxel_size):
+        one_hots = torch.zeros(
+            (self.embedding_dims,) + tuple(gt.shape),
+            dtype=torch.uint8,
+            device=gt.device,
+        )
+        for i, _ in enumerate(self.classes):
+            one_hots[i] = gt == i
+        return one_hots
+
+    def create_weight_torch(self, gt, target, mask, moving_class_counts=None):
+        return torch.ones(target.shape, device=target.device), None
+
     @property
     def output_array_type(self):
         return ProbabilityArray(self.classes)
@@ -1,15 +1,22 @@
 from funlib.geometry import Coordinate
 
 from abc import ABC, abstractmethod
-from typing import TYPE_CHECKING, Any, Tuple
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any, Callable, Optional, Tuple
 
 if TYPE_CHECKING:
+    import torch
     from dacapo.experiments.architectures.architecture import Architecture
     from dacapo.experiments.model import Model
     from dacapo.experiments.datasplits.datasets.arrays import Array
 
 
 class Predictor(ABC):
+    # Set by the pipeline while creating targets and weights. Called with the
+    # name of a step that should show up separately in the profiling stats
+    # (e.g. "lsds"), returns a timer with ``start`` and ``stop`` methods.
+    profile: Optional[Callable[[str], Any]] = None
+
     @abstractmethod
     def create_model(self, architecture: "Architecture") -> "Model":
         """Given a training architecture, create a model for this predictor.
@@ -53,6 +60,55 @@ class Predictor(ABC):
         """
         pass
 
+    @property
+    def device_targets(self) -> bool:
+        """Whether this predictor implements ``create_target_torch`` and
+        ``create_weight_torch``, to create targets and weights on the
+        training device instead of in the data pipeline."""
+        return False
+
+    def create_target_torch(
+        self, gt: "torch.Tensor", voxel_size: Coordinate
+    ) -> "torch.Tensor":
+        """Create the target on the device of ``gt``.
+
+        Same as ``create_target``, for a ground-truth tensor without batch
+        and channel dimensions (e.g., ``(z, y, x)``). Returns a target with a
+        leading channel dimension, of the same spatial shape as ``gt``.
+        """
+        raise NotImplementedError(
+            f"{type(self).__name__} can not create targets on the device"
+        )
+
+    def create_weight_torch(
+        self,
+        gt: "torch.Tensor",
+        target: "torch.Tensor",
+        mask: "torch.Tensor",
+        moving_class_counts: Any,
+    ) -> Tuple["torch.Tensor", Any]:
+        """Create the weight on the device of ``target``.
+
+        Same as ``create_weight``, for tensors as passed to and returned by
+        ``create_target_torch``. The mask has the same shape as ``gt``.
+        """
+        raise NotImplementedError(
+            f"{type(self).__name__} can not create weights on the device"
+        )
+
+    @contextmanager
+    def _timed(self, name: str):
+        """Time the enclosed step of target or weight creation with a timer
+        from ``profile``, if set."""
+        timer = self.profile(name) if self.profile is not None else None
+        if timer is not None:
+            timer.start()
+        try:
+            yield
+        finally:
+            if timer is not None:
+                timer.stop()
+
     @property
     @abstractmethod
     def output_array_type(self):
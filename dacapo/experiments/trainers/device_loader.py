@@ -0,0 +1,121 @@
+import torch
+import numpy as np
+
+import queue
+import threading
+import logging
+from typing import Any, Callable, Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class DeviceLoader:
+    """Loads training batches ahead of the training step.
+
+    A background thread repeatedly calls ``fetch``, which returns a tuple of
+    host-side data (kept as is, e.g. for snapshots) and a dictionary of numpy
+    arrays to be uploaded to the device. The arrays are copied into pinned
+    memory and uploaded with non-blocking copies on a separate CUDA stream,
+    so that up to ``prefetch`` batches are transferred while the current
+    training step is running.
+
+    If ``prefetch`` is 0, batches are fetched and uploaded synchronously on
+    request.
+
+    Attributes:
+        fetch (Callable): Returns ``(host_data, arrays)`` for the next batch.
+        device (torch.device): The device to upload arrays to.
+        prefetch (int): The number of batches to prepare ahead of time.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[], Tuple[Any, Dict[str, np.ndarray]]],
+        device: torch.device,
+        prefetch: int = 2,
+    ):
+        self.fetch = fetch
+        self.device = torch.device(device)
+        self.prefetch = prefetch
+
+        self._stream = (
+            torch.cuda.Stream(device=self.device)
+            if self.device.type == "cuda"
+            else None
+        )
+        self._queue: queue.Queue = queue.Queue(maxsize=max(1, prefetch))
+        self._stop = threading.Event()
+        self._thread = None
+        if self.prefetch > 0:
+            self._thread = threading.Thread(
+                target=self._run, name="dacapo_device_loader", daemon=True
+            )
+            self._thread.start()
+
+    def next(self) -> Tuple[Any, Dict[str, torch.Tensor]]:
+        """Get the next batch. The returned tensors are ready to be used on
+        the current stream of the device."""
+        if self._thread is None:
+            host_data, tensors, event = self._load()
+        else:
+            item = self._queue.get()
+            if isinstance(item, Exception):
+                raise item
+            host_data, tensors, event = item
+
+        if event is not None:
+            current_stream = torch.cuda.current_stream(self.device)
+            current_stream.wait_event(event)
+            for tensor in tensors.values():
+                # the tensors were allocated on the loader stream
+                tensor.record_stream(current_stream)
+        return host_data, tensors
+
+    def stop(self):
+        """Stop the background thread. Waits until a fetch in progress is
+        finished, so that ``fetch`` is not called anymore once this returns."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        while self._thread.is_alive():
+            # unblock the loader if it is waiting for space in the queue
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                pass
+            self._thread.join(timeout=0.1)
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                item = self._load()
+            except Exception as e:
+                logger.error("Failed to load batch", exc_info=e)
+                item = e
+            while not self._stop.is_set():
+                try:
+                    self._queue.put(item, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+            if isinstance(item, Exception):
+                return
+
+    def _load(self):
+        host_data, arrays = self.fetch()
+        if self._stream is None:
+            tensors = {
+                key: torch.as_tensor(np.ascontiguousarray(array)).to(self.device)
+                for key, array in arrays.items()
+            }
+            return host_data, tensors, None
+
+        tensors = {}
+        with torch.cuda.stream(self._stream):
+            for key, array in arrays.items():
+                pinned = torch.from_numpy(np.ascontiguousarray(array)).pin_memory()
+                tensors[key] = pinned.to(self.device, non_blocking=True)
+        event = torch.cuda.Event()
+        event.record(self._stream)
+        return host_data, tensors, event
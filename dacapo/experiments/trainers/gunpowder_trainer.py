@@ -1,5 +1,6 @@
 from ..training_iteration_stats import TrainingIterationStats
 from .trainer import Trainer
+from .device_loader import DeviceLoader
 
 from dacapo.gp import (
     DaCapoArraySource,
@@ -14,8 +15,9 @@ from dacapo.experiments.datasplits.datasets.arrays import (
     OnesArray,
 )
 
-from funlib.geometry import Coordinate
+from funlib.geometry import Coordinate, Roi
 import gunpowder as gp
+from gunpowder.profiling import Timing
 
 import zarr
 import torch
@@ -27,6 +29,16 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+def _device_labels(data: np.ndarray) -> np.ndarray:
+    """Labels in a dtype supported by torch. Labels are only compared, so
+    uint64 labels are reinterpreted (without copying) as int64."""
+    if data.dtype == np.uint64:
+        return data.view(np.int64)
+    if data.dtype.kind == "u" and data.dtype.itemsize > 1:
+        return data.astype(np.int64)
+    return data
+
+
 class GunpowderTrainer(Trainer):
     iteration = 0
 
@@ -34,6 +46,11 @@ class GunpowderTrainer(Trainer):
         self.learning_rate = trainer_config.learning_rate
         self.batch_size = trainer_config.batch_size
         self.num_data_fetchers = trainer_config.num_data_fetchers
+        self.prefetch_batches = trainer_config.prefetch_batches
+        self.amp = trainer_config.amp
+        self.gradient_accumulation_steps = trainer_config.gradient_accumulation_steps
+        self.checkpoint_activations = trainer_config.checkpoint_activations
+        self.device_targets = trainer_config.device_targets
         self.print_profiling = 100
         self.snapshot_iteration = trainer_config.snapshot_interval
         self.min_masked = trainer_config.min_masked
@@ -43,6 +60,19 @@ class GunpowderTrainer(Trainer):
         self.clip_raw = trainer_config.clip_raw
 
         self.scheduler = None
+        self._loader = None
+
+        # created in iterate, once the training device is known
+        self.scaler = None
+        self._scaler_state = None
+
+    def load_scaler_state(self, state):
+        """Load a stored state of the loss scaler, applied once the scaler is
+        created (only for mixed precision training on cuda)."""
+        if self.scaler is not None:
+            self.scaler.load_state_dict(state)
+        else:
+            self._scaler_state = state
 
     def create_optimizer(self, model):
         optimizer = torch.optim.RAdam(lr=self.learning_rate, params=model.parameters())
@@ -83,6 +113,14 @@ class GunpowderTrainer(Trainer):
         weight_key = gp.ArrayKey("WEIGHT")
         sample_points_key = gp.GraphKey("SAMPLE_POINTS")
 
+        predictor = task.predictor
+        self._device_targets = self.device_targets and predictor.device_targets
+        if self.device_targets and not predictor.device_targets:
+            logger.warning(
+                f"{type(predictor).__name__} can not create targets on the device, "
+                "creating them in the data pipeline instead."
+            )
+
         # Get source nodes
         dataset_sources = []
         weights = []
@@ -148,13 +186,14 @@ class GunpowderTrainer(Trainer):
         pipeline = tuple(dataset_sources) + gp.RandomProvider(weights)
 
         # Add predictor nodes to pipeline
-        pipeline += DaCapoTargetFilter(
-            task.predictor,
-            gt_key=gt_key,
-            target_key=target_key,
-            weights_key=weight_key,
-            mask_key=mask_key,
-        )
+        if not self._device_targets:
+            pipeline += DaCapoTargetFilter(
+                task.predictor,
+                gt_key=gt_key,
+                target_key=target_key,
+                weights_key=weight_key,
+                mask_key=mask_key,
+            )
 
         # Trainer attributes:
         if self.num_data_fetchers > 1:
@@ -169,8 +208,9 @@ class GunpowderTrainer(Trainer):
         # generate request for all necessary inputs to training
         request = gp.BatchRequest()
         request.add(raw_key, input_size)
-        request.add(target_key, output_size)
-        request.add(weight_key, output_size)
+        if not self._device_targets:
+            request.add(target_key, output_size)
+            request.add(weight_key, output_size)
         request.add(
             mask_placeholder,
             prediction_voxel_size * self.mask_integral_downsample_factor,
@@ -181,6 +221,22 @@ class GunpowderTrainer(Trainer):
         request[mask_placeholder].roi = request[mask_placeholder].roi.snap_to_grid(
             prediction_voxel_size * self.mask_integral_downsample_factor
         )
+        if self._device_targets:
+            # targets are created on the device from gt and mask, with as much
+            # context as the predictor needs, and then cropped to the output
+            output_roi = request[gt_key].roi
+            gt_roi = predictor.gt_region_for_roi(
+                gp.ArraySpec(roi=output_roi, voxel_size=prediction_voxel_size)
+            ).roi
+            request[gt_key].roi = gt_roi
+            request[mask_key].roi = gt_roi
+            self._target_context = (
+                output_roi.offset - gt_roi.offset
+            ) / prediction_voxel_size
+            self._output_shape = output_roi.shape / prediction_voxel_size
+            self._predictor = predictor
+            self._prediction_voxel_size = prediction_voxel_size
+            self._moving_counts = None
 
         self._request = request
         self._pipeline = pipeline
@@ -194,48 +250,92 @@ class GunpowderTrainer(Trainer):
         self.snapshot_container = snapshot_container
 
     def iterate(self, num_iterations, model, optimizer, device):
-        t_start_fetch = time.time()
+        if self._loader is None:
+            self._loader = DeviceLoader(
+                self._fetch, device, prefetch=self.prefetch_batches
+            )
+
+        if self.checkpoint_activations:
+            for module in model.modules():
+                if hasattr(module, "checkpoint_activations"):
+                    module.checkpoint_activations = True
+
+        # float16 needs a GradScaler, which is only available on cuda
+        amp_dtype = torch.float16 if device.type == "cuda" else torch.bfloat16
+        if self.amp and device.type == "cuda" and self.scaler is None:
+            self.scaler = torch.amp.GradScaler("cuda")
+            if self._scaler_state:
+                self.scaler.load_state_dict(self._scaler_state)
+            self._scaler_state = None
 
         print("Starting iteration!")
 
         for iteration in range(self.iteration, self.iteration + num_iterations):
-            raw, gt, target, weight, mask = self.next()
-            logger.debug(
-                f"Trainer fetch batch took {time.time() - t_start_fetch} seconds"
-            )
-
             for param in model.parameters():
                 param.grad = None
 
+            data_time = 0.0
+            step_time = 0.0
+            total_loss = 0.0
+            # accumulate gradients over several micro-batches before
+            # stepping the optimizer
+            for _ in range(self.gradient_accumulation_steps):
+                t_start_fetch = time.time()
+                (raw, gt, target, weight, mask), tensors = self._loader.next()
+                data_time += time.time() - t_start_fetch
+
+                t_start_prediction = time.time()
+                if self._device_targets:
+                    tensors["target"], tensors["weight"] = (
+                        self._create_target_and_weight(tensors["gt"], tensors["mask"])
+                    )
+                with torch.autocast(
+                    device_type=device.type, dtype=amp_dtype, enabled=self.amp
+                ):
+                    predicted = model.forward(tensors["raw"].float())
+                predicted.retain_grad()
+                loss = self._loss.compute(
+                    predicted.float(),
+                    tensors["target"].float(),
+                    tensors["weight"].float(),
+                )
+                micro_batch_loss = loss / self.gradient_accumulation_steps
+                if self.scaler is not None:
+                    self.scaler.scale(micro_batch_loss).backward()
+                else:
+                    micro_batch_loss.backward()
+                total_loss += micro_batch_loss.item()
+                step_time += time.time() - t_start_prediction
+
             t_start_prediction = time.time()
-            predicted = model.forward(torch.as_tensor(raw[raw.roi]).to(device).float())
-            predicted.retain_grad()
-            loss = self._loss.compute(
-                predicted,
-                torch.as_tensor(target[target.roi]).to(device).float(),
-                torch.as_tensor(weight[weight.roi]).to(device).float(),
-            )
-            loss.backward()
-            optimizer.step()
+            if self.scaler is not None:
+                self.scaler.step(optimizer)
+                self.scaler.update()
+            else:
+                optimizer.step()
+            logger.debug(f"Trainer waited {data_time} seconds for data")
 
             if (
                 self.snapshot_iteration is not None
                 and iteration % self.snapshot_iteration == 0
             ):
                 snapshot_zarr = zarr.open(self.snapshot_container.container, "a")
+                if self._device_targets:
+                    target = self._host_array(tensors["target"], gt)
+                    weight = self._host_array(tensors["weight"], gt)
                 snapshot_arrays = {
                     "volumes/raw": raw,
                     "volumes/gt": gt,
                     "volumes/target": target,
                     "volumes/weight": weight,
                     "volumes/prediction": NumpyArray.from_np_array(
-                        predicted.detach().cpu().numpy(),
+                        predicted.detach().float().cpu().numpy(),
                         target.roi,
                         target.voxel_size,
                         target.axes,
                     ),
                     "volumes/gradients": NumpyArray.from_np_array(
-                        predicted.grad.detach().cpu().numpy(),
+                        predicted.grad.detach().float().cpu().numpy(),
                         target.roi,
                         target.voxel_size,
                         target.axes,
@@ -283,17 +383,16 @@ class GunpowderTrainer(Trainer):
                     dataset.attrs["resolution"] = v.voxel_size
                     dataset.attrs["axes"] = v.axes
 
-            logger.debug(
-                f"Trainer step took {time.time() - t_start_prediction} seconds"
-            )
+            step_time += time.time() - t_start_prediction
+            logger.debug(f"Trainer step took {step_time} seconds")
             self.iteration += 1
             self.scheduler.step()
             yield TrainingIterationStats(
-                loss=loss.item(),
+                loss=total_loss,
                 iteration=iteration,
-                time=time.time() - t_start_prediction,
+                time=step_time,
+                data_time=data_time,
             )
-            t_start_fetch = time.time()
 
     def __iter__(self):
         with gp.build(self._pipeline):
@@ -310,8 +409,16 @@ class GunpowderTrainer(Trainer):
         return (
             NumpyArray.from_gp_array(batch[self._raw_key]),
             NumpyArray.from_gp_array(batch[self._gt_key]),
-            NumpyArray.from_gp_array(batch[self._target_key]),
-            NumpyArray.from_gp_array(batch[self._weight_key]),
+            (
+                NumpyArray.from_gp_array(batch[self._target_key])
+                if self._target_key in batch
+                else None
+            ),
+            (
+                NumpyArray.from_gp_array(batch[self._weight_key])
+                if self._weight_key in batch
+                else None
+            ),
             (
                 NumpyArray.from_gp_array(batch[self._mask_key])
                 if self._mask_key is not None
@@ -319,11 +426,88 @@ class GunpowderTrainer(Trainer):
             ),
         )
 
+    def _fetch(self):
+        """Fetch the next batch for the ``DeviceLoader``: the host arrays and
+        the arrays needed on the device for the training step."""
+        raw, gt, target, weight, mask = self.next()
+        if self._device_targets:
+            return (raw, gt, target, weight, mask), {
+                "raw": raw[raw.roi],
+                "gt": _device_labels(gt[gt.roi]),
+                "mask": mask[mask.roi],
+            }
+        return (raw, gt, target, weight, mask), {
+            "raw": raw[raw.roi],
+            "target": target[target.roi],
+            "weight": weight[weight.roi],
+        }
+
+    def _create_target_and_weight(self, gt, mask):
+        """Create the target and weight of a batch on the device, from the
+        ground truth and mask tensors, cropped to the output ROI."""
+        dims = self._prediction_voxel_size.dims
+        crop = (Ellipsis,) + tuple(
+            slice(c, c + s) for c, s in zip(self._target_context, self._output_shape)
+        )
+        targets = []
+        weights = []
+
+        # time expensive steps of the predictor (e.g. "lsds") as in the
+        # DaCapoCreateTarget node of the data pipeline
+        timings = []
+
+        def profile(name):
+            timing = Timing(self._predictor, name)
+            timings.append(timing)
+            return timing
+
+        self._predictor.profile = profile
+        try:
+            for sample_gt, sample_mask in zip(gt, mask):
+                # remove the channel dimension, if any
+                sample_gt = sample_gt.reshape(sample_gt.shape[-dims:])
+                sample_mask = sample_mask.reshape(sample_mask.shape[-dims:])
+                target = self._predictor.create_target_torch(
+                    sample_gt, self._prediction_voxel_size
+                )
+                weight, self._moving_counts = self._predictor.create_weight_torch(
+                    sample_gt, target, sample_mask, self._moving_counts
+                )
+                targets.append(target[crop])
+                weights.append(weight[crop])
+        finally:
+            self._predictor.profile = None
+        for timing in timings:
+            logger.debug(
+                f"Creating {timing.get_method_name()} on the device took "
+                f"{timing.elapsed()} seconds"
+            )
+        return torch.stack(targets), torch.stack(weights)
+
+    def _host_array(self, tensor, gt):
+        """A host copy of a target or weight tensor created on the device,
+        e.g. for snapshots."""
+        voxel_size = self._prediction_voxel_size
+        roi = Roi(
+            gt.roi.offset + self._target_context * voxel_size,
+            self._output_shape * voxel_size,
+        )
+        return NumpyArray.from_np_array(
+            tensor.detach().cpu().numpy(),
+            roi,
+            voxel_size,
+            ["b", "c"] + ["z", "y", "x"][-voxel_size.dims :],
+        )
+
     def __enter__(self):
         self._iter = iter(self)
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
+        if self._loader is not None:
+            # make sure the pipeline is not used anymore before tearing it down
+            self._loader.stop()
+            self._loader = None
         try:
             self._iter.send(True)
         except TypeError:
@@ -17,6 +17,11 @@ class GunpowderTrainerConfig(TrainerConfig):
     Attributes:
         trainer_type (class): This is the type of the trainer which is set to GunpowderTrainer by default.
         num_data_fetchers (int): This is the number of CPU workers who will be dedicated to fetch and process the data.
+        prefetch_batches (int): This is the number of batches that are loaded and uploaded to the device ahead of the training step.
+        amp (bool): This is a boolean value indicating whether to train with automatic mixed precision.
+        gradient_accumulation_steps (int): This is the number of micro-batches whose gradients are accumulated per optimizer step.
+        checkpoint_activations (bool): This is a boolean value indicating whether to recompute activations in the backward pass instead of storing them.
+        device_targets (bool): This is a boolean value indicating whether to create targets and weights on the training device instead of in the data pipeline.
         augments (List[AugmentConfig]): This is the list of augments to apply during the training.
         snapshot_interval (Optional[int]): This is the number of iterations after which a new snapshot should be saved.
         min_masked (Optional[float]): This is the minimum masked value.
@@ -33,6 +38,47 @@ class GunpowderTrainerConfig(TrainerConfig):
         },
     )
 
+    prefetch_batches: int = attr.ib(
+        default=2,
+        metadata={
+            "help_text": "The number of batches that are loaded in a background thread and "
+            "uploaded to the device (from pinned memory, on a separate CUDA stream) while the "
+            "current training step is running. 0 loads batches synchronously."
+        },
+    )
+
+    amp: bool = attr.ib(
+        default=False,
+        metadata={
+            "help_text": "Whether to train with automatic mixed precision. Uses float16 "
+            "autocast with a gradient scaler on cuda, and bfloat16 autocast on cpu."
+        },
+    )
+    gradient_accumulation_steps: int = attr.ib(
+        default=1,
+        metadata={
+            "help_text": "The number of micro-batches (each of size batch_size) whose "
+            "gradients are accumulated before each optimizer step."
+        },
+    )
+    checkpoint_activations: bool = attr.ib(
+        default=False,
+        metadata={
+            "help_text": "Whether to recompute the activations of each UNet level in the "
+            "backward pass instead of storing them, trading compute for memory."
+        },
+    )
+    device_targets: bool = attr.ib(
+        default=False,
+        metadata={
+            "help_text": "Whether to create targets and weights on the training device. The "
+            "data fetchers then only load raw, ground truth and mask, which reduces CPU load "
+            "and host to device transfers. Only supported by predictors with a torch "
+            "implementation of target and weight creation, others fall back to creating "
+            "them in the data pipeline."
+        },
+    )
+
     augments: List[AugmentConfig] = attr.ib(
         factory=lambda: list(),
         metadata={"help_text": "The augments to apply during training."},
@@ -10,6 +10,7 @@ class TrainingIterationStats:
         iteration (int): The iteration that produced these stats.
         loss (float): The loss value of this iteration.
         time (float): The time it took to process this iteration.
+        data_time (float): The time the training loop waited for data in this iteration.
 
     """
 
@@ -20,3 +21,9 @@ class TrainingIterationStats:
     time: float = attr.ib(
         metadata={"help_text": "The time it took to process this iteration."}
     )
+    data_time: float = attr.ib(
+        default=0.0,
+        metadata={
+            "help_text": "The time the training loop waited for data in this iteration."
+        },
+    )
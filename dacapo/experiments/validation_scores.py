@@ -3,7 +3,7 @@ from .tasks.evaluators import EvaluationScores
 from .tasks.post_processors import PostProcessorParameters
 from .datasplits.datasets import Dataset
 
-from typing import List, Tuple
+from typing import List, Set, Tuple
 import attr
 import numpy as np
 import xarray as xr
@@ -78,6 +78,32 @@ class ValidationScores:
         else:
             return False, existing_iteration
 
+    def best_iterations(self) -> Set[int]:
+        """The iterations with the best score (over all post-processing
+        parameters) on any dataset, for all criteria whose best weights are
+        stored."""
+        if not self.scores:
+            return set()
+        iterations = [iteration_score.iteration for iteration_score in self.scores]
+        scores = np.array(
+            [iteration_score.scores for iteration_score in self.scores],
+            dtype=np.float64,
+        ).reshape((len(self.scores), len(self.datasets), -1, len(self.criteria)))
+        best = set()
+        for index, criterion in enumerate(self.criteria):
+            if not self.evaluation_scores.store_best(criterion):
+                continue
+            criterion_scores = scores[..., index]
+            if not self.evaluation_scores.higher_is_better(criterion):
+                criterion_scores = -criterion_scores
+            criterion_scores = np.where(
+                np.isnan(criterion_scores), -np.inf, criterion_scores
+            ).max(axis=2)
+            for dataset_scores in criterion_scores.T:
+                if (dataset_scores > -np.inf).any():
+                    best.add(iterations[int(dataset_scores.argmax())])
+        return best
+
     @property
     def criteria(self) -> List[str]:
         return self.evaluation_scores.criteria
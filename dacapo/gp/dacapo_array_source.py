@@ -1,6 +1,6 @@
 # from dacapo.stateless.arraysources.helpers import ArraySource
 
-from dacapo.experiments.datasplits.datasets.arrays import Array
+from dacapo.experiments.datasplits.datasets.arrays import Array, CachedArray
 
 import gunpowder as gp
 from gunpowder.profiling import Timing
@@ -42,8 +42,18 @@ class DaCapoArraySource(gp.BatchProvider):
         spec = self.array_spec.copy()
         spec.roi = request[self.key].roi
 
+        cache_timings = []
         if spec.roi.empty:
             data = np.zeros((0,) * len(self.array.axes))
+        elif isinstance(self.array, CachedArray):
+            # time chunk fetches as "cache_hit" and "cache_miss", so that
+            # their counts show up in the profiling stats
+            def profile(hit):
+                timing = Timing(self, "cache_hit" if hit else "cache_miss")
+                cache_timings.append(timing)
+                return timing
+
+            data = self.array.read(spec.roi, profile)
         else:
             data = self.array[spec.roi]
         if "c" not in self.array.axes:
@@ -56,5 +66,7 @@ class DaCapoArraySource(gp.BatchProvider):
         timing_provide.stop()
 
         output.profiling_stats.add(timing_provide)
+        for timing in cache_timings:
+            output.profiling_stats.add(timing)
 
         return output
@@ -2,6 +2,7 @@ from dacapo.experiments.tasks.predictors import Predictor
 from dacapo.experiments.datasplits.datasets.arrays import NumpyArray
 
 import gunpowder as gp
+from gunpowder.profiling import Timing
 
 from typing import Optional
 
@@ -82,6 +83,25 @@ class DaCapoTargetFilter(gp.BatchFilter):
     def process(self, batch, request):
         output = gp.Batch()
 
+        # time expensive steps of the predictor (e.g. "lsds") separately, so
+        # that they show up in the profiling stats
+        timings = []
+
+        def profile(name):
+            timing = Timing(self, name)
+            timings.append(timing)
+            return timing
+
+        self.predictor.profile = profile
+        try:
+            self._create_target_and_weight(batch, request, output)
+        finally:
+            self.predictor.profile = None
+        for timing in timings:
+            batch.profiling_stats.add(timing)
+        return output
+
+    def _create_target_and_weight(self, batch, request, output):
         gt_array = NumpyArray.from_gp_array(batch[self.gt_key])
         target_array = self.predictor.create_target(gt_array)
         mask_array = NumpyArray.from_gp_array(batch[self.mask_key])
@@ -104,4 +124,3 @@ class DaCapoTargetFilter(gp.BatchFilter):
             output[self.weights_key] = gp.Array(
                 weight_array[request_spec.roi], request_spec
             )
-        return output
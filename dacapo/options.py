@@ -34,6 +34,84 @@ class DaCapoConfig:
             "This is a dictionary with the keys being the names of the compute context and the values being the configuration for that context."
         },
     )
+    async_checkpoints: bool = attr.ib(
+        default=False,
+        metadata={
+            "help_text": "Whether to write model checkpoints in a background thread instead of blocking training."
+        },
+    )
+    max_pending_checkpoints: int = attr.ib(
+        default=2,
+        metadata={
+            "help_text": "The maximum number of checkpoints held in memory while waiting to be written "
+            "when using async_checkpoints."
+        },
+    )
+    keep_last_checkpoints: Optional[int] = attr.ib(
+        default=None,
+        metadata={
+            "help_text": "If set, only the latest this many checkpoints (plus the best checkpoint per "
+            "validation dataset and criterion) are kept on disk. All checkpoints are kept by default."
+        },
+    )
+    validation_policy: str = attr.ib(
+        default="all",
+        metadata={
+            "help_text": "How validation jobs that pile up during training are handled. 'all' validates "
+            "every validation iteration in order, 'latest' skips pending iterations in favour of the latest one."
+        },
+    )
+    validation_cuda_devices: Optional[str] = attr.ib(
+        default=None,
+        metadata={
+            "help_text": "The cuda devices (as in CUDA_VISIBLE_DEVICES) to validate on during training. "
+            "Defaults to the devices visible to training."
+        },
+    )
+    validation_weights_timeout: float = attr.ib(
+        default=600.0,
+        metadata={
+            "help_text": "How many seconds a validation job waits for the weights of its iteration to be "
+            "written before it is reported as failed."
+        },
+    )
+    zarr_compression: str = attr.ib(
+        default="presets",
+        metadata={
+            "help_text": "The compression of zarr datasets written by DaCapo (predictions, "
+            "post-processed outputs, validation inputs). 'presets' picks the compressor from "
+            "zarr_compressors by dtype, 'default' uses the zarr default compressor."
+        },
+    )
+    zarr_compressors: dict = attr.ib(
+        default={
+            "float": {"id": "blosc", "cname": "zstd", "clevel": 3, "shuffle": 2},
+            "uint8": {"id": "blosc", "cname": "lz4", "clevel": 3, "shuffle": 1},
+            "labels": {"id": "blosc", "cname": "zstd", "clevel": 5, "shuffle": 1},
+            "other": {"id": "blosc", "cname": "lz4", "clevel": 5, "shuffle": 1},
+        },
+        metadata={
+            "help_text": "The numcodecs compressor configs used with zarr_compression 'presets', "
+            "for 'float' datasets, 'uint8' datasets (e.g. predictions), 'labels' (other "
+            "integer datasets) and any 'other' dtype."
+        },
+    )
+    zarr_max_chunk_bytes: int = attr.ib(
+        default=16 * 1024**2,
+        metadata={
+            "help_text": "The maximal size of an (uncompressed) chunk of zarr datasets written "
+            "by DaCapo. Chunks are the size of a blockwise write ROI, or an even division of "
+            "it if the write ROI is larger than this."
+        },
+    )
+    preload_max_bytes: int = attr.ib(
+        default=8 * 1024**3,
+        metadata={
+            "help_text": "The maximal size of an (uncompressed) array that is preloaded for "
+            "training by datasets with preload set. Larger arrays are read from their "
+            "sources as usual, with a warning."
+        },
+    )
     mongo_db_host: Optional[str] = attr.ib(
         default=None,
         metadata={
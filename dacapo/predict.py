@@ -27,6 +27,12 @@ def predict(
     num_workers: int = 12,
     output_dtype: np.dtype | str = np.uint8,  # type: ignore
     overwrite: bool = True,
+    batch_size: Optional[int] = None,
+    precision: str = "float32",
+    channels_last: bool = False,
+    compile_model: Optional[str] = None,
+    reset: str = "delete",
+    precision_tolerance: float = 0.05,
 ):
     """Predict with a trained model.
 
@@ -40,6 +46,12 @@ def predict(
         num_workers (int, optional): The number of workers to use for blockwise prediction. Defaults to 1 for local processing, otherwise 12.
         output_dtype (np.dtype | str, optional): The dtype of the output array. Defaults to np.uint8.
         overwrite (bool, optional): If True, the output array will be overwritten if it already exists. Defaults to True.
+        batch_size (Optional[int], optional): The number of blocks each worker predicts in a single forward pass. If None, it is chosen from the free device memory. Defaults to None.
+        precision (str, optional): The precision to run inference in. One of "float32", "float16" or "bfloat16". Reduced precisions use autocast, on CPU bfloat16 is used if supported. Defaults to "float32".
+        channels_last (bool, optional): If True, the model is run with a channels last memory format. Defaults to False.
+        compile_model (Optional[str], optional): Compile the model with "compile" (torch.compile) or trace it with "trace" (TorchScript). Defaults to None.
+        reset (str, optional): How to reset an existing output array if overwrite is False: "delete" deletes all its chunks, "resume" keeps the existing predictions and skips the blocks whose output chunks have all been written. Defaults to "delete".
+        precision_tolerance (float, optional): The maximum absolute difference of a reduced precision prediction to the float32 prediction on a sample block before a warning is emitted. Defaults to 0.05.
     """
     # retrieving run
     if isinstance(run_name, Run):
@@ -130,6 +142,7 @@ def predict(
         output_dtype,
         overwrite=overwrite,
         write_size=output_size,
+        reset=reset,
     )
 
     # run blockwise prediction
@@ -148,5 +161,11 @@ def predict(
         iteration=iteration,
         input_array_identifier=input_array_identifier,
         output_array_identifier=output_array_identifier,
+        batch_size=batch_size,
+        precision=precision,
+        channels_last=channels_last,
+        compile_model=compile_model,
+        skip_existing=not overwrite and reset == "resume",
+        precision_tolerance=precision_tolerance,
     )
     print("Done predicting.")
@@ -48,7 +48,12 @@ def create_weights_store():
 
     # currently, only the LocalWeightsStore is supported
     base_dir = Path(options.runs_base_dir).expanduser()
-    return LocalWeightsStore(base_dir)
+    return LocalWeightsStore(
+        base_dir,
+        async_writes=options.async_checkpoints,
+        max_pending=options.max_pending_checkpoints,
+        keep_last=options.keep_last_checkpoints,
+    )
 
 
 def create_array_store():
@@ -2,8 +2,12 @@ from .stats_store import StatsStore
 from .converter import converter
 from dacapo.experiments import TrainingStats, TrainingIterationStats
 from dacapo.experiments import ValidationScores, ValidationIterationScores
-from typing import List
+from typing import List, Optional
 
+import attr
+import numpy as np
+
+import json
 import logging
 import pickle
 from pathlib import Path
@@ -14,6 +18,14 @@ logger = logging.getLogger(__name__)
 class FileStatsStore(StatsStore):
     """A File based store for run statistics. Used to store and retrieve training
     statistics and validation scores.
+
+    Training statistics are stored per run as an append-only file of
+    fixed-size binary records (one per iteration, with one field per
+    attribute of ``TrainingIterationStats``) next to a json header describing
+    the record fields. Storing new iterations only appends their records,
+    ``trained_until`` only looks at the last record, and ranges of
+    iterations are read through a memory map. Training statistics stored in
+    the previous pickle format are migrated on first access.
     """
 
     def __init__(self, path):
@@ -25,16 +37,16 @@ class FileStatsStore(StatsStore):
         self.__init_db()
 
     def store_training_stats(self, run_name, stats):
-        existing_stats = self.__read_training_stats(run_name)
+        existing_until = self.trained_until(run_name)
 
         store_from_iteration = 0
 
-        if existing_stats.trained_until() > 0:
+        if existing_until > 0:
             if stats.trained_until() > 0:
                 # both current stats and DB contain data
-                if stats.trained_until() > existing_stats.trained_until():
+                if stats.trained_until() > existing_until:
                     # current stats go further than the one in DB
-                    store_from_iteration = existing_stats.trained_until()
+                    store_from_iteration = existing_until
                     print(
                         f"Updating training stats of run {run_name} after iteration {store_from_iteration}"
                     )
@@ -50,8 +62,26 @@ class FileStatsStore(StatsStore):
             stats, store_from_iteration, stats.trained_until(), run_name
         )
 
-    def retrieve_training_stats(self, run_name):
-        return self.__read_training_stats(run_name)
+    def retrieve_training_stats(
+        self,
+        run_name: str,
+        subsample: bool = False,
+        begin: Optional[int] = None,
+        end: Optional[int] = None,
+    ) -> TrainingStats:
+        """Retrieve the training stats of iterations ``begin`` (inclusive)
+        to ``end`` (exclusive), all iterations by default. If ``subsample``
+        is set, only about 1000 evenly spaced iterations (and the last one)
+        are returned."""
+        return self.__read_training_stats(
+            run_name, subsample=subsample, begin=begin, end=end
+        )
+
+    def trained_until(self, run_name: str) -> int:
+        records = self.__training_records(run_name)
+        if len(records) == 0:
+            return 0
+        return int(records[-1]["iteration"]) + 1
 
     def store_validation_iteration_scores(self, run_name, scores):
         existing_iteration_scores = self.__read_validation_iteration_scores(run_name)
@@ -78,29 +108,126 @@ class FileStatsStore(StatsStore):
         self.__delete_training_stats(run_name)
 
     def __store_training_stats(self, stats, begin, end, run_name):
-        docs = converter.unstructure(stats.iteration_stats[begin:end])
-        for doc in docs:
-            doc.update({"run_name": run_name})
+        if begin >= end:
+            return
+        first = stats.iteration_stats[0].iteration
+        iteration_stats = stats.iteration_stats[max(begin - first, 0) : end - first]
+        dtype = _training_stats_dtype()
+        records = np.array(
+            [
+                tuple(getattr(stat, name) for name in dtype.names)
+                for stat in iteration_stats
+            ],
+            dtype=dtype,
+        )
 
-        if docs:
-            file_store = self.training_stats / run_name
-            with file_store.open("wb") as fd:
-                pickle.dump(docs, fd)
+        self.__migrate_training_stats(run_name)
+        header, data = self.__training_stats_files(run_name)
+        if not header.exists():
+            with header.open("w") as f:
+                json.dump({"fields": dtype.descr}, f)
+        with data.open("ab") as f:
+            # drop a partially written last record, records appended after it
+            # would be misaligned otherwise
+            size = data.stat().st_size
+            f.truncate(size - size % dtype.itemsize)
+            records.tofile(f)
 
-    def __read_training_stats(self, run_name):
-        file_store = self.training_stats / run_name
-        if file_store.exists():
-            with file_store.open("rb") as fd:
-                docs = pickle.load(fd)
-        else:
-            docs = []
+    def __read_training_stats(
+        self,
+        run_name: str,
+        subsample: bool = False,
+        begin: Optional[int] = None,
+        end: Optional[int] = None,
+    ) -> TrainingStats:
+        records = self.__training_records(run_name)
+        if len(records) > 0:
+            # records are stored for consecutive iterations
+            first = int(records[0]["iteration"])
+            start = 0 if begin is None else max(begin - first, 0)
+            stop = len(records) if end is None else max(end - first, start)
+            records = records[start:stop]
+        if subsample and len(records) > 0:
+            # if possible subsample s.t. we get 1000 iterations
+            last = int(records[-1]["iteration"])
+            step = max((last + 999) // 1000, 1)
+            offset = -int(records[0]["iteration"]) % step
+            indices = np.arange(offset, len(records), step)
+            if len(indices) == 0 or indices[-1] != len(records) - 1:
+                indices = np.append(indices, len(records) - 1)
+            records = records[indices]
+
+        names = records.dtype.names
+        return TrainingStats(
+            [
+                TrainingIterationStats(**dict(zip(names, values)))
+                for values in records.tolist()
+            ]
+        )
+
+    def __training_records(self, run_name: str) -> np.ndarray:
+        """Memory map the stored training stats records of a run."""
+        self.__migrate_training_stats(run_name)
+        header, data = self.__training_stats_files(run_name)
+        if not header.exists() or not data.exists():
+            return np.zeros((0,), dtype=_training_stats_dtype())
+        with header.open("r") as f:
+            dtype = np.dtype([tuple(field) for field in json.load(f)["fields"]])
+        # ignore a partially written last record
+        num_records = data.stat().st_size // dtype.itemsize
+        if num_records == 0:
+            return np.zeros((0,), dtype=dtype)
+        records = np.memmap(data, dtype=dtype, mode="r", shape=(num_records,))
+        if dtype != _training_stats_dtype():
+            # stored with different fields, convert to the current fields
+            records = self.__convert_records(records, run_name)
+        return records
+
+    def __convert_records(self, records: np.ndarray, run_name: str) -> np.ndarray:
+        logger.warning(f"Converting training stats of run {run_name} to new fields")
+        dtype = _training_stats_dtype()
+        converted = np.zeros(records.shape, dtype=dtype)
+        for field in attr.fields(TrainingIterationStats):
+            if field.name in records.dtype.names:
+                converted[field.name] = records[field.name]
+            elif field.default is not attr.NOTHING:
+                converted[field.name] = field.default
+        self.__delete_training_stats(run_name)
+        header, data = self.__training_stats_files(run_name)
+        with header.open("w") as f:
+            json.dump({"fields": dtype.descr}, f)
+        with data.open("wb") as f:
+            converted.tofile(f)
+        return converted
+
+    def __migrate_training_stats(self, run_name: str) -> None:
+        """Convert training stats stored in the previous (pickled) format."""
+        legacy_file = self.training_stats / run_name
+        if not legacy_file.is_file():
+            return
+        logger.warning(f"Migrating training stats of run {run_name} to new format")
+        with legacy_file.open("rb") as fd:
+            docs = pickle.load(fd)
         stats = TrainingStats(converter.structure(docs, List[TrainingIterationStats]))
-        return stats
+        header, data = self.__training_stats_files(run_name)
+        header.unlink(missing_ok=True)
+        data.unlink(missing_ok=True)
+        legacy_file.unlink()
+        self.__store_training_stats(stats, 0, stats.trained_until(), run_name)
+
+    def __training_stats_files(self, run_name: str):
+        return (
+            self.training_stats / f"{run_name}.json",
+            self.training_stats / f"{run_name}.stats",
+        )
 
     def __delete_training_stats(self, run_name):
-        file_store = self.training_stats / run_name
-        if file_store.exists():
-            file_store.unlink()
+        for file_store in (
+            self.training_stats / run_name,
+            *self.__training_stats_files(run_name),
+        ):
+            if file_store.exists():
+                file_store.unlink()
 
     def __store_validation_iteration_scores(
         self, validation_scores: ValidationScores, begin: int, end: int, run_name: str
@@ -141,3 +268,14 @@ class FileStatsStore(StatsStore):
         self.training_stats.mkdir(exist_ok=True, parents=True)
         self.validation_scores = self.path / "validation_scores"
         self.validation_scores.mkdir(exist_ok=True, parents=True)
+
+
+def _training_stats_dtype() -> np.dtype:
+    """The record type of stored training stats, with one field per attribute
+    of ``TrainingIterationStats``."""
+    return np.dtype(
+        [
+            (field.name, np.int64 if field.name == "iteration" else np.float64)
+            for field in attr.fields(TrainingIterationStats)
+        ]
+    )
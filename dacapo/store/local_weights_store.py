@@ -4,22 +4,52 @@ from dacapo.experiments.run import Run
 
 import torch
 
+from concurrent.futures import Future, ThreadPoolExecutor
 import json
+import os
 from pathlib import Path
 import logging
-from typing import Optional, Union
+import threading
+from typing import Any, Dict, List, Optional, Set, Union
 
 
 logger = logging.getLogger(__name__)
 
 
 class LocalWeightsStore(WeightsStore):
-    """A local store for network weights."""
-
-    def __init__(self, basedir):
+    """A local store for network weights.
+
+    Weights are written to a temporary file that is atomically renamed once
+    complete. If ``async_writes`` is set, ``store_weights`` only copies the
+    weights to cpu memory and returns, the file is written by a background
+    thread. At most ``max_pending`` checkpoints are held in memory, further
+    calls block until a write finishes. If ``keep_last`` is set, only the
+    latest ``keep_last`` iterations are kept on disk, together with the best
+    iterations according to the validation scores in the stats store (and
+    the ones stored with ``store_best``) and the iterations passed to
+    ``protect``, e.g. because their validation is still pending.
+    """
+
+    def __init__(
+        self,
+        basedir,
+        async_writes: bool = False,
+        max_pending: int = 2,
+        keep_last: Optional[int] = None,
+    ):
         print(f"Creating local weights store in directory {basedir}")
 
         self.basedir = basedir
+        self.async_writes = async_writes
+        self.keep_last = keep_last
+        if keep_last is not None:
+            assert keep_last >= 1, "Need to keep at least the last checkpoint."
+
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending_slots = threading.BoundedSemaphore(max(1, max_pending))
+        self._pending: List[Future] = []
+        self._protected: Dict[str, Set[int]] = {}
+        self._protected_lock = threading.Lock()
 
     def latest_iteration(self, run: str) -> Optional[int]:
         """Return the latest iteration for which weights are available for the
@@ -27,7 +57,7 @@ class LocalWeightsStore(WeightsStore):
 
         weights_dir = self.__get_weights_dir(run) / "iterations"
 
-        iterations = sorted([int(path.parts[-1]) for path in weights_dir.glob("*")])
+        iterations = self.__stored_iterations(weights_dir)
 
         if not iterations:
             return None
@@ -45,9 +75,95 @@ class LocalWeightsStore(WeightsStore):
         if not weights_dir.exists():
             weights_dir.mkdir(parents=True, exist_ok=True)
 
-        weights = Weights(run.model.state_dict(), run.optimizer.state_dict())
+        scaler = getattr(run.trainer, "scaler", None)
+        weights = Weights(
+            run.model.state_dict(),
+            run.optimizer.state_dict(),
+            scaler.state_dict() if scaler is not None else None,
+        )
+
+        if not self.async_writes:
+            self.__write_weights(weights, weights_name, run)
+            return
+
+        # copy the weights to cpu memory, so that training can continue
+        # while they are written
+        weights = Weights(
+            _to_cpu(weights.model), _to_cpu(weights.optimizer), _to_cpu(weights.scaler)
+        )
+        self._pending_slots.acquire()
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="dacapo_weights_writer"
+            )
+        future = self._executor.submit(
+            self.__write_weights, weights, weights_name, run
+        )
+        future.add_done_callback(lambda _: self._pending_slots.release())
+        self._pending = [f for f in self._pending if not f.done()] + [future]
+
+    def flush(self):
+        """Wait until all pending weights are written."""
+        for future in list(self._pending):
+            # re-raises exceptions from the writer thread
+            future.result()
+
+    def protect(self, run: Union[str, Run], iteration: int):
+        """Never remove the weights of this iteration until ``release`` is
+        called."""
+        run = run if isinstance(run, str) else run.name
+        with self._protected_lock:
+            self._protected.setdefault(run, set()).add(iteration)
+
+    def release(self, run: Union[str, Run], iteration: int):
+        """Allow the weights of this iteration to be removed again."""
+        run = run if isinstance(run, str) else run.name
+        with self._protected_lock:
+            self._protected.get(run, set()).discard(iteration)
+
+    def __write_weights(self, weights: Weights, weights_name: Path, run: Run):
+        tmp_name = weights_name.with_name(f".{weights_name.name}.tmp")
+        torch.save(weights, tmp_name)
+        os.replace(tmp_name, weights_name)
+        if self.keep_last is not None:
+            self.__remove_old_weights(run)
 
-        torch.save(weights, weights_name)
+    def __remove_old_weights(self, run: Run):
+        """Remove all stored iterations except the latest ``keep_last`` ones,
+        the best ones and the protected ones."""
+        from dacapo.store.create_store import create_stats_store
+
+        try:
+            scores = create_stats_store().retrieve_validation_iteration_scores(
+                run.name
+            )
+            best = run.validation_scores.subscores(scores).best_iterations()
+        except Exception as e:
+            logger.warning(
+                f"Could not determine the best iterations of run {run}, "
+                f"keeping all weights: {e!r}"
+            )
+            return
+
+        weights_dir = self.__get_weights_dir(run)
+        iterations = self.__stored_iterations(weights_dir / "iterations")
+        keep = set(iterations[-self.keep_last :]) | best
+        with self._protected_lock:
+            keep |= self._protected.get(run.name, set())
+        for best_json in weights_dir.glob("*/*.json"):
+            with best_json.open("r") as f:
+                keep.add(json.load(f)["iteration"])
+        for iteration in iterations:
+            if iteration not in keep:
+                logger.info(f"Removing weights for run {run}, iteration {iteration}")
+                (weights_dir / "iterations" / str(iteration)).unlink(missing_ok=True)
+
+    @staticmethod
+    def __stored_iterations(weights_dir: Path) -> List[int]:
+        # skip temporary files of weights that are still being written
+        return sorted(
+            [int(path.name) for path in weights_dir.glob("*") if path.name.isdigit()]
+        )
 
     def retrieve_weights(self, run: str, iteration: int) -> Weights:
         """Retrieve the network weights of the given run."""
@@ -131,3 +247,14 @@ class LocalWeightsStore(WeightsStore):
         run = run if isinstance(run, str) else run.name
 
         return Path(self.basedir, run, "checkpoints")
+
+
+def _to_cpu(state: Any) -> Any:
+    """Recursively copy all tensors in a state dict to cpu memory."""
+    if torch.is_tensor(state):
+        return state.detach().to("cpu", copy=True)
+    elif isinstance(state, dict):
+        return type(state)((key, _to_cpu(value)) for key, value in state.items())
+    elif isinstance(state, (list, tuple)):
+        return type(state)(_to_cpu(value) for value in state)
+    return state
@@ -23,6 +23,10 @@ class StatsStore(ABC):
         """Retrieve the training stats for a given run."""
         pass
 
+    def trained_until(self, run_name: str) -> int:
+        """The number of iterations a run has stored training stats for."""
+        return self.retrieve_training_stats(run_name).trained_until()
+
     @abstractmethod
     def store_validation_iteration_scores(
         self, run_name: str, validation_scores: "ValidationScores"
@@ -3,17 +3,19 @@ from dacapo.experiments.run import Run
 import torch
 
 from abc import ABC, abstractmethod
-from typing import Optional
+from typing import Any, Dict, Optional
 from collections import OrderedDict
 
 
 class Weights:
     optimizer: OrderedDict[str, torch.Tensor]
     model: OrderedDict[str, torch.Tensor]
+    scaler: Optional[Dict[str, Any]]
 
-    def __init__(self, model_state_dict, optimizer_state_dict):
+    def __init__(self, model_state_dict, optimizer_state_dict, scaler_state_dict=None):
         self.model = model_state_dict
         self.optimizer = optimizer_state_dict
+        self.scaler = scaler_state_dict
 
 
 class WeightsStore(ABC):
@@ -26,6 +28,10 @@ class WeightsStore(ABC):
         weights = self.retrieve_weights(run.name, iteration)
         run.model.load_state_dict(weights.model)
         run.optimizer.load_state_dict(weights.optimizer)
+        # weights stored before mixed precision training have no scaler state
+        scaler_state = getattr(weights, "scaler", None)
+        if scaler_state and hasattr(run.trainer, "load_scaler_state"):
+            run.trainer.load_scaler_state(scaler_state)
 
     def load_best(self, run: Run, dataset: str, criterion: str) -> None:
         """
@@ -45,6 +51,19 @@ class WeightsStore(ABC):
         """Store the network weights of the given run."""
         pass
 
+    def flush(self) -> None:
+        """Wait until all weights passed to ``store_weights`` are stored."""
+        pass
+
+    def protect(self, run: str, iteration: int) -> None:
+        """Keep the weights of this iteration (e.g. while its validation is
+        pending) until ``release`` is called."""
+        pass
+
+    def release(self, run: str, iteration: int) -> None:
+        """Undo ``protect``."""
+        pass
+
     @abstractmethod
     def retrieve_weights(self, run: str, iteration: int) -> Weights:
         """Retrieve the network weights of the given run."""
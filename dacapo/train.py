@@ -6,11 +6,11 @@ from dacapo.store.create_store import (
     create_weights_store,
 )
 from dacapo.experiments import Run
-from dacapo.validate import validate_run
+from dacapo.validation_queue import ValidationQueue
+from dacapo import Options
 
 import torch
 from tqdm import tqdm
-import threading
 
 import logging
 
@@ -86,15 +86,15 @@ def train_run(run: Run):
             trained_until = latest_weights_iteration
             run.training_stats.delete_after(trained_until)
             run.validation_scores.delete_after(trained_until)
-            weights_store.retrieve_weights(run, iteration=trained_until)
+            weights_store.load_weights(run, iteration=trained_until)
 
         elif latest_weights_iteration == trained_until:
             print(f"Resuming training from iteration {trained_until}")
 
-            weights_store.retrieve_weights(run, iteration=trained_until)
+            weights_store.load_weights(run, iteration=trained_until)
 
         elif latest_weights_iteration > trained_until:
-            weights_store.retrieve_weights(run, iteration=latest_weights_iteration)
+            weights_store.load_weights(run, iteration=latest_weights_iteration)
             logger.error(
                 f"Found weights for iteration {latest_weights_iteration}, but "
                 f"run {run.name} was only trained until {trained_until}. "
@@ -113,6 +113,9 @@ def train_run(run: Run):
     run.model = run.model.to(compute_context.device)
     run.move_optimizer(compute_context.device)
 
+    for dataset in run.datasplit.train:
+        dataset.preload()
+
     array_store = create_array_store()
     run.trainer.iteration = trained_until
     run.trainer.build_batch_provider(
@@ -122,72 +125,73 @@ def train_run(run: Run):
         array_store.snapshot_container(run.name),
     )
 
-    with run.trainer as trainer:
-        while trained_until < run.train_until:
-            # train for at most 100 iterations at a time, then store training stats
-            iterations = min(100, run.train_until - trained_until)
-            iteration_stats = None
-            bar = tqdm(
-                trainer.iterate(
-                    iterations,
-                    run.model,
-                    run.optimizer,
-                    compute_context.device,
-                ),
-                desc=f"training until {iterations + trained_until}",
-                total=run.train_until,
-                initial=trained_until,
-            )
-            for iteration_stats in bar:
-                run.training_stats.add_iteration_stats(iteration_stats)
-                bar.set_postfix({"loss": iteration_stats.loss})
-
-                if (iteration_stats.iteration + 1) % run.validation_interval == 0:
-                    break
-
-            trained_until = run.training_stats.trained_until()
-
-            # If this is not a validation iteration or final iteration, skip validation
-            # also skip for test cases where total iterations is less than validation interval
-            no_its = iteration_stats is None  # No training steps run
-            validation_it = (
-                iteration_stats.iteration + 1
-            ) % run.validation_interval == 0
-            final_it = trained_until >= run.train_until
-            if final_it and (trained_until < run.validation_interval):
-                # Special case for tests - skip validation, but store weights
-                stats_store.store_training_stats(run.name, run.training_stats)
-                weights_store.store_weights(run, iteration_stats.iteration + 1)
-                continue
+    options = Options.instance()
+    with ValidationQueue(
+        run.name,
+        policy=options.validation_policy,
+        cuda_devices=options.validation_cuda_devices,
+        weights_store=weights_store,
+        weights_timeout=options.validation_weights_timeout,
+    ) as validation_queue:
+        with run.trainer as trainer:
+            while trained_until < run.train_until:
+                if validation_queue.poll():
+                    # read back the scores written by the validation worker
+                    run.validation_scores.scores = (
+                        stats_store.retrieve_validation_iteration_scores(run.name)
+                    )
+
+                # train for at most 100 iterations at a time, then store training stats
+                iterations = min(100, run.train_until - trained_until)
+                iteration_stats = None
+                bar = tqdm(
+                    trainer.iterate(
+                        iterations,
+                        run.model,
+                        run.optimizer,
+                        compute_context.device,
+                    ),
+                    desc=f"training until {iterations + trained_until}",
+                    total=run.train_until,
+                    initial=trained_until,
+                )
+                for iteration_stats in bar:
+                    run.training_stats.add_iteration_stats(iteration_stats)
+                    bar.set_postfix({"loss": iteration_stats.loss})
+
+                    if (iteration_stats.iteration + 1) % run.validation_interval == 0:
+                        break
+
+                trained_until = run.training_stats.trained_until()
+
+                # If this is not a validation iteration or final iteration, skip validation
+                # also skip for test cases where total iterations is less than validation interval
+                no_its = iteration_stats is None  # No training steps run
+                validation_it = (
+                    iteration_stats.iteration + 1
+                ) % run.validation_interval == 0
+                final_it = trained_until >= run.train_until
+                if final_it and (trained_until < run.validation_interval):
+                    # Special case for tests - skip validation, but store weights
+                    stats_store.store_training_stats(run.name, run.training_stats)
+                    weights_store.store_weights(run, iteration_stats.iteration + 1)
+                    continue
+
+                if no_its or (not validation_it and not final_it):
+                    stats_store.store_training_stats(run.name, run.training_stats)
+                    continue
 
-            if no_its or (not validation_it and not final_it):
                 stats_store.store_training_stats(run.name, run.training_stats)
-                continue
-
-            stats_store.store_training_stats(run.name, run.training_stats)
-            weights_store.store_weights(run, iteration_stats.iteration + 1)
-            try:
-                # launch validation in a separate thread to avoid blocking training
-                validate_thread = threading.Thread(
-                    target=validate_run,
-                    args=(run, iteration_stats.iteration + 1),
-                    name=f"validate_{run.name}_{iteration_stats.iteration + 1}",
-                    daemon=True,
-                )
-                validate_thread.start()
-                # validate_run(
-                #     run,
-                #     iteration_stats.iteration + 1,
-                # )
-
-                stats_store.store_validation_iteration_scores(
-                    run.name, run.validation_scores
-                )
-            except Exception as e:
-                logger.error(
-                    f"Validation failed for run {run.name} at iteration "
-                    f"{iteration_stats.iteration + 1}.",
-                    exc_info=e,
-                )
+                weights_store.store_weights(run, iteration_stats.iteration + 1)
+                # validate in a separate process from the stored weights, so
+                # that training is not blocked
+                validation_queue.submit(iteration_stats.iteration + 1)
+
+        weights_store.flush()
+        print(f"Trained until {trained_until}. Waiting for validation to finish...")
+        if validation_queue.close():
+            run.validation_scores.scores = (
+                stats_store.retrieve_validation_iteration_scores(run.name)
+            )
 
     print(f"Trained until {trained_until}. Finished.")
@@ -1,100 +1,137 @@
 from funlib.geometry import Coordinate
 
 import numpy as np
+import torch
 
 import logging
-from typing import List
+from typing import List, Optional, Sequence, Tuple, Union
 
 logger = logging.getLogger(__name__)
 
 
-def seg_to_affgraph(seg: np.ndarray, neighborhood: List[Coordinate]) -> np.ndarray:
-    nhood: np.ndarray = np.array(neighborhood)
+def _edge_slices(
+    offset: Sequence[int], shape: Sequence[int]
+) -> Optional[Tuple[Tuple[slice, ...], Tuple[slice, ...]]]:
+    """The slices of the voxels that have a neighbor at ``offset`` within
+    ``shape``, and the slices of these neighbors. ``None`` if no voxel has a
+    neighbor at ``offset``."""
+    if any(abs(o) >= s for o, s in zip(offset, shape)):
+        return None
+    voxels = tuple(slice(max(0, -o), min(s, s - o)) for o, s in zip(offset, shape))
+    neighbors = tuple(slice(max(0, o), min(s, s + o)) for o, s in zip(offset, shape))
+    return voxels, neighbors
 
-    # constructs an affinity graph from a segmentation
-    # assume affinity graph is represented as:
-    # shape = (e, z, y, x)
-    # nhood.shape = (edges, 3)
-    shape = seg.shape
-    nEdge = nhood.shape[0]
-    dims = nhood.shape[1]
-    aff = np.zeros((nEdge,) + shape, dtype=np.int32)
-
-    if dims == 2:
-        for e in range(nEdge):
-            aff[
-                e,
-                max(0, -nhood[e, 0]) : min(shape[0], shape[0] - nhood[e, 0]),
-                max(0, -nhood[e, 1]) : min(shape[1], shape[1] - nhood[e, 1]),
-            ] = (
-                (
-                    seg[
-                        max(0, -nhood[e, 0]) : min(shape[0], shape[0] - nhood[e, 0]),
-                        max(0, -nhood[e, 1]) : min(shape[1], shape[1] - nhood[e, 1]),
-                    ]
-                    == seg[
-                        max(0, nhood[e, 0]) : min(shape[0], shape[0] + nhood[e, 0]),
-                        max(0, nhood[e, 1]) : min(shape[1], shape[1] + nhood[e, 1]),
-                    ]
-                )
-                * (
-                    seg[
-                        max(0, -nhood[e, 0]) : min(shape[0], shape[0] - nhood[e, 0]),
-                        max(0, -nhood[e, 1]) : min(shape[1], shape[1] - nhood[e, 1]),
-                    ]
-                    > 0
-                )
-                * (
-                    seg[
-                        max(0, nhood[e, 0]) : min(shape[0], shape[0] + nhood[e, 0]),
-                        max(0, nhood[e, 1]) : min(shape[1], shape[1] + nhood[e, 1]),
-                    ]
-                    > 0
-                )
-            )
 
-    elif dims == 3:
-        for e in range(nEdge):
-            aff[
-                e,
-                max(0, -nhood[e, 0]) : min(shape[0], shape[0] - nhood[e, 0]),
-                max(0, -nhood[e, 1]) : min(shape[1], shape[1] - nhood[e, 1]),
-                max(0, -nhood[e, 2]) : min(shape[2], shape[2] - nhood[e, 2]),
-            ] = (
-                (
-                    seg[
-                        max(0, -nhood[e, 0]) : min(shape[0], shape[0] - nhood[e, 0]),
-                        max(0, -nhood[e, 1]) : min(shape[1], shape[1] - nhood[e, 1]),
-                        max(0, -nhood[e, 2]) : min(shape[2], shape[2] - nhood[e, 2]),
-                    ]
-                    == seg[
-                        max(0, nhood[e, 0]) : min(shape[0], shape[0] + nhood[e, 0]),
-                        max(0, nhood[e, 1]) : min(shape[1], shape[1] + nhood[e, 1]),
-                        max(0, nhood[e, 2]) : min(shape[2], shape[2] + nhood[e, 2]),
-                    ]
-                )
-                * (
-                    seg[
-                        max(0, -nhood[e, 0]) : min(shape[0], shape[0] - nhood[e, 0]),
-                        max(0, -nhood[e, 1]) : min(shape[1], shape[1] - nhood[e, 1]),
-                        max(0, -nhood[e, 2]) : min(shape[2], shape[2] - nhood[e, 2]),
-                    ]
-                    > 0
-                )
-                * (
-                    seg[
-                        max(0, nhood[e, 0]) : min(shape[0], shape[0] + nhood[e, 0]),
-                        max(0, nhood[e, 1]) : min(shape[1], shape[1] + nhood[e, 1]),
-                        max(0, nhood[e, 2]) : min(shape[2], shape[2] + nhood[e, 2]),
-                    ]
-                    > 0
-                )
+def _check_neighborhood(neighborhood, dims: int) -> List[Tuple[int, ...]]:
+    offsets = [tuple(int(o) for o in offset) for offset in neighborhood]
+    for offset in offsets:
+        if len(offset) != dims:
+            raise RuntimeError(
+                f"Cannot compute affinities with offset {offset} on a "
+                f"segmentation with {dims} dimensions"
             )
+    return offsets
+
+
+def seg_to_affgraph(
+    seg: Union[np.ndarray, torch.Tensor],
+    neighborhood: List[Coordinate],
+    dtype=np.int32,
+    out: Optional[Union[np.ndarray, torch.Tensor]] = None,
+) -> Union[np.ndarray, torch.Tensor]:
+    """Compute the affinity graph of a segmentation.
+
+    The affinity of a voxel ``v`` for an offset ``o`` is 1 if ``v`` and
+    ``v + o`` have the same, non-zero label, and 0 otherwise (including if
+    ``v + o`` is outside of ``seg``). Works on segmentations with any number
+    of dimensions, and on torch tensors (on any device) as well as numpy
+    arrays.
+
+    Args:
+        seg: The segmentation, without a channel dimension.
+        neighborhood: The offsets to compute affinities for, with one entry
+            per dimension of ``seg``.
+        dtype: The dtype of the affinities (numpy or torch dtype), e.g.
+            ``np.uint8``, ``bool`` or ``np.float32``. Ignored if ``out`` is
+            given.
+        out: Optional array (or tensor) of shape
+            ``(len(neighborhood),) + seg.shape`` to write the affinities
+            into, e.g. a slice of a larger target array.
+
+    Returns:
+        The affinities, of shape ``(len(neighborhood),) + seg.shape``.
+    """
+    offsets = _check_neighborhood(neighborhood, seg.ndim)
+    if isinstance(seg, torch.Tensor):
+        return _seg_to_affgraph_torch(seg, offsets, dtype, out)
+
+    shape = seg.shape
+    if out is None:
+        out = np.zeros((len(offsets),) + shape, dtype=dtype)
+    else:
+        assert out.shape == (len(offsets),) + shape, (
+            f"Cannot write affinities of shape {(len(offsets),) + shape} "
+            f"into array of shape {out.shape}"
+        )
+        out[...] = 0
+
+    foreground = seg > 0
+    # booleans and bytes are written directly, other dtypes through a
+    # boolean scratch buffer shared by all offsets
+    direct = out.dtype.itemsize == 1 and out.dtype.kind in "bui"
+    edges = out.view(bool) if direct else None
+    scratch = None if direct else np.empty(shape, dtype=bool)
+
+    for e, offset in enumerate(offsets):
+        slices = _edge_slices(offset, shape)
+        if slices is None:
+            continue
+        voxels, neighbors = slices
+        edge = edges[e][voxels] if direct else scratch[voxels]
+        # equal labels and a foreground voxel imply a foreground neighbor
+        np.equal(seg[voxels], seg[neighbors], out=edge)
+        np.logical_and(edge, foreground[voxels], out=edge)
+        if not direct:
+            out[e][voxels] = edge
+
+    return out
 
+
+def _torch_dtype(dtype) -> torch.dtype:
+    if isinstance(dtype, torch.dtype):
+        return dtype
+    return torch.from_numpy(np.empty(0, dtype=dtype)).dtype
+
+
+def _seg_to_affgraph_torch(
+    seg: torch.Tensor,
+    offsets: List[Tuple[int, ...]],
+    dtype,
+    out: Optional[torch.Tensor],
+) -> torch.Tensor:
+    shape = tuple(seg.shape)
+    if out is None:
+        out = torch.zeros(
+            (len(offsets),) + shape, dtype=_torch_dtype(dtype), device=seg.device
+        )
     else:
-        raise RuntimeError(f"AddAffinities works only in 2 or 3 dimensions, not {dims}")
+        assert tuple(out.shape) == (len(offsets),) + shape, (
+            f"Cannot write affinities of shape {(len(offsets),) + shape} "
+            f"into tensor of shape {tuple(out.shape)}"
+        )
+        out.zero_()
+
+    foreground = seg > 0
+    for e, offset in enumerate(offsets):
+        slices = _edge_slices(offset, shape)
+        if slices is None:
+            continue
+        voxels, neighbors = slices
+        edge = torch.eq(seg[voxels], seg[neighbors])
+        edge &= foreground[voxels]
+        out[e][voxels] = edge
 
-    return aff
+    return out
 
 
 def padding(neighborhood, voxel_size):
@@ -1,7 +1,56 @@
 import numpy as np
+import torch
 
 import itertools
-from typing import Optional, List, Dict, Tuple
+from typing import List, Optional, Tuple
+
+
+def _slab_shape(shape: Tuple[int, ...], slab) -> Tuple[int, ...]:
+    if slab is None:
+        return tuple(shape)
+    # slab with -1 replaced by shape
+    return tuple(m if s == -1 else s for m, s in zip(shape, slab))
+
+
+def _update_moving_counts(
+    class_counts: np.ndarray,
+    masked_in: np.ndarray,
+    num_classes: int,
+    moving_counts: Optional[np.ndarray],
+    clipmin: Optional[float],
+    clipmax: Optional[float],
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Update the moving class counts with the class counts and number of
+    masked-in voxels of every slab, and compute the class weights per slab.
+
+    ``moving_counts`` has shape ``(slabs, num_classes, 2)``, with the
+    number of voxels of each class and the number of masked-in voxels seen
+    so far. Counts of new slabs start at ``(0, 1)``.
+    """
+    num_slabs = len(class_counts)
+    if moving_counts is None:
+        moving_counts = np.zeros((0, num_classes, 2), dtype=np.float64)
+    moving_counts = np.array(moving_counts, dtype=np.float64)
+    if len(moving_counts) < num_slabs:
+        new_counts = np.zeros(
+            (num_slabs - len(moving_counts), num_classes, 2), dtype=np.float64
+        )
+        new_counts[..., 1] = 1
+        moving_counts = np.concatenate([moving_counts, new_counts])
+
+    slab_counts = moving_counts[:num_slabs]
+    slab_counts[..., 1] += np.asarray(masked_in, dtype=np.float64)[:, None]
+    slab_counts[..., 0] += class_counts
+
+    # only classes present in the masked-in area of a slab are weighted
+    present = class_counts > 0
+    fracs = slab_counts[..., 0] / slab_counts[..., 1]
+    if clipmin is not None or clipmax is not None:
+        np.clip(fracs, clipmin, clipmax, fracs)
+    class_weights = np.zeros(fracs.shape, dtype=np.float32)
+    np.divide(1.0 / float(num_classes), fracs, out=class_weights, where=present)
+
+    return class_weights, moving_counts
 
 
 def balance_weights(
@@ -11,70 +60,153 @@ def balance_weights(
     slab=None,
     clipmin: float = 0.05,
     clipmax: float = 0.95,
-    moving_counts: Optional[List[Dict[int, Tuple[int, int]]]] = None,
-):
-    if moving_counts is None:
-        moving_counts = []
-    unique_labels = np.unique(label_data)
-    assert (
-        len(unique_labels) <= num_classes
-    ), f"Found unique labels {unique_labels} but expected only {num_classes}."
-    assert (
-        0 <= np.min(label_data) < num_classes
-    ), f"Labels {unique_labels} are not in [0, {num_classes})."
+    moving_counts: Optional[np.ndarray] = None,
+    out: Optional[np.ndarray] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Weight every masked-in voxel inversely proportional to the (moving
+    average) frequency of its class.
+
+    Args:
+        label_data: The class of every voxel, in ``[0, num_classes)``.
+        num_classes: The number of classes.
+        masks: Masks (broadcastable to ``label_data``) that are multiplied
+            into the weights.
+        slab: The shape of the slabs that are balanced independently, with
+            -1 for the full extent of an axis. Defaults to one slab.
+        clipmin, clipmax: The range to clip class frequencies to.
+        moving_counts: The moving class counts of every slab, as returned
+            by a previous call.
+        out: Optional float32 array of the shape of ``label_data`` to write
+            the weights into.
+
+    Returns:
+        The weights and the updated moving counts.
+    """
+    min_label = np.min(label_data)
+    max_label = np.max(label_data)
     assert (
-        0 <= np.max(label_data) < num_classes
-    ), f"Labels {unique_labels} are not in [0, {num_classes})."
+        0 <= min_label and max_label < num_classes
+    ), f"Labels in [{min_label}, {max_label}] are not in [0, {num_classes})."
+    if label_data.dtype == np.uint64:
+        # indexing with uint64 is not supported, labels are small
+        label_data = label_data.view(np.int64)
 
-    # initialize error scale with 1s
-    error_scale = np.ones(label_data.shape, dtype=np.float32)
+    # initialize error scale with 1s, set to 0 in masked-out areas
+    if out is None:
+        out = np.empty(label_data.shape, dtype=np.float32)
+    assert out.shape == label_data.shape, (
+        f"Cannot write weights of shape {label_data.shape} into array of "
+        f"shape {out.shape}"
+    )
+    error_scale = out
+    if len(masks) == 0:
+        error_scale[...] = 1
+    else:
+        np.copyto(error_scale, masks[0], casting="unsafe")
+        for mask in masks[1:]:
+            np.multiply(error_scale, mask, out=error_scale, casting="unsafe")
 
-    # set error_scale to 0 in masked-out areas
-    for mask in masks:
-        error_scale = error_scale * mask
+    slab = _slab_shape(error_scale.shape, slab)
+    slab_grid = tuple(-(-m // s) for m, s in zip(error_scale.shape, slab))
+    num_slabs = int(np.prod(slab_grid))
+    masked = error_scale != 0
 
-    if slab is None:
-        slab = error_scale.shape
+    if num_slabs == 1:
+        class_counts = np.bincount(label_data[masked], minlength=num_classes)[None]
+        masked_in = np.array([error_scale.sum(dtype=np.float64)])
+        index = label_data
     else:
-        # slab with -1 replaced by shape
-        slab = tuple(m if s == -1 else s for m, s in zip(error_scale.shape, slab))
+        # the index of the slab of every voxel, times num_classes
+        slab_index = np.zeros((1,) * error_scale.ndim, dtype=np.intp)
+        stride = num_classes
+        for d in reversed(range(error_scale.ndim)):
+            axis_index = (np.arange(error_scale.shape[d]) // slab[d]) * stride
+            slab_index = slab_index + axis_index.reshape(
+                (-1,) + (1,) * (error_scale.ndim - d - 1)
+            )
+            stride *= slab_grid[d]
+        # combined index of slab and class of every voxel
+        index = slab_index + label_data
+        class_counts = np.bincount(
+            index[masked], minlength=num_slabs * num_classes
+        ).reshape(num_slabs, num_classes)
+        masked_in = (
+            np.bincount(
+                index.ravel(),
+                weights=error_scale.ravel(),
+                minlength=num_slabs * num_classes,
+            )
+            .reshape(num_slabs, num_classes)
+            .sum(axis=1)
+        )
+
+    class_weights, moving_counts = _update_moving_counts(
+        class_counts, masked_in, num_classes, moving_counts, clipmin, clipmax
+    )
+
+    # scale the masked-in error scale with the class weights
+    error_scale *= np.take(class_weights.ravel(), index)
+
+    return error_scale, moving_counts
+
+
+def balance_weights_torch(
+    label_data: torch.Tensor,
+    num_classes: int,
+    masks: List[torch.Tensor] = list(),
+    slab=None,
+    clipmin: float = 0.05,
+    clipmax: float = 0.95,
+    moving_counts: Optional[np.ndarray] = None,
+):
+    """Same as ``balance_weights``, for tensors on any device.
+
+    The class counts of all slabs are computed on the device and transferred
+    to the host at once to update ``moving_counts``, the resulting class
+    weights are transferred back at once and applied on the device.
+    """
+    # initialize error scale with 1s, set to 0 in masked-out areas
+    error_scale = torch.ones(
+        label_data.shape, dtype=torch.float32, device=label_data.device
+    )
+    for mask in masks:
+        error_scale = error_scale * mask
 
+    slab = _slab_shape(tuple(error_scale.shape), slab)
     slab_ranges = (range(0, m, s) for m, s in zip(error_scale.shape, slab))
+    all_slices = [
+        tuple(slice(start[d], start[d] + slab[d]) for d in range(len(slab)))
+        for start in itertools.product(*slab_ranges)
+    ]
 
-    for ind, start in enumerate(itertools.product(*slab_ranges)):
-        if ind + 1 > len(moving_counts):
-            moving_counts.append(dict([(i, (0, 1)) for i in range(num_classes)]))
-        slab_counts = moving_counts[ind]
-        slices = tuple(slice(start[d], start[d] + slab[d]) for d in range(len(slab)))
-        # operate on slab independently
+    # labels >= num_classes are counted in an extra bin
+    labels = label_data.long().clamp(max=num_classes)
+    slab_stats = []
+    for slices in all_slices:
         scale_slab = error_scale[slices]
-        labels_slab = label_data[slices]
-        # in the masked-in area, compute the fraction of per-class samples
-        masked_in = scale_slab.sum()
-        classes, counts = np.unique(
-            labels_slab[np.nonzero(scale_slab)], return_counts=True
+        counts = torch.bincount(
+            labels[slices][scale_slab != 0], minlength=num_classes + 1
         )
-        updated_fracs = []
-        for key, (num, den) in slab_counts.items():
-            slab_counts[key] = (num, den + masked_in)
-        for class_id, num in zip(classes, counts):
-            # update moving fraction rate to account for present instances
-            (old_num, den) = slab_counts[class_id]
-            slab_counts[class_id] = (num + old_num, den)
-            updated_fracs.append(slab_counts[class_id][0] / slab_counts[class_id][1])
-        fracs = np.array(updated_fracs)
-        if clipmin is not None or clipmax is not None:
-            np.clip(fracs, clipmin, clipmax, fracs)
-
-        # compute the class weights
-        total_frac = 1.0
-        w_sparse = total_frac / float(num_classes) / fracs
-        w = np.zeros(num_classes)
-        w[classes] = w_sparse
-
-        # if labels_slab are uint64 take gets very upset
-        labels_slab = labels_slab.astype(np.int64)
-        # scale_slab the masked-in scale_slab with the class weights
-        scale_slab *= np.take(w, labels_slab)
+        masked_in = scale_slab.sum()[None]
+        slab_stats.append(torch.cat([masked_in.double(), counts.double()]))
+    slab_stats = torch.stack(slab_stats).cpu().numpy()
+
+    assert (
+        slab_stats[:, -1] == 0
+    ).all(), f"Found labels larger than {num_classes - 1}."
+
+    class_weights, moving_counts = _update_moving_counts(
+        slab_stats[:, 1:-1],
+        slab_stats[:, 0],
+        num_classes,
+        moving_counts,
+        clipmin,
+        clipmax,
+    )
+
+    class_weights = torch.from_numpy(class_weights).to(error_scale.device)
+    for ind, slices in enumerate(all_slices):
+        # scale the masked-in error scale with the class weights
+        error_scale[slices] *= class_weights[ind][labels[slices]]
 
     return error_scale, moving_counts
@@ -0,0 +1,294 @@
+from scipy.ndimage import find_objects, gaussian_filter
+import numpy as np
+import torch
+
+from concurrent.futures import ThreadPoolExecutor
+import itertools
+import logging
+from typing import Callable, List, Optional, Sequence, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# the gaussian is truncated at 3 sigma, as in ``lsd.train.LsdExtractor``
+TRUNCATE = 3.0
+
+
+def num_descriptors(dims: int) -> int:
+    """The number of local shape descriptors of a ``dims``-dimensional
+    segmentation: mean offsets, variances, pearson coefficients and size."""
+    if dims not in (2, 3):
+        raise ValueError(f"Cannot compute lsds on volumes with {dims} dimensions")
+    return 2 * dims + len(list(itertools.combinations(range(dims), 2))) + 1
+
+
+def _label_descriptors(
+    mask, coords: Sequence, sigma: Sequence[float], aggregate: Callable
+) -> List:
+    """The local shape descriptors of one object, normalized to ``[0, 1]``
+    (apart from the final clipping), as a list of channels.
+
+    Works on numpy arrays as well as on torch tensors. ``mask`` is the float
+    mask of the object, ``coords`` are the world coordinates along each axis
+    (broadcastable to the shape of ``mask``) and ``aggregate`` computes the
+    gaussian weighted sum around every voxel. The coordinates are relative
+    to the whole segmentation: voxels whose object is not sampled within
+    their neighborhood (only possible when downsampling) get descriptors
+    that depend on them, as in ``lsd.train.LsdExtractor``.
+    """
+    dims = len(coords)
+    count = aggregate(mask)
+    # avoid division by zero
+    count[count == 0] = 1
+    masked_coords = [mask * c for c in coords]
+    mean = [aggregate(m) / count for m in masked_coords]
+
+    # normalize mean offsets from [-sigma, sigma] to [0, 1]
+    mean_offsets = [(mean[d] - coords[d]) / sigma[d] * 0.5 + 0.5 for d in range(dims)]
+    variances = [
+        (aggregate(masked_coords[d] * coords[d]) / count - mean[d] ** 2).clip(min=1e-3)
+        for d in range(dims)
+    ]
+    pearsons = [
+        (aggregate(masked_coords[i] * coords[j]) / count - mean[i] * mean[j])
+        / (variances[i] * variances[j]) ** 0.5
+        * 0.5
+        + 0.5
+        for i, j in itertools.combinations(range(dims), 2)
+    ]
+    variances = [v / s**2 for v, s in zip(variances, sigma)]
+    return mean_offsets + variances + pearsons + [count]
+
+
+def _object_regions(
+    segmentation: np.ndarray, downsample: int
+) -> List[Tuple[int, Tuple[slice, ...]]]:
+    """The foreground labels of ``segmentation`` with their bounding boxes,
+    grown to multiples of ``downsample``, largest first."""
+    labels, relabeled = np.unique(segmentation, return_inverse=True)
+    objects = find_objects(relabeled.reshape(segmentation.shape) + 1)
+    regions = [
+        (
+            label,
+            tuple(
+                slice(
+                    s.start // downsample * downsample,
+                    -(-s.stop // downsample) * downsample,
+                )
+                for s in bounding_box
+            ),
+        )
+        for label, bounding_box in zip(labels, objects)
+        if label != 0 and bounding_box is not None
+    ]
+    return sorted(
+        regions, key=lambda region: -np.prod([s.stop - s.start for s in region[1]])
+    )
+
+
+def _check_downsample(shape: Sequence[int], downsample: int):
+    if any(s % downsample != 0 for s in shape):
+        raise ValueError(
+            f"Segmentation shape {tuple(shape)} is not a multiple of the "
+            f"downsampling factor {downsample}"
+        )
+
+
+def local_shape_descriptors(
+    segmentation: Union[np.ndarray, torch.Tensor],
+    sigma: Sequence[float],
+    voxel_size: Sequence[int],
+    downsample: int = 1,
+    num_workers: int = 1,
+    out: Optional[Union[np.ndarray, torch.Tensor]] = None,
+) -> Union[np.ndarray, torch.Tensor]:
+    """Compute the local shape descriptors of a 2D or 3D segmentation.
+
+    The descriptors are the same as the ones of ``lsd.train.LsdExtractor``
+    (in ``gaussian`` mode, with all components): the offset to the mean,
+    the variances and pearson coefficients of the coordinates and the size
+    of the part of the object within a gaussian neighborhood of every
+    voxel, normalized to ``[0, 1]``. Background voxels are 0.
+
+    Instead of filtering the whole volume for every object, the descriptors
+    of an object are computed within its bounding box only (the object mask
+    is 0 outside of it, so this does not change the result). The objects
+    are processed by ``num_workers`` threads, which write into disjoint
+    voxels of the output.
+
+    Works on numpy arrays and on torch tensors (on any device). Tensors are
+    filtered with separable convolutions, objects are processed
+    sequentially (``num_workers`` is ignored), since every convolution is
+    already parallelized by torch.
+
+    Args:
+        segmentation: The label array, without channel dimension.
+        sigma: The standard deviation of the gaussian, in world units.
+        voxel_size: The voxel size of ``segmentation``.
+        downsample: Compute the descriptors on a grid downsampled by this
+            factor and upsample them to the resolution of ``segmentation``.
+            The shape of ``segmentation`` has to be a multiple of it.
+        num_workers: The number of threads to process objects of numpy
+            arrays with.
+        out: Optional output of shape ``(channels,) + segmentation.shape``.
+    """
+    dims = segmentation.ndim
+    channels = num_descriptors(dims)
+    _check_downsample(segmentation.shape, downsample)
+    if out is not None:
+        assert tuple(out.shape) == (channels,) + tuple(segmentation.shape), (
+            f"Cannot write lsds of shape {(channels,) + tuple(segmentation.shape)} "
+            f"into array of shape {tuple(out.shape)}"
+        )
+    sigma = tuple(float(s) for s in sigma[:dims])
+    sub_voxel_size = tuple(v * downsample for v in voxel_size)
+    sigma_voxel = tuple(s / v for s, v in zip(sigma, sub_voxel_size))
+
+    if isinstance(segmentation, torch.Tensor):
+        return _local_shape_descriptors_torch(
+            segmentation, sigma, sub_voxel_size, sigma_voxel, downsample, out
+        )
+
+    if out is None:
+        out = np.zeros((channels,) + segmentation.shape, dtype=np.float32)
+    else:
+        out[:] = 0
+
+    def aggregate(array):
+        return gaussian_filter(
+            array, sigma=sigma_voxel, mode="constant", cval=0.0, truncate=TRUNCATE
+        )
+
+    def compute(label_region):
+        label, region = label_region
+        mask = segmentation[region] == label
+        sub_mask = mask[(slice(None, None, downsample),) * dims].astype(np.float32)
+        coords = [
+            (
+                np.arange(r.start // downsample, r.stop // downsample, dtype=np.float32)
+                * v
+            ).reshape((-1,) + (1,) * (dims - d - 1))
+            for d, (r, v) in enumerate(zip(region, sub_voxel_size))
+        ]
+        descriptors = np.stack(_label_descriptors(sub_mask, coords, sigma, aggregate))
+        np.clip(descriptors, 0.0, 1.0, out=descriptors)
+        if downsample > 1:
+            # nearest neighbor upsampling
+            descriptors = np.broadcast_to(
+                descriptors.reshape(
+                    (channels,) + sum(((n, 1) for n in sub_mask.shape), ())
+                ),
+                (channels,) + sum(((n, downsample) for n in sub_mask.shape), ()),
+            ).reshape((channels,) + mask.shape)
+        np.copyto(out[(slice(None),) + region], descriptors, where=mask)
+
+    regions = _object_regions(segmentation, downsample)
+    if num_workers > 1 and len(regions) > 1:
+        with ThreadPoolExecutor(min(num_workers, len(regions))) as pool:
+            list(pool.map(compute, regions))
+    else:
+        for label_region in regions:
+            compute(label_region)
+    return out
+
+
+def _gaussian_kernel(sigma: float) -> np.ndarray:
+    """The normalized, truncated gaussian kernel used by
+    ``scipy.ndimage.gaussian_filter``."""
+    radius = int(TRUNCATE * sigma + 0.5)
+    x = np.arange(-radius, radius + 1)
+    kernel = np.exp(-0.5 / sigma**2 * x**2)
+    return (kernel / kernel.sum()).astype(np.float32)
+
+
+def _local_shape_descriptors_torch(
+    segmentation: torch.Tensor,
+    sigma: Tuple[float, ...],
+    sub_voxel_size: Tuple[int, ...],
+    sigma_voxel: Tuple[float, ...],
+    downsample: int,
+    out: Optional[torch.Tensor],
+) -> torch.Tensor:
+    dims = segmentation.ndim
+    channels = num_descriptors(dims)
+    device = segmentation.device
+    if out is None:
+        out = torch.zeros(
+            (channels,) + tuple(segmentation.shape), dtype=torch.float32, device=device
+        )
+    else:
+        out[:] = 0
+
+    conv = torch.nn.functional.conv2d if dims == 2 else torch.nn.functional.conv3d
+    kernels = []
+    for d, s in enumerate(sigma_voxel):
+        kernel = torch.from_numpy(_gaussian_kernel(s)).to(device)
+        shape = [1] * (dims + 2)
+        shape[d + 2] = len(kernel)
+        padding = [0] * dims
+        padding[d] = len(kernel) // 2
+        kernels.append((kernel.reshape(shape), tuple(padding)))
+
+    def aggregate(array):
+        # separable gaussian with zero padding, as scipy's "constant" mode
+        filtered = array[None, None]
+        for kernel, padding in kernels:
+            filtered = conv(filtered, kernel, padding=padding)
+        return filtered[0, 0]
+
+    # bounding boxes of all objects, transferred to the host at once
+    labels, relabeled = torch.unique(segmentation, return_inverse=True)
+    relabeled = relabeled.reshape(-1)
+    bounds = []
+    for d, n in enumerate(segmentation.shape):
+        view = [1] * dims
+        view[d] = n
+        positions = (
+            torch.arange(n, device=device)
+            .reshape(view)
+            .expand(tuple(segmentation.shape))
+            .reshape(-1)
+        )
+        bounds.append(
+            torch.full((len(labels),), n, device=device).scatter_reduce(
+                0, relabeled, positions, "amin"
+            )
+        )
+        bounds.append(
+            torch.full((len(labels),), -1, device=device).scatter_reduce(
+                0, relabeled, positions, "amax"
+            )
+        )
+    bounds = torch.stack(bounds).cpu().numpy()
+
+    for index, label in enumerate(labels.cpu().tolist()):
+        if label == 0:
+            continue
+        region = tuple(
+            slice(
+                int(bounds[2 * d, index]) // downsample * downsample,
+                -(-(int(bounds[2 * d + 1, index]) + 1) // downsample) * downsample,
+            )
+            for d in range(dims)
+        )
+        mask = segmentation[region] == label
+        sub_mask = mask[(slice(None, None, downsample),) * dims].float()
+        coords = [
+            (
+                torch.arange(
+                    r.start // downsample,
+                    r.stop // downsample,
+                    dtype=torch.float32,
+                    device=device,
+                )
+                * v
+            ).reshape((-1,) + (1,) * (dims - d - 1))
+            for d, (r, v) in enumerate(zip(region, sub_voxel_size))
+        ]
+        descriptors = torch.stack(
+            _label_descriptors(sub_mask, coords, sigma, aggregate)
+        ).clip(0.0, 1.0)
+        for d in range(dims):
+            descriptors = descriptors.repeat_interleave(downsample, dim=d + 1)
+        target = out[(slice(None),) + region]
+        target[:] = torch.where(mask, descriptors, target)
+    return out
@@ -9,6 +9,7 @@ from .store.create_store import (
 )
 
 from pathlib import Path
+from typing import Optional
 import logging
 
 logger = logging.getLogger(__name__)
@@ -20,6 +21,10 @@ def validate(
     num_workers: int = 1,
     output_dtype: str = "uint8",
     overwrite: bool = True,
+    precision: str = "float32",
+    channels_last: bool = False,
+    compile_model: Optional[str] = None,
+    precision_tolerance: float = 0.05,
 ):
     """Validate a run at a given iteration. Loads the weights from a previously
     stored checkpoint. Returns the best parameters and scores for this
@@ -46,6 +51,10 @@ def validate(
         num_workers=num_workers,
         output_dtype=output_dtype,
         overwrite=overwrite,
+        precision=precision,
+        channels_last=channels_last,
+        compile_model=compile_model,
+        precision_tolerance=precision_tolerance,
     )
 
 
@@ -56,11 +65,16 @@ def validate_run(
     num_workers: int = 1,
     output_dtype: str = "uint8",
     overwrite: bool = True,
+    precision: str = "float32",
+    channels_last: bool = False,
+    compile_model: Optional[str] = None,
+    precision_tolerance: float = 0.05,
 ):
     """Validate an already loaded run at the given iteration. This does not
     load the weights of that iteration, it is assumed that the model is already
     loaded correctly. Returns the best parameters and scores for this
-    iteration."""
+    iteration. ``precision``, ``channels_last``, ``compile_model`` and
+    ``precision_tolerance`` configure inference, see ``predict``."""
 
     if (
         run.datasplit.validate is None
@@ -161,6 +175,10 @@ def validate_run(
             num_workers=num_workers,
             output_dtype=output_dtype,
             overwrite=overwrite,
+            precision=precision,
+            channels_last=channels_last,
+            compile_model=compile_model,
+            precision_tolerance=precision_tolerance,
         )
 
         print(f"Predicted on dataset {validation_dataset.name}")
@@ -0,0 +1,212 @@
+import multiprocessing
+import os
+import queue
+import time
+import logging
+from typing import List, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from dacapo.store.weights_store import WeightsStore
+
+logger = logging.getLogger(__name__)
+
+
+class ValidationQueue:
+    """Validates iterations of a run in a separate process.
+
+    Iterations are submitted as jobs and validated one after another by a
+    single worker process, which loads the stored weights of each iteration
+    into its own copy of the model. Training can therefore continue (and
+    keep updating its model) while validation is running.
+
+    Validation scores are written to the stats store by the worker. Use
+    ``poll`` to find out which iterations have been validated since the last
+    call, so that the scores can be read back from the stats store.
+
+    Use the queue as a context manager (or call ``close``) to make sure the
+    worker process is stopped: on a normal exit the scheduled validations
+    are finished first, if an exception is raised the worker is terminated.
+
+    Attributes:
+        run_name (str): The name of the run to validate.
+        policy (str): How to handle jobs that pile up while the worker is
+            busy. ``"all"`` validates every submitted iteration in order,
+            ``"latest"`` skips all pending iterations but the latest one.
+        cuda_devices (Optional[str]): If given, the worker only sees these
+            cuda devices (via ``CUDA_VISIBLE_DEVICES``), so that validation
+            can run on a different GPU than training.
+        weights_store (Optional[WeightsStore]): If given, the weights of
+            submitted iterations are protected in this store until their
+            validation is done, so that they are not removed by the
+            ``keep_last_checkpoints`` retention.
+        weights_timeout (float): How many seconds the worker waits for the
+            weights of a submitted iteration to be written before reporting
+            its validation as failed.
+    """
+
+    def __init__(
+        self,
+        run_name: str,
+        policy: str = "all",
+        cuda_devices: Optional[str] = None,
+        weights_store: Optional["WeightsStore"] = None,
+        weights_timeout: float = 600.0,
+    ):
+        assert policy in ("all", "latest"), f"Unknown validation policy {policy}"
+        self.run_name = run_name
+        self.policy = policy
+        self.cuda_devices = cuda_devices
+        self.weights_store = weights_store
+        self.weights_timeout = weights_timeout
+
+        self._context = multiprocessing.get_context("spawn")
+        self._jobs = self._context.Queue()
+        self._results = self._context.Queue()
+        self._process = None
+
+    def submit(self, iteration: int):
+        """Schedule the validation of ``iteration``. The weights of this
+        iteration do not need to be written yet, the worker waits for them."""
+        if self._process is None:
+            self._process = self._context.Process(
+                target=_validation_worker,
+                args=(
+                    self.run_name,
+                    self._jobs,
+                    self._results,
+                    self.policy,
+                    self.cuda_devices,
+                    self.weights_timeout,
+                ),
+                name=f"validate_{self.run_name}",
+            )
+            self._process.start()
+        if self.weights_store is not None:
+            self.weights_store.protect(self.run_name, iteration)
+        self._jobs.put(iteration)
+
+    def poll(self) -> List[int]:
+        """Return the iterations that were validated since the last call."""
+        validated = []
+        while True:
+            try:
+                status, iteration, message = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if self.weights_store is not None:
+                self.weights_store.release(self.run_name, iteration)
+            if status == "validated":
+                validated.append(iteration)
+            elif status == "skipped":
+                print(
+                    f"Skipped validation of run {self.run_name} at iteration {iteration}"
+                )
+            else:
+                logger.error(
+                    f"Validation failed for run {self.run_name} at iteration "
+                    f"{iteration}: {message}"
+                )
+        return validated
+
+    def close(self, wait: bool = True) -> List[int]:
+        """Wait for all scheduled validations to finish and stop the worker,
+        or terminate it immediately if ``wait`` is False. Returns the
+        iterations validated since the last call to ``poll``."""
+        if self._process is not None and not wait:
+            self._process.terminate()
+            self._process.join()
+            self._process = None
+        if self._process is not None:
+            self._jobs.put(None)
+            # drain results while waiting, a process does not exit while
+            # the data it put in a queue has not been consumed
+            validated = []
+            while self._process.is_alive():
+                validated += self.poll()
+                self._process.join(timeout=1)
+            self._process = None
+            return validated + self.poll()
+        return self.poll()
+
+    def __enter__(self) -> "ValidationQueue":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close(wait=exc_type is None)
+
+
+def _parent_alive() -> bool:
+    parent = multiprocessing.parent_process()
+    return parent is None or parent.is_alive()
+
+
+def _validation_worker(run_name, jobs, results, policy, cuda_devices, weights_timeout):
+    if cuda_devices is not None:
+        os.environ["CUDA_VISIBLE_DEVICES"] = cuda_devices
+
+    from dacapo.validate import validate
+    from dacapo.store.create_store import create_weights_store
+
+    weights_store = create_weights_store()
+
+    stop = False
+    while not stop:
+        try:
+            iteration = jobs.get(timeout=1)
+        except queue.Empty:
+            if not _parent_alive():
+                # training died without closing the queue
+                break
+            continue
+        if iteration is None:
+            break
+
+        if policy == "latest":
+            # merge all pending jobs into the latest one
+            while True:
+                try:
+                    pending = jobs.get_nowait()
+                except queue.Empty:
+                    break
+                if pending is None:
+                    stop = True
+                    break
+                results.put(("skipped", iteration, None))
+                iteration = pending
+
+        # weights might still be written asynchronously
+        deadline = time.monotonic() + weights_timeout
+        latest = weights_store.latest_iteration(run_name)
+        while (latest is None or latest < iteration) and (
+            time.monotonic() < deadline and _parent_alive()
+        ):
+            time.sleep(1)
+            latest = weights_store.latest_iteration(run_name)
+        if not _parent_alive():
+            break
+        if latest is None or latest < iteration:
+            results.put(
+                (
+                    "failed",
+                    iteration,
+                    f"weights were not written within {weights_timeout}s",
+                )
+            )
+            continue
+
+        try:
+            validate(run_name, iteration)
+            results.put(("validated", iteration, None))
+        except FileNotFoundError as e:
+            # the weights were removed by the checkpoint retention
+            logger.warning(
+                f"Cannot validate run {run_name} at iteration {iteration}, its "
+                f"weights are not stored anymore: {e!r}"
+            )
+            results.put(("skipped", iteration, repr(e)))
+        except Exception as e:
+            logger.error(
+                f"Validation failed for run {run_name} at iteration {iteration}.",
+                exc_info=e,
+            )
+            results.put(("failed", iteration, repr(e)))
@@ -0,0 +1,48 @@
+from dacapo.utils.affinities import seg_to_affgraph
+
+from funlib.geometry import Coordinate
+
+import numpy as np
+import torch
+
+import itertools
+
+import pytest
+
+
+def brute_force_affinities(seg, neighborhood):
+    affs = np.zeros((len(neighborhood),) + seg.shape, dtype=np.int32)
+    for e, offset in enumerate(neighborhood):
+        for voxel in itertools.product(*(range(s) for s in seg.shape)):
+            neighbor = tuple(v + o for v, o in zip(voxel, offset))
+            if all(0 <= n < s for n, s in zip(neighbor, seg.shape)):
+                affs[(e,) + voxel] = seg[voxel] > 0 and seg[voxel] == seg[neighbor]
+    return affs
+
+
+@pytest.mark.parametrize("dims", [2, 3, 4])
+def test_seg_to_affgraph(dims):
+    rng = np.random.default_rng(dims)
+    seg = rng.integers(0, 3, (6,) * dims, dtype=np.uint64)
+    neighborhood = [
+        Coordinate((1,) + (0,) * (dims - 1)),
+        Coordinate((0,) * (dims - 1) + (-2,)),
+        Coordinate((3,) * dims),
+        Coordinate((0,) * (dims - 1) + (7,)),
+    ]
+    expected = brute_force_affinities(seg, neighborhood)
+
+    for dtype in (np.int32, np.uint8, bool, np.float32):
+        affs = seg_to_affgraph(seg, neighborhood, dtype=dtype)
+        assert affs.dtype == dtype
+        assert (affs == expected).all()
+
+    out = np.full((len(neighborhood) + 2,) + seg.shape, 5, dtype=np.float32)
+    seg_to_affgraph(seg, neighborhood, out=out[: len(neighborhood)])
+    assert (out[: len(neighborhood)] == expected).all()
+    assert (out[len(neighborhood) :] == 5).all()
+
+    affs = seg_to_affgraph(
+        torch.from_numpy(seg.astype(np.int64)), neighborhood, dtype=torch.float32
+    )
+    assert (affs.numpy() == expected).all()
@@ -2,6 +2,14 @@ from ..fixtures import *
 
 from dacapo.store.create_store import create_config_store
 
+from dacapo.experiments.datasplits.datasets.arrays import ResampledArrayConfig
+
+from funlib.geometry import Coordinate, Roi
+
+import attr
+import numpy as np
+import zarr
+
 import pytest
 from pytest_lazyfixture import lazy_fixture
 
@@ -12,6 +20,7 @@ from pytest_lazyfixture import lazy_fixture
         lazy_fixture("cellmap_array"),
         lazy_fixture("zarr_array"),
         lazy_fixture("dummy_array"),
+        lazy_fixture("cached_array"),
     ],
 )
 def test_array_api(options, array_config):
@@ -44,3 +53,260 @@ def test_array_api(options, array_config):
         array.data[0] = data_slice + 1
         assert data_slice.sum() == 0
         assert (array.data[0] - data_slice).sum() == data_slice.size
+
+
+def test_cached_array(options, cached_array):
+    array = cached_array.array_type(cached_array)
+    source = array.source_array
+    # chunks of (8, 4, 2) voxels, the cache holds 2 of them
+    assert array.chunk_shape == (8, 4, 2)
+
+    # a single chunk is read from the source once
+    chunk = Roi((12, 12, 12), (8, 8, 8))
+    assert (array[chunk] == source[chunk]).all()
+    assert (array[chunk] == source[chunk]).all()
+    assert (array.hits, array.misses) == (1, 1)
+
+    # two chunks fit into the cache
+    two_chunks = Roi((12, 12, 12), (16, 8, 8))
+    assert (array[two_chunks] == source[two_chunks]).all()
+    assert (array.hits, array.misses) == (2, 2)
+    assert (array[two_chunks] == source[two_chunks]).all()
+    assert (array.hits, array.misses) == (4, 2)
+
+    # a full scan of the 3 * 3 * 3 chunks starts with the cached first
+    # chunk and evicts all but the last ones
+    assert (array[array.roi] == source[array.roi]).all()
+    assert (array.hits, array.misses) == (5, 2 + 3 * 3 * 3 - 1)
+    assert array._cached_bytes <= array.cache_size
+    assert (0, 0, 0) not in array._chunks and (1, 0, 0) not in array._chunks
+    hits = array.hits
+    last_voxel = Roi(array.roi.end - array.voxel_size, array.voxel_size)
+    assert (array[last_voxel] == source[last_voxel]).all()
+    assert array.hits == hits + 1
+
+
+def test_cached_array_shared_dir(options, cached_array, tmp_path):
+    source_config = cached_array.source_array_config
+    zarr_container = zarr.open(str(source_config.file_name))
+    source = zarr_container[source_config.dataset]
+    doubled = zarr_container.create_dataset(
+        "volumes/doubled", data=source[:] * 2, chunks=source.chunks
+    )
+    doubled.attrs.update(source.attrs.asdict())
+
+    # two arrays sharing a cache directory keep their chunks apart
+    arrays = [
+        attr.evolve(
+            cached_array,
+            source_array_config=attr.evolve(source_config, dataset=dataset),
+            cache_size=2**20,
+            cache_dir=tmp_path / "cache",
+        )
+        for dataset in (source_config.dataset, "volumes/doubled")
+    ]
+    arrays = [array_config.array_type(array_config) for array_config in arrays]
+    for _ in range(2):
+        for array in arrays:
+            roi = array.roi
+            assert (array[roi] == array.source_array[roi]).all()
+    assert all(array.hits == 3 * 3 * 3 for array in arrays)
+
+
+@pytest.mark.parametrize("label_reduction", ["nearest", "mode"])
+def test_resampled_array(options, zarr_array, label_reduction):
+    labels = np.arange(100 * 50 * 24, dtype=np.uint64).reshape(100, 50, 24) % 7
+    zarr.open(str(zarr_array.file_name))[zarr_array.dataset][:, :, :24] = labels
+
+    upsampled_config = ResampledArrayConfig(
+        name="upsampled",
+        source_array_config=zarr_array,
+        upsample=Coordinate(1, 2, 2),
+        downsample=Coordinate(1, 1, 1),
+        interp_order=0,
+    )
+    upsampled = upsampled_config.array_type(upsampled_config)
+    assert upsampled.fast_path
+    roi = Roi((20, 20, 20), (40, 40, 40))
+    assert (upsampled[roi] == upsampled._rescale(roi)).all()
+
+    downsampled_config = ResampledArrayConfig(
+        name="downsampled",
+        source_array_config=zarr_array,
+        upsample=Coordinate(1, 1, 1),
+        downsample=Coordinate(2, 2, 2),
+        interp_order=0,
+        label_reduction=label_reduction,
+    )
+    downsampled = downsampled_config.array_type(downsampled_config)
+    roi = Roi((12, 12, 16), (40, 40, 80))
+    data = downsampled[roi]
+    source = downsampled.source_array[roi]
+    assert data.shape == (20, 10, 10)
+    if label_reduction == "nearest":
+        assert (data == source[1::2, 1::2, 1::2]).all()
+    else:
+        # every label is the most frequent label of its block
+        blocks = source.reshape(20, 2, 10, 2, 10, 2)
+        counts = (blocks == data[:, None, :, None, :, None]).sum(axis=(1, 3, 5))
+        for label in range(7):
+            assert (counts >= (blocks == label).sum(axis=(1, 3, 5))).all()
+
+    # intensities are interpolated, unless averaging blocks is requested
+    for block_mean in (False, True):
+        intensities_config = ResampledArrayConfig(
+            name="intensities",
+            source_array_config=zarr_array,
+            upsample=Coordinate(1, 1, 1),
+            downsample=Coordinate(2, 2, 2),
+            interp_order=1,
+            block_mean=block_mean,
+        )
+        intensities = intensities_config.array_type(intensities_config)
+        assert intensities.fast_path == block_mean
+        assert intensities[roi].shape == (20, 10, 10)
+
+
+@pytest.mark.parametrize("factor", [2, 3])
+def test_resampled_array_nearest(options, zarr_array, factor):
+    labels = np.arange(100 * 50 * 24, dtype=np.uint64).reshape(100, 50, 24) % 7
+    zarr.open(str(zarr_array.file_name))[zarr_array.dataset][:, :, :24] = labels
+
+    # picking the center voxel of each block samples the same voxels as
+    # skimage with interp_order 0, for even and odd factors
+    downsampled_config = ResampledArrayConfig(
+        name="downsampled",
+        source_array_config=zarr_array,
+        upsample=Coordinate(1, 1, 1),
+        downsample=Coordinate(factor, factor, factor),
+        interp_order=0,
+    )
+    downsampled = downsampled_config.array_type(downsampled_config)
+    assert downsampled.fast_path
+    roi = Roi((24, 24, 24), downsampled.voxel_size * Coordinate(10, 5, 5))
+    assert (downsampled[roi] == downsampled._rescale(roi)).all()
+
+
+def test_binarize_array(options, cellmap_array):
+    array = cellmap_array.array_type(cellmap_array)
+    labels = array._source_array[array.roi]
+
+    grouped = array[array.roi]
+    assert grouped.shape == (3, *labels.shape)
+    assert (grouped == array._group_isin(labels)).all()
+    assert (grouped[1] == ((labels >= 10) & (labels < 70))).all()
+
+
+def test_dask_round_trip(options, cached_array, tmp_path):
+    pytest.importorskip("dask")
+    from dacapo.experiments.datasplits.datasets.arrays import (
+        ZarrArray,
+        store_dask,
+        to_dask,
+    )
+    from dacapo.store.array_store import LocalArrayIdentifier
+
+    array = cached_array.array_type(cached_array)
+    data = to_dask(array)
+    assert data.chunksize == (8, 4, 2)
+    assert (data.compute(scheduler="threads") == array[array.roi]).all()
+
+    output = ZarrArray.create_from_array_identifier(
+        LocalArrayIdentifier(tmp_path / "output.zarr", "doubled"),
+        array.axes,
+        array.roi,
+        None,
+        array.voxel_size,
+        np.float32,
+        write_size=Coordinate(8, 4, 2) * array.voxel_size,
+    )
+    store_dask(data * 2, output)
+    assert (output[output.roi] == array[array.roi] * 2).all()
+
+
+@pytest.mark.parametrize("reset", ["delete", "roi", "resume"])
+def test_zarr_array_reset(options, tmp_path, reset):
+    from dacapo.experiments.datasplits.datasets.arrays import ZarrArray
+    from dacapo.store.array_store import LocalArrayIdentifier
+
+    identifier = LocalArrayIdentifier(tmp_path / "reset.zarr", "data")
+    roi = Roi((0, 0, 0), (32, 32, 32))
+    reset_roi = Roi((0, 0, 0), (16, 32, 32))
+
+    def create():
+        return ZarrArray.create_from_array_identifier(
+            identifier,
+            ["z", "y", "x"],
+            roi,
+            None,
+            Coordinate(1, 1, 1),
+            np.uint8,
+            write_size=Coordinate(8, 8, 8),
+            reset=reset,
+            reset_roi=reset_roi,
+        )
+
+    array = create()
+    array[roi] = np.ones((32, 32, 32), dtype=np.uint8)
+
+    data = create()[roi]
+    if reset == "delete":
+        assert (data == 0).all()
+    elif reset == "roi":
+        assert (data[:16] == 0).all() and (data[16:] == 1).all()
+    else:
+        assert (data == 1).all()
+
+
+@pytest.mark.parametrize(
+    "dtype, preset",
+    [
+        (np.float32, "float"),
+        (np.uint8, "uint8"),
+        (np.uint64, "labels"),
+        (np.bool_, "other"),
+    ],
+)
+def test_zarr_array_compressor(options, tmp_path, dtype, preset):
+    from dacapo import Options
+    from dacapo.experiments.datasplits.datasets.arrays import ZarrArray
+    from dacapo.store.array_store import LocalArrayIdentifier
+
+    roi = Roi((0, 0, 0), (16, 16, 16))
+    array = ZarrArray.create_from_array_identifier(
+        LocalArrayIdentifier(tmp_path / "compressed.zarr", preset),
+        ["z", "y", "x"],
+        roi,
+        None,
+        Coordinate(1, 1, 1),
+        dtype,
+        write_size=Coordinate(8, 8, 8),
+    )
+    config = Options.instance().zarr_compressors[preset]
+    compressor_config = array.data.compressor.get_config()
+    assert {key: compressor_config[key] for key in config} == config
+
+    data = np.ones((16, 16, 16), dtype=dtype)
+    array[roi] = data
+    assert (array[roi] == data).all()
+
+
+@pytest.mark.parametrize("compression", [None, "zlib"])
+def test_tiff_array(options, tmp_path, compression):
+    tifffile = pytest.importorskip("tifffile")
+    from dacapo.experiments.datasplits.datasets.arrays import TiffArrayConfig
+
+    data = np.arange(16 * 32 * 32, dtype=np.uint16).reshape(16, 32, 32)
+    tifffile.imwrite(tmp_path / "stack.tif", data, compression=compression)
+    array_config = TiffArrayConfig(
+        name="tiff",
+        file_name=tmp_path / "stack.tif",
+        offset=Coordinate(0, 0, 0),
+        voxel_size=Coordinate(4, 2, 2),
+        axes=["z", "y", "x"],
+    )
+    array = array_config.array_type(array_config)
+    assert array.roi == Roi((0, 0, 0), (64, 64, 64))
+
+    roi = Roi((8, 4, 6), (40, 20, 30))
+    assert (array[roi] == data[2:12, 2:12, 3:18]).all()
@@ -0,0 +1,45 @@
+from dacapo.utils.balance_weights import balance_weights, balance_weights_torch
+
+import numpy as np
+import torch
+
+
+def test_balance_weights_torch():
+    rng = np.random.default_rng(0)
+    moving_counts = None
+    moving_counts_torch = None
+    for _ in range(3):
+        labels = (rng.random((3, 8, 8, 8)) > 0.8).astype(np.uint8)
+        mask = (rng.random((8, 8, 8)) > 0.3).astype(np.uint8)
+        weights, moving_counts = balance_weights(
+            labels, 2, masks=[mask], slab=(1, -1, -1, -1), moving_counts=moving_counts
+        )
+        weights_torch, moving_counts_torch = balance_weights_torch(
+            torch.from_numpy(labels),
+            2,
+            masks=[torch.from_numpy(mask)],
+            slab=(1, -1, -1, -1),
+            moving_counts=moving_counts_torch,
+        )
+        assert np.allclose(weights, weights_torch.numpy())
+        assert np.allclose(moving_counts, moving_counts_torch)
+
+
+def test_balance_weights():
+    labels = np.array([[0, 0, 0, 1], [0, 1, 1, 1]], dtype=np.uint64)
+    mask = np.array([1, 1, 1, 0], dtype=np.uint8)
+
+    out = np.empty(labels.shape, dtype=np.float32)
+    weights, moving_counts = balance_weights(
+        labels, 2, masks=[mask], slab=(1, -1), clipmin=None, clipmax=None, out=out
+    )
+    assert weights is out
+    # one slab per row, masked-out voxels have weight 0
+    assert np.allclose(weights, [[2 / 3, 2 / 3, 2 / 3, 0], [2, 1, 1, 0]])
+    # (count, masked in) per slab and class, starting at (0, 1)
+    assert np.allclose(moving_counts, [[[3, 4], [0, 4]], [[1, 4], [2, 4]]])
+
+    weights, moving_counts = balance_weights(
+        labels, 2, masks=[mask], slab=(1, -1), moving_counts=moving_counts
+    )
+    assert np.allclose(moving_counts, [[[6, 7], [0, 7]], [[2, 7], [4, 7]]])
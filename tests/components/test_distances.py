@@ -0,0 +1,54 @@
+from dacapo.utils.distances import signed_distances
+
+from funlib.geometry import Coordinate
+
+import numpy as np
+from scipy.ndimage import distance_transform_edt, gaussian_filter
+
+import pytest
+
+
+def doubled_grid_distances(labels, voxel_size):
+    # distances to the faces between labels, on a grid with twice the
+    # resolution
+    distances = np.zeros(labels.shape, dtype=np.float32)
+    for c, channel in enumerate(labels):
+        not_boundaries = np.ones(tuple(2 * s - 1 for s in channel.shape), dtype=bool)
+        for d in range(channel.ndim):
+            upper = tuple(
+                slice(1, None) if i == d else slice(None) for i in range(channel.ndim)
+            )
+            lower = tuple(
+                slice(None, -1) if i == d else slice(None) for i in range(channel.ndim)
+            )
+            faces = tuple(
+                slice(1, None, 2) if i == d else slice(None, None, 2)
+                for i in range(channel.ndim)
+            )
+            not_boundaries[faces] = channel[upper] == channel[lower]
+        channel_distances = distance_transform_edt(
+            not_boundaries, sampling=tuple(v / 2 for v in voxel_size)
+        )[(slice(None, None, 2),) * channel.ndim]
+        distances[c] = np.where(channel > 0, channel_distances, -channel_distances)
+    return distances
+
+
+@pytest.mark.parametrize(
+    "voxel_size", [Coordinate(4, 4), Coordinate(4, 4, 4), Coordinate(20, 4, 4)]
+)
+def test_signed_distances(voxel_size):
+    rng = np.random.default_rng(0)
+    shape = (2,) + (32,) * voxel_size.dims
+    smooth = gaussian_filter(rng.random(shape), (0,) + (2,) * voxel_size.dims)
+    labels = (smooth > 0.5).astype(np.uint8)
+    expected = doubled_grid_distances(labels, voxel_size)
+
+    distances = signed_distances(labels, voxel_size)
+    assert (np.sign(distances) == np.sign(expected)).all()
+    # never closer than the true boundary, and off by at most a fraction of
+    # the smallest voxel size
+    assert (np.abs(distances) >= np.abs(expected) - 1e-3).all()
+    assert np.abs(distances - expected).max() <= 0.25 * min(voxel_size)
+
+    empty = signed_distances(np.zeros(shape, dtype=np.uint8), voxel_size)
+    assert (empty == -16 * min(voxel_size)).all()
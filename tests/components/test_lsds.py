@@ -0,0 +1,52 @@
+from dacapo.utils.lsds import local_shape_descriptors
+
+import numpy as np
+import torch
+
+import pytest
+
+# the reference implementation, from the ``lsds`` package
+LsdExtractor = pytest.importorskip("lsd.train").LsdExtractor
+
+
+def segmentation(shape, num_objects, seed):
+    # voronoi cells with some background
+    rng = np.random.default_rng(seed)
+    seeds = rng.random((num_objects, len(shape))) * shape
+    grid = np.stack(np.meshgrid(*[np.arange(s) for s in shape], indexing="ij"), -1)
+    distances = ((grid[..., None, :] - seeds) ** 2).sum(-1)
+    seg = (distances.argmin(-1) + 1).astype(np.uint64) * 7919
+    seg[rng.random(shape) < 0.1] = 0
+    return seg
+
+
+@pytest.mark.parametrize(
+    "shape, voxel_size", [((16, 24, 24), (4, 2, 2)), ((32, 40), (3, 2))]
+)
+@pytest.mark.parametrize("downsample", [1, 2])
+def test_local_shape_descriptors(shape, voxel_size, downsample):
+    seg = segmentation(shape, 12, len(shape))
+    sigma = (max(voxel_size) * 3,) * len(shape)
+    expected = LsdExtractor(sigma, downsample=downsample).get_descriptors(
+        seg, voxel_size=voxel_size
+    )
+
+    for num_workers in (1, 3):
+        lsds = local_shape_descriptors(
+            seg, sigma, voxel_size, downsample=downsample, num_workers=num_workers
+        )
+        assert lsds.shape == expected.shape
+        np.testing.assert_allclose(lsds, expected, atol=1e-5)
+
+    out = np.ones((2 + len(expected),) + seg.shape, dtype=np.float32)
+    local_shape_descriptors(seg, sigma, voxel_size, downsample=downsample, out=out[2:])
+    np.testing.assert_allclose(out[2:], expected, atol=1e-5)
+    assert (out[:2] == 1).all()
+
+    lsds = local_shape_descriptors(
+        torch.from_numpy(seg.astype(np.int64)),
+        sigma,
+        voxel_size,
+        downsample=downsample,
+    )
+    np.testing.assert_allclose(lsds.numpy(), expected, atol=1e-4)
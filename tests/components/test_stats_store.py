@@ -0,0 +1,30 @@
+from dacapo.experiments import TrainingStats, TrainingIterationStats
+from dacapo.store.file_stats_store import FileStatsStore
+
+
+def training_stats(begin, end):
+    return TrainingStats(
+        [
+            TrainingIterationStats(iteration=i, loss=float(i), time=0.1)
+            for i in range(begin, end)
+        ]
+    )
+
+
+def test_training_stats_partial_record(tmp_path):
+    store = FileStatsStore(tmp_path / "stats")
+    store.store_training_stats("run", training_stats(0, 10))
+
+    # simulate an interrupted append of the last record
+    data = store.training_stats / "run.stats"
+    size = data.stat().st_size
+    with data.open("r+b") as f:
+        f.truncate(size - 3)
+    assert store.trained_until("run") == 9
+
+    # appending drops the partial record and keeps the records aligned
+    store.store_training_stats("run", training_stats(0, 20))
+    stats = store.retrieve_training_stats("run")
+    assert stats.trained_until() == 20
+    assert [stat.iteration for stat in stats.iteration_stats] == list(range(20))
+    assert [stat.loss for stat in stats.iteration_stats] == list(range(20))
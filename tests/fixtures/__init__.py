@@ -1,6 +1,6 @@
 from .db import options
 from .architectures import dummy_architecture
-from .arrays import dummy_array, zarr_array, cellmap_array
+from .arrays import dummy_array, zarr_array, cellmap_array, cached_array
 from .datasplits import dummy_datasplit, twelve_class_datasplit, six_class_datasplit
 from .evaluators import binary_3_channel_evaluator
 from .losses import dummy_loss
@@ -2,6 +2,7 @@ from dacapo.experiments.datasplits.datasets.arrays import (
     ZarrArrayConfig,
     BinarizeArrayConfig,
     DummyArrayConfig,
+    CachedArrayConfig,
 )
 
 import zarr
@@ -59,3 +60,29 @@ def cellmap_array(tmp_path):
     )
 
     yield cellmap_array_config
+
+
+@pytest.fixture()
+def cached_array(tmp_path):
+    zarr_array_config = ZarrArrayConfig(
+        name="zarr_array",
+        file_name=tmp_path / "zarr_array.zarr",
+        dataset="volumes/test",
+    )
+    zarr_container = zarr.open(str(zarr_array_config.file_name))
+    dataset = zarr_container.create_dataset(
+        zarr_array_config.dataset,
+        data=np.arange(20 * 10 * 5, dtype=np.float32).reshape(20, 10, 5),
+        chunks=(8, 4, 2),
+    )
+    dataset.attrs["offset"] = (12, 12, 12)
+    dataset.attrs["resolution"] = (1, 2, 4)
+    dataset.attrs["axes"] = ["z", "y", "x"]
+
+    cached_array_config = CachedArrayConfig(
+        name="cached_zarr_array",
+        source_array_config=zarr_array_config,
+        cache_size=2 * 8 * 4 * 2 * 4,
+    )
+
+    yield cached_array_config
@@ -84,3 +84,69 @@ def test_predict(options, run_config, zarr_array, tmp_path):
 
     if debug:
         os.chdir(old_path)
+
+
+def test_read_batch_at_border(options, zarr_array):
+    from dacapo.blockwise.predict_worker import read_batch
+    from dacapo.experiments.datasplits.datasets.arrays import ZarrArray
+
+    from funlib.geometry import Roi
+    import daisy
+    import zarr
+
+    zarr.open(str(zarr_array.file_name))[zarr_array.dataset][:] = 0.5
+    raw_array = ZarrArray(zarr_array)
+
+    # the context of a block at the border of the volume lies partly outside
+    # of it, only the part inside is read
+    inside = Roi((12, 12, 12), (16, 16, 16))
+    border = Roi((4, 4, 4), (16, 16, 16))
+    outside = Roi((-12, -12, -12), (16, 16, 16))
+    total_roi = outside.union(raw_array.roi)
+    blocks = [
+        daisy.Block(total_roi, read_roi, read_roi)
+        for read_roi in (inside, border, outside)
+    ]
+    data = read_batch(raw_array, blocks, {})
+
+    assert data.shape == (3, 1, 16, 8, 4)
+    assert (data[0] == 0.5).all()
+    assert (data[1, :, 8:, 4:, 2:] == 0.5).all()
+    assert data[1].sum() == 0.5 * 8 * 4 * 2
+    assert (data[2] == 0).all()
+
+
+def test_block_written(options, tmp_path):
+    from dacapo.blockwise.predict_worker import block_written
+    from dacapo.experiments.datasplits.datasets.arrays import ZarrArray
+    from dacapo.store.array_store import LocalArrayIdentifier
+
+    from funlib.geometry import Coordinate, Roi
+    import daisy
+    import numpy as np
+
+    output_array = ZarrArray.create_from_array_identifier(
+        LocalArrayIdentifier(tmp_path / "output.zarr", "prediction"),
+        ["z", "y", "x"],
+        Roi((0, 0, 0), (28, 16, 16)),
+        None,
+        Coordinate(1, 1, 1),
+        np.uint8,
+        write_size=Coordinate(8, 8, 8),
+    )
+    output_array[Roi((0, 0, 0), (8, 16, 16))] = np.ones((8, 16, 16), np.uint8)
+    output_array[Roi((24, 0, 0), (4, 16, 16))] = np.ones((4, 16, 16), np.uint8)
+
+    def written(write_roi):
+        block = daisy.Block(output_array.roi, write_roi, write_roi)
+        return block_written(output_array, block)
+
+    assert written(Roi((0, 0, 0), (8, 16, 16)))
+    assert not written(Roi((0, 0, 0), (16, 16, 16)))
+    # chunks only partly inside of the block are ignored
+    assert written(Roi((0, 0, 0), (12, 16, 16)))
+    assert not written(Roi((4, 0, 0), (16, 16, 16)))
+    # the last chunk of the array is smaller than the chunk size
+    assert written(Roi((24, 0, 0), (4, 16, 16)))
+    # blocks without a chunk fully inside are never skipped
+    assert not written(Roi((0, 0, 0), (4, 16, 16)))